@@ -6,6 +6,7 @@ from django.utils import timezone
 from django.db.models import Q
 from .models import SubscriptionPlan, RestaurantSubscription, PaymentMethod, BillingRecord, BillingInvoice
 from menu.models import Restaurant
+from profiles.permissions import managed_restaurant_ids
 from .serializers import (
     SubscriptionPlanSerializer,
     RestaurantSubscriptionSerializer,
@@ -43,7 +44,7 @@ class RestaurantSubscriptionViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return RestaurantSubscription.objects.all()
         elif hasattr(user, 'managed_restaurants'):
-            restaurant_ids = user.managed_restaurants.values_list('id', flat=True)
+            restaurant_ids = managed_restaurant_ids(user)
             return RestaurantSubscription.objects.filter(restaurant_id__in=restaurant_ids)
         else:
             return RestaurantSubscription.objects.none()
@@ -141,7 +142,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return PaymentMethod.objects.all()
         elif hasattr(user, 'managed_restaurants'):
-            restaurant_ids = user.managed_restaurants.values_list('id', flat=True)
+            restaurant_ids = managed_restaurant_ids(user)
             return PaymentMethod.objects.filter(restaurant_id__in=restaurant_ids)
         else:
             return PaymentMethod.objects.none()
@@ -174,7 +175,7 @@ class BillingRecordViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return BillingRecord.objects.all()
         elif hasattr(user, 'managed_restaurants'):
-            restaurant_ids = user.managed_restaurants.values_list('id', flat=True)
+            restaurant_ids = managed_restaurant_ids(user)
             return BillingRecord.objects.filter(
                 subscription__restaurant_id__in=restaurant_ids
             )
@@ -216,7 +217,7 @@ class BillingInvoiceViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return BillingInvoice.objects.all()
         elif hasattr(user, 'managed_restaurants'):
-            restaurant_ids = user.managed_restaurants.values_list('id', flat=True)
+            restaurant_ids = managed_restaurant_ids(user)
             return BillingInvoice.objects.filter(
                 billing_record__subscription__restaurant_id__in=restaurant_ids
             )
@@ -261,7 +262,7 @@ class RestaurantDropdownView(APIView):
         if user.is_superuser:
             restaurants = Restaurant.objects.all()
         elif hasattr(user, 'managed_restaurants'):
-            restaurant_ids = user.managed_restaurants.values_list('id', flat=True)
+            restaurant_ids = managed_restaurant_ids(user)
             restaurants = Restaurant.objects.filter(id__in=restaurant_ids)
         else:
             restaurants = Restaurant.objects.none()
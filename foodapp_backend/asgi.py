@@ -3,6 +3,14 @@ ASGI config for foodapp_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the API with it to enable the live order feed (order/events.py):
+
+    uvicorn foodapp_backend.asgi:application --host 0.0.0.0 --port 8000 --workers 1
+
+Keep it to one worker: order events are published in process memory, so a
+tablet connected to one worker never hears about writes handled by another.
+Under gunicorn/WSGI the rest of the API works, but the feed answers 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
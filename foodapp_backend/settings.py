@@ -52,7 +52,7 @@ if USE_CLOUDINARY:
             "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
         },
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",  # or change if you want static on Cloudinary too
+            "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",  # or change if you want static on Cloudinary too
         },
     }
 
@@ -88,7 +88,7 @@ else:
             "BACKEND": "django.core.files.storage.FileSystemStorage",
         },
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+            "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
         },
     }
 
@@ -127,7 +127,7 @@ AUTHENTICATION_BACKENDS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'profiles.authentication.JWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -141,9 +141,19 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Embed the user's restaurant ids (and token_version) in access tokens so
+# permission checks can skip the membership lookup (profiles/permissions.py)
+jwt_restaurant_claims_str = os.getenv("JWT_RESTAURANT_CLAIMS", "true").strip().lower()
+JWT_RESTAURANT_CLAIMS = jwt_restaurant_claims_str in ("true", "1", "yes", "on", "t")
+
+# Seconds the authenticated user row is cached per user id
+# (profiles/authentication.py); 0 loads it from the database on every request
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "60"))
+
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",         
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -203,6 +213,29 @@ DATABASES = {
 }
 
 
+# Cache
+# Holds the pre-rendered public menu snapshots (menu/cache.py). LocMemCache is
+# per-process; set REDIS_URL in production so every worker shares one copy.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "foodapp",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -240,6 +273,59 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Pre-compressed public menu exports (menu/exports.py)
+# Rewritten on every menu change when enabled; serve MENU_EXPORT_ROOT from
+# nginx/CDN with gzip_static/brotli_static. WhiteNoise only indexes files at
+# startup, so it serves the collected static files, not these.
+menu_export_str = os.getenv("MENU_EXPORT_ENABLED", "false").strip().lower()
+MENU_EXPORT_ENABLED = menu_export_str in ("true", "1", "yes", "on", "t")
+MENU_EXPORT_ROOT = os.getenv("MENU_EXPORT_ROOT", os.path.join(BASE_DIR, 'media', 'menus'))
+
+# Threads writing local image thumbnails (menu/images.py); 0 resizes inline
+MENU_IMAGE_WORKERS = int(os.getenv("MENU_IMAGE_WORKERS", "2"))
+
+# Admin image uploads are staged locally and pushed to storage by those
+# workers instead of inside the request (menu/uploads.py)
+deferred_uploads_str = os.getenv("MENU_IMAGE_DEFERRED_UPLOADS", "false").strip().lower()
+MENU_IMAGE_DEFERRED_UPLOADS = deferred_uploads_str in ("true", "1", "yes", "on", "t")
+MENU_IMAGE_STAGING_ROOT = os.getenv("MENU_IMAGE_STAGING_ROOT", os.path.join(BASE_DIR, 'media_staging'))
+
+# Menu scans are counted in the cache and written to view_menu_count by a
+# background flush after this many views or seconds (menu/counters.py), and
+# by `manage.py flush_view_counts`. A threshold of 0 only flushes from the command.
+MENU_VIEW_COUNT_FLUSH_THRESHOLD = int(os.getenv("MENU_VIEW_COUNT_FLUSH_THRESHOLD", "100"))
+MENU_VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv("MENU_VIEW_COUNT_FLUSH_INTERVAL", "60"))
+
+# Scans are also logged as MenuViewEvent rows, batch inserted per process
+# (menu/analytics.py) and rolled up by `manage.py rollup_menu_views`
+MENU_VIEW_EVENT_BATCH_SIZE = int(os.getenv("MENU_VIEW_EVENT_BATCH_SIZE", "200"))
+MENU_VIEW_EVENT_FLUSH_INTERVAL = int(os.getenv("MENU_VIEW_EVENT_FLUSH_INTERVAL", "30"))
+
+# bulk_create_menu_items: most items per request, rows per INSERT
+MENU_BULK_CREATE_MAX_ITEMS = int(os.getenv("MENU_BULK_CREATE_MAX_ITEMS", "1000"))
+MENU_BULK_CREATE_BATCH_SIZE = int(os.getenv("MENU_BULK_CREATE_BATCH_SIZE", "500"))
+
+# Seconds a user's managed restaurant ids stay cached for permission checks
+# (profiles/permissions.py); dropped early whenever their restaurants change
+RESTAURANT_MEMBERSHIP_CACHE_TTL = int(os.getenv("RESTAURANT_MEMBERSHIP_CACHE_TTL", "300"))
+
+# Live order feed (order/events.py), only served under ASGI by a single
+# uvicorn worker (foodapp_backend/asgi.py): events kept per restaurant for tablets
+# resuming with Last-Event-ID, events queued per open feed before it's
+# dropped, and seconds between keepalive comments
+ORDER_EVENTS_HISTORY = int(os.getenv("ORDER_EVENTS_HISTORY", "500"))
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "1000"))
+ORDER_EVENTS_KEEPALIVE = int(os.getenv("ORDER_EVENTS_KEEPALIVE", "15"))
+
+# Most items per batch item status update (order/api_views.py)
+ORDER_ITEM_BATCH_MAX_ITEMS = int(os.getenv("ORDER_ITEM_BATCH_MAX_ITEMS", "200"))
+
+# `updated_since` order syncs (order/api_views.py): seconds of overlap between
+# one sync and the next, and days deleted orders are remembered for them
+# (`manage.py prune_order_tombstones`); older sync tokens are refused
+ORDER_SYNC_OVERLAP = int(os.getenv("ORDER_SYNC_OVERLAP", "10"))
+ORDER_TOMBSTONE_RETENTION_DAYS = int(os.getenv("ORDER_TOMBSTONE_RETENTION_DAYS", "7"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -18,6 +18,7 @@ class MenuGroupInline(admin.TabularInline):
 @admin.register(Restaurant)
 class RestaurantAdmin(admin.ModelAdmin):
     list_display = ('name', 'address', 'phone', 'view_menu_count')
+    readonly_fields = ('view_menu_count', 'menu_version', 'menu_updated_at')
     inlines = [MenuGroupInline]
 
 @admin.register(MenuGroup)
@@ -29,10 +30,10 @@ class MenuGroupAdmin(admin.ModelAdmin):
 @admin.register(MenuCategory)
 class MenuCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'menu_group', 'cat_order')
-    list_filter = ('menu_group__restaurant', 'menu_group')
+    list_filter = ('restaurant', 'menu_group')
     inlines = [MenuItemInline]
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'price', 'item_order')
-    list_filter = ('category__menu_group__restaurant', 'category__menu_group', 'category')
+    list_filter = ('restaurant', 'category__menu_group', 'category')
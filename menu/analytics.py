@@ -0,0 +1,216 @@
+# menu/analytics.py
+"""
+Menu view analytics.
+
+Each scan becomes a MenuViewEvent, but not with one INSERT per request: events
+are buffered in process memory and written with bulk_create once
+MENU_VIEW_EVENT_BATCH_SIZE have piled up or the oldest is
+MENU_VIEW_EVENT_FLUSH_INTERVAL seconds old, in a background thread. A batch
+size of 1 writes each event inline. Events still buffered when a process dies
+are lost, which analytics can live with.
+
+`manage.py rollup_menu_views` (run it from cron) folds events into per-hour
+and per-Nepali-date (and table) counts and deletes them, so the events table
+stays small and reports only ever read the rollups.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from menu.models import MenuViewDaily, MenuViewEvent, MenuViewHourly
+
+logger = logging.getLogger(__name__)
+
+try:
+    import nepali_datetime
+    NEPALI_DATETIME_AVAILABLE = True
+except ImportError:
+    NEPALI_DATETIME_AVAILABLE = False
+    logger.warning("nepali-datetime package not installed. Daily menu view rollups will use AD dates.")
+
+# Days (for the Nepali date rollup) start at midnight in this time zone
+ANALYTICS_TIME_ZONE = 'Asia/Kathmandu'
+
+
+def batch_size():
+    return getattr(settings, 'MENU_VIEW_EVENT_BATCH_SIZE', 200)
+
+
+def flush_interval():
+    return getattr(settings, 'MENU_VIEW_EVENT_FLUSH_INTERVAL', 30)
+
+
+# ────────────────────────────────────────────────
+# Recording
+# ────────────────────────────────────────────────
+
+_buffer = []
+_buffer_started = None  # monotonic time of the oldest buffered event
+_buffer_lock = threading.Lock()
+
+
+def record_view_event(restaurant_id, table_id=None):
+    """Queue one scan for the next batch insert."""
+    global _buffer, _buffer_started
+    event = MenuViewEvent(restaurant_id=restaurant_id, table_id=table_id, viewed_at=timezone.now())
+    if batch_size() <= 1:
+        MenuViewEvent.objects.bulk_create([event])
+        return
+
+    with _buffer_lock:
+        if not _buffer:
+            _buffer_started = time.monotonic()
+        _buffer.append(event)
+        due = len(_buffer) >= batch_size() or time.monotonic() - _buffer_started >= flush_interval()
+        if not due:
+            return
+        batch, _buffer = _buffer, []
+
+    threading.Thread(target=_write_in_thread, args=(batch,), name='menu-view-events', daemon=True).start()
+
+
+def flush_view_events():
+    """Write whatever this process has buffered, in the calling thread."""
+    global _buffer
+    with _buffer_lock:
+        batch, _buffer = _buffer, []
+    if batch:
+        MenuViewEvent.objects.bulk_create(batch, batch_size=500)
+    return len(batch)
+
+
+def _write_in_thread(batch):
+    close_old_connections()
+    try:
+        MenuViewEvent.objects.bulk_create(batch, batch_size=500)
+    except Exception as e:
+        logger.error(f"Failed to write {len(batch)} menu view event(s): {e}")
+    finally:
+        connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_view_events()
+    except Exception as e:
+        logger.error(f"Failed to write buffered menu view events at exit: {e}")
+
+
+# ────────────────────────────────────────────────
+# Rollups
+# ────────────────────────────────────────────────
+
+def to_nepali_date(day):
+    if NEPALI_DATETIME_AVAILABLE:
+        return nepali_datetime.date.from_datetime_date(day).strftime('%Y-%m-%d')
+    return day.isoformat()
+
+
+def _add_counts(model, key_fields, counts):
+    """Add {key tuple: views} onto existing rollup rows, creating missing ones."""
+    if not counts:
+        return
+    restaurant_ids = {key[0] for key in counts}
+    existing = {}
+    lookup = {f'{key_fields[1]}__in': {key[1] for key in counts}, 'restaurant_id__in': restaurant_ids}
+    for row in model.objects.select_for_update().filter(**lookup):
+        existing[tuple(getattr(row, field) for field in key_fields)] = row
+
+    to_update, to_create = [], []
+    for key, views in counts.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(model(views=views, **dict(zip(key_fields, key))))
+        else:
+            row.views += views
+            to_update.append(row)
+    model.objects.bulk_update(to_update, ['views'], batch_size=500)
+    model.objects.bulk_create(to_create, batch_size=500)
+
+
+def rollup_view_events(chunk_size=50000):
+    """
+    Fold events into MenuViewHourly/MenuViewDaily and delete them, oldest
+    first, in chunks of ids. Returns how many events were rolled up.
+    """
+    bounds = MenuViewEvent.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 0
+
+    local_tz = ZoneInfo(ANALYTICS_TIME_ZONE)
+    total = 0
+    for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+        events = MenuViewEvent.objects.filter(id__gte=start, id__lt=start + chunk_size, id__lte=bounds['last'])
+        with transaction.atomic():
+            hourly = {
+                (row['restaurant_id'], row['hour']): row['views']
+                for row in events.annotate(hour=TruncHour('viewed_at')).values(
+                    'restaurant_id', 'hour'
+                ).annotate(views=Count('id')).order_by()
+            }
+            daily = defaultdict(int)
+            for row in events.annotate(day=TruncDate('viewed_at', tzinfo=local_tz)).values(
+                'restaurant_id', 'day', 'table_id'
+            ).annotate(views=Count('id')).order_by():
+                daily[(row['restaurant_id'], to_nepali_date(row['day']), row['table_id'] or 0)] += row['views']
+
+            _add_counts(MenuViewHourly, ('restaurant_id', 'hour'), hourly)
+            _add_counts(MenuViewDaily, ('restaurant_id', 'nepali_date', 'table_pk'), daily)
+            deleted, _ = events.delete()
+            total += deleted
+    return total
+
+
+# ────────────────────────────────────────────────
+# Reports
+# ────────────────────────────────────────────────
+
+def hourly_report(restaurant_id, start=None, end=None):
+    """Views per hour in [start, end); the last 48 hours by default."""
+    end = end or timezone.now()
+    start = start or end - timedelta(hours=48)
+    return [
+        {'hour': hour, 'views': views}
+        for hour, views in MenuViewHourly.objects.filter(
+            restaurant_id=restaurant_id, hour__gte=start, hour__lt=end
+        ).values_list('hour', 'views')
+    ]
+
+
+def daily_report(restaurant_id, start=None, end=None):
+    """Views per Nepali date (inclusive range of YYYY-MM-DD strings) with a per-table breakdown."""
+    from order.models import RestaurantTable
+
+    rows = MenuViewDaily.objects.filter(restaurant_id=restaurant_id)
+    if start:
+        rows = rows.filter(nepali_date__gte=start)
+    if end:
+        rows = rows.filter(nepali_date__lte=end)
+
+    days = {}
+    table_pks = set()
+    for nepali_date, table_pk, views in rows.values_list('nepali_date', 'table_pk', 'views'):
+        day = days.setdefault(nepali_date, {'nepali_date': nepali_date, 'views': 0, 'tables': []})
+        day['views'] += views
+        if table_pk:
+            day['tables'].append({'table': table_pk, 'views': views})
+            table_pks.add(table_pk)
+
+    names = dict(RestaurantTable.objects.filter(
+        restaurant_id=restaurant_id, pk__in=table_pks
+    ).values_list('pk', 'name'))
+    for day in days.values():
+        for table in day['tables']:
+            table['name'] = names.get(table['table'])
+    return list(days.values())
@@ -0,0 +1,159 @@
+# menu/cache.py
+"""
+Menu versioning and pre-rendered public menu snapshots.
+
+Every restaurant carries a menu_version that menu_changed() bumps whenever a
+menu row or announcement changes. Public menu endpoints expose it as an ETag
+so re-scans of the same QR code can be answered with 304, and the QR menu
+endpoint (RestaurantDetail) serves the JSON snapshot rendered here
+byte-for-byte instead of walking Restaurant → MenuGroup → MenuCategory →
+MenuItem on every scan. Snapshots are keyed by version, so a stale one is
+never served once the version has moved on.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import quote_etag
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'menu:snapshot:{restaurant_id}:{version}'
+
+# Old versions are never read again; let them age out
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# Restaurants with a rebuild queued in the current thread's transaction.
+_pending = threading.local()
+
+
+def snapshot_cache_key(restaurant_id, version):
+    return SNAPSHOT_KEY.format(restaurant_id=restaurant_id, version=version)
+
+
+def get_menu_state(**lookup):
+    """
+    Return (restaurant_id, menu_version, menu_updated_at) for the restaurant
+    matching the lookup, e.g. get_menu_state(pk=1) or
+    get_menu_state(menu_groups=3). Returns None if nothing matches.
+    """
+    from menu.models import Restaurant
+
+    return Restaurant.objects.filter(**lookup).values_list(
+        'pk', 'menu_version', 'menu_updated_at'
+    ).first()
+
+
+def menu_etag(restaurant_id, version):
+    return quote_etag(f'menu-{restaurant_id}-{version}')
+
+
+# Changes with every scan and doesn't bump menu_version, so it is left out of
+# snapshots (and exports) and filled in when the snapshot is served
+LIVE_FIELDS = ('view_menu_count',)
+
+
+def render_menu(restaurant_id):
+    """
+    Render the public menu JSON for a restaurant, without LIVE_FIELDS.
+    Returns (menu_version, payload), or (None, None) if the restaurant does not exist.
+    """
+    from menu.models import Restaurant
+    from menu.serializers import RestaurantSerializer
+
+    restaurant = RestaurantSerializer.setup_eager_loading(
+        Restaurant.objects.filter(pk=restaurant_id)
+    ).first()
+    if restaurant is None:
+        return None, None
+    data = RestaurantSerializer(restaurant).data
+    for field in LIVE_FIELDS:
+        data.pop(field, None)
+    return restaurant.menu_version, JSONRenderer().render(data)
+
+
+def with_view_count(payload, view_menu_count):
+    """Add the live view_menu_count to a rendered snapshot (a JSON object)."""
+    return b'{"view_menu_count":%d,' % view_menu_count + payload[1:]
+
+
+def rebuild_menu_snapshot(restaurant_id):
+    """Render and store the snapshot for the current menu version."""
+    version, payload = render_menu(restaurant_id)
+    if payload is not None:
+        cache.set(snapshot_cache_key(restaurant_id, version), payload, timeout=SNAPSHOT_TIMEOUT)
+    return payload
+
+
+def get_menu_snapshot(restaurant_id, version):
+    """
+    Return (menu_version, payload) for the cached menu JSON at the given
+    version, rendering it on a miss. The returned version can be newer than
+    the requested one if the menu changed in the meantime.
+    Returns (None, None) if the restaurant does not exist.
+    """
+    payload = cache.get(snapshot_cache_key(restaurant_id, version))
+    if payload is not None:
+        return version, payload
+
+    version, payload = render_menu(restaurant_id)
+    if payload is not None:
+        cache.add(snapshot_cache_key(restaurant_id, version), payload, timeout=SNAPSHOT_TIMEOUT)
+    return version, payload
+
+
+def bump_menu_version(restaurant_id):
+    from menu.models import Restaurant
+
+    Restaurant.objects.filter(pk=restaurant_id).update(
+        menu_version=F('menu_version') + 1,
+        menu_updated_at=timezone.now(),
+    )
+
+
+def menu_changed(restaurant_id):
+    """
+    Mark a restaurant's menu as changed.
+
+    The version bump is part of the current transaction; derived caches are
+    refreshed after it commits, so a rolled back write never leaks into the
+    snapshot. Many changes to the same restaurant within one transaction
+    (e.g. a cascade delete) refresh it once.
+    """
+    if restaurant_id is None:
+        return
+
+    bump_menu_version(restaurant_id)
+
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.add(restaurant_id)
+
+    def refresh():
+        # Only the first callback for this restaurant does the work. A rolled
+        # back transaction leaves the id behind, which just means the next
+        # commit's callback rebuilds it.
+        if restaurant_id not in pending:
+            return
+        pending.discard(restaurant_id)
+        try:
+            payload = rebuild_menu_snapshot(restaurant_id)
+        except Exception as e:
+            # The next read renders it on demand
+            logger.error(f"Failed to rebuild menu snapshot for restaurant {restaurant_id}: {e}")
+            payload = None
+
+        if getattr(settings, 'MENU_EXPORT_ENABLED', False):
+            from menu.exports import export_menu
+            try:
+                export_menu(restaurant_id, payload)
+            except Exception as e:
+                logger.error(f"Failed to export static menu for restaurant {restaurant_id}: {e}")
+
+    transaction.on_commit(refresh)
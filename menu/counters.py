@@ -0,0 +1,151 @@
+# menu/counters.py
+"""
+Buffered menu view counter.
+
+Scans don't write Restaurant.view_menu_count. Each one adds to a per-restaurant
+delta in the cache (an atomic INCR on Redis) and the deltas are folded into
+the row with one F() update per restaurant: by `manage.py flush_view_counts`
+(run it from cron), or in a background thread once a restaurant has
+MENU_VIEW_COUNT_FLUSH_THRESHOLD pending views or hasn't been flushed for
+MENU_VIEW_COUNT_FLUSH_INTERVAL seconds (a threshold of 0 leaves flushing to
+the command). Counts served in between are the stored count plus the pending
+delta, which is approximate under concurrency.
+
+Deltas live in the configured cache, so the flush command only sees them when
+that cache is shared between processes (Redis); with LocMemCache each process
+flushes its own on the threshold/interval.
+
+Only one flush per restaurant runs at a time: it holds FLUSH_LOCK_KEY (taken
+with cache.add) while it moves the delta, and a flush that finds the lock
+taken does nothing, since the running one or the next one will pick the
+views up.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.db.models import F
+
+from menu.models import Restaurant
+
+logger = logging.getLogger(__name__)
+
+DELTA_KEY = 'menu:views:{restaurant_id}'
+FLUSHED_KEY = 'menu:views:flushed:{restaurant_id}'
+FLUSH_LOCK_KEY = 'menu:views:flushing:{restaurant_id}'
+# Outlives any flush; only matters if a process dies holding the lock
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def flush_threshold():
+    return getattr(settings, 'MENU_VIEW_COUNT_FLUSH_THRESHOLD', 100)
+
+
+def flush_interval():
+    return getattr(settings, 'MENU_VIEW_COUNT_FLUSH_INTERVAL', 60)
+
+
+def delta_key(restaurant_id):
+    return DELTA_KEY.format(restaurant_id=restaurant_id)
+
+
+def lock_key(restaurant_id):
+    return FLUSH_LOCK_KEY.format(restaurant_id=restaurant_id)
+
+
+def pending_views(restaurant_id):
+    return cache.get(delta_key(restaurant_id)) or 0
+
+
+def add_view(restaurant_id):
+    """Count one view in the cache and return the restaurant's pending delta."""
+    key = delta_key(restaurant_id)
+    # Deltas never expire; they are only ever taken by a flush
+    if cache.add(key, 1, timeout=None):
+        delta = 1
+    else:
+        try:
+            delta = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.add(key, 1, timeout=None)
+            delta = 1
+
+    threshold = flush_threshold()
+    due = threshold and (delta >= threshold or cache.add(
+        FLUSHED_KEY.format(restaurant_id=restaurant_id), 1, timeout=flush_interval()
+    ))
+    # Scans past the threshold keep arriving while a flush runs; only the one
+    # that takes the lock starts a thread
+    if due and cache.add(lock_key(restaurant_id), 1, timeout=FLUSH_LOCK_TIMEOUT):
+        threading.Thread(
+            target=_flush_in_thread, args=(restaurant_id,), name='view-count-flush', daemon=True
+        ).start()
+    return delta
+
+
+def flush_view_count(restaurant_id):
+    """
+    Move a restaurant's pending views into view_menu_count. Returns how many
+    were moved: 0 if there were none or another flush is running.
+    """
+    if not cache.add(lock_key(restaurant_id), 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush_locked(restaurant_id)
+    finally:
+        cache.delete(lock_key(restaurant_id))
+
+
+def _flush_locked(restaurant_id):
+    key = delta_key(restaurant_id)
+    delta = cache.get(key) or 0
+    if delta <= 0:
+        return 0
+    # Nothing else takes from the delta while the lock is held, so taking
+    # exactly what was read leaves views counted since for the next flush
+    try:
+        cache.decr(key, delta)
+    except ValueError:
+        # Evicted since the read; those views are lost either way
+        return 0
+    try:
+        Restaurant.objects.filter(pk=restaurant_id).update(
+            view_menu_count=F('view_menu_count') + delta
+        )
+    except Exception:
+        cache.incr(key, delta)
+        raise
+    cache.set(FLUSHED_KEY.format(restaurant_id=restaurant_id), 1, timeout=flush_interval())
+    return delta
+
+
+def flush_view_counts(restaurant_ids=None, batch_size=500):
+    """Flush every restaurant (or the given ones). Returns the total number of views moved."""
+    if restaurant_ids is None:
+        restaurant_ids = Restaurant.objects.order_by('pk').values_list('pk', flat=True)
+    restaurant_ids = list(restaurant_ids)
+
+    moved = 0
+    for start in range(0, len(restaurant_ids), batch_size):
+        batch = restaurant_ids[start:start + batch_size]
+        # One round trip to find the restaurants with anything pending
+        pending = cache.get_many([delta_key(restaurant_id) for restaurant_id in batch])
+        for restaurant_id in batch:
+            if pending.get(delta_key(restaurant_id)):
+                moved += flush_view_count(restaurant_id)
+    return moved
+
+
+def _flush_in_thread(restaurant_id):
+    # add_view() took the lock for this thread
+    close_old_connections()
+    try:
+        _flush_locked(restaurant_id)
+    except Exception as e:
+        logger.error(f"Failed to flush view count for restaurant {restaurant_id}: {e}")
+    finally:
+        cache.delete(lock_key(restaurant_id))
+        connection.close()
@@ -0,0 +1,89 @@
+# menu/exports.py
+"""
+Static, pre-compressed copies of each restaurant's public menu JSON.
+
+Files are written to MENU_EXPORT_ROOT as <restaurant_id>.json plus .json.gz
+and .json.br siblings, so the front web server or CDN can answer QR scans
+without reaching Django (e.g. nginx `gzip_static on; brotli_static on;`).
+They are refreshed together with the cached snapshot (see menu/cache.py)
+when MENU_EXPORT_ENABLED is on, and in full by `manage.py export_menus`.
+Like the snapshot they leave out view_menu_count, which the API adds live.
+"""
+import gzip
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    logger.warning("Brotli package not installed. Menu exports will be written without .br files.")
+
+
+def export_root():
+    return Path(settings.MENU_EXPORT_ROOT)
+
+
+def export_paths(restaurant_id):
+    base = export_root() / f'{restaurant_id}.json'
+    return {
+        'json': base,
+        'gzip': base.with_name(base.name + '.gz'),
+        'brotli': base.with_name(base.name + '.br'),
+    }
+
+
+def _write_atomic(path, data):
+    # Write next to the target and rename, so a reader never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_menu(restaurant_id, payload=None):
+    """
+    Write the menu JSON and its compressed variants for a restaurant.
+    Renders the menu unless the payload is given. Returns the paths written.
+    """
+    if payload is None:
+        from menu.cache import render_menu
+        _, payload = render_menu(restaurant_id)
+    if payload is None:
+        remove_menu_export(restaurant_id)
+        return []
+
+    paths = export_paths(restaurant_id)
+    paths['json'].parent.mkdir(parents=True, exist_ok=True)
+
+    # mtime=0 keeps the .gz byte-identical for identical menus
+    files = [
+        (paths['json'], payload),
+        (paths['gzip'], gzip.compress(payload, compresslevel=9, mtime=0)),
+    ]
+    if BROTLI_AVAILABLE:
+        files.append((paths['brotli'], brotli.compress(payload)))
+
+    for path, data in files:
+        _write_atomic(path, data)
+    return [path for path, _ in files]
+
+
+def remove_menu_export(restaurant_id):
+    for path in export_paths(restaurant_id).values():
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,38 @@
+# menu/filters.py
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+from menu.search import search_index_available, search_menu_item_ids, search_terms
+
+
+class MenuItemSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the full-text index (menu/search.py).
+
+    Matches are limited to the restaurants returned by the view's
+    get_search_restaurant_ids() (None means all) and to the view's filtered
+    queryset (category, restaurant, ...) inside the search query, so
+    SEARCH_LIMIT counts only items the view would list. They are ordered best
+    match first;
+    the view is flagged with `search_ranked` so pagination keeps that order.
+    Falls back to DRF's icontains search where the database has no index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not search_terms(query) or not search_index_available():
+            return super().filter_queryset(request, queryset, view)
+
+        get_restaurant_ids = getattr(view, 'get_search_restaurant_ids', None)
+        restaurant_ids = get_restaurant_ids() if get_restaurant_ids else None
+
+        item_ids = search_menu_item_ids(query, restaurant_ids, within=queryset)
+        view.search_ranked = True
+        if not item_ids:
+            return queryset.none()
+
+        rank = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(item_ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=item_ids).annotate(search_rank=rank).order_by('search_rank')
@@ -0,0 +1,148 @@
+# menu/fuzzy_search.py
+"""
+Typo-tolerant, in-memory menu search.
+
+Each restaurant gets a trigram index over its item names and descriptions,
+built lazily from one query and kept in a per-process LRU cache keyed by the
+restaurant's menu_version, so any menu change (menu/cache.py) retires it.
+Matching works on character trigrams, so "chowmin" finds "Chow Mein" and
+"mo:mo" finds "Momo" without touching the database.
+"""
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+
+# Items scoring below this (0..1) are not returned
+MIN_SCORE = 0.45
+
+# A description match is worth this much of a name match
+DESCRIPTION_WEIGHT = 0.6
+
+# Devanagari vowel signs are not \w, so allow that block explicitly
+_NON_WORD_RE = re.compile(r'[^\w\u0900-\u097f]+')
+
+
+def normalize(text):
+    """Lowercase and reduce to words, dropping punctuation ("Mo:Mo" -> ["momo"])."""
+    text = (text or '').lower().replace(':', '').replace("'", '').replace('-', ' ')
+    return [word for word in _NON_WORD_RE.split(text) if word]
+
+
+def word_trigrams(words):
+    grams = set()
+    for word in words:
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def compact_trigrams(words):
+    """Trigrams of the words run together, so "chow mein" still matches "chowmin"."""
+    return word_trigrams([''.join(words)]) if words else set()
+
+
+class MenuSearchIndex:
+    """Trigram postings over one restaurant's items."""
+
+    def __init__(self, items):
+        # items: serialized menu items (dicts with at least name/description)
+        self.items = items
+        self.name_words = defaultdict(set)
+        self.name_compact = defaultdict(set)
+        self.description_words = defaultdict(set)
+
+        for position, item in enumerate(items):
+            name = normalize(item.get('name'))
+            for gram in word_trigrams(name):
+                self.name_words[gram].add(position)
+            for gram in compact_trigrams(name):
+                self.name_compact[gram].add(position)
+            for gram in word_trigrams(normalize(item.get('description'))):
+                self.description_words[gram].add(position)
+
+    @staticmethod
+    def _coverage(query_grams, postings):
+        """Fraction of the query's trigrams found in each item's text."""
+        hits = defaultdict(int)
+        for gram in query_grams:
+            for position in postings.get(gram, ()):
+                hits[position] += 1
+        total = len(query_grams)
+        return {position: count / total for position, count in hits.items()}
+
+    def search(self, query, limit=20):
+        """Return [(score, item)] best match first."""
+        words = normalize(query)
+        query_words = word_trigrams(words)
+        if not query_words:
+            return []
+        query_compact = compact_trigrams(words)
+
+        scores = defaultdict(float)
+        for coverage, weight in (
+            (self._coverage(query_words, self.name_words), 1.0),
+            (self._coverage(query_compact, self.name_compact), 1.0),
+            (self._coverage(query_words, self.description_words), DESCRIPTION_WEIGHT),
+        ):
+            for position, value in coverage.items():
+                scores[position] = max(scores[position], value * weight)
+
+        matches = [
+            (round(score, 3), position) for position, score in scores.items() if score >= MIN_SCORE
+        ]
+        # Best score first; shorter names win ties ("Momo" before "Momo Platter")
+        matches.sort(key=lambda match: (-match[0], len(self.items[match[1]].get('name') or ''), match[1]))
+        return [(score, self.items[position]) for score, position in matches[:limit]]
+
+
+# ────────────────────────────────────────────────
+# Per-process LRU cache of indexes
+# ────────────────────────────────────────────────
+
+_indexes = OrderedDict()  # restaurant_id -> (menu_version, MenuSearchIndex)
+_lock = threading.Lock()
+
+
+def _cache_size():
+    return getattr(settings, 'MENU_SEARCH_INDEX_CACHE_SIZE', 64)
+
+
+def build_search_index(restaurant_id):
+    """Build the index for a restaurant's orderable items with a single query."""
+    from menu.models import MenuItem
+    from menu.serializers import MenuItemSerializer
+
+    items = MenuItem.objects.filter(
+        restaurant_id=restaurant_id,
+        is_disabled=False,
+        category__is_disabled=False,
+    ).order_by('item_order', 'id')
+    return MenuSearchIndex(MenuItemSerializer(items, many=True).data)
+
+
+def get_search_index(restaurant_id, menu_version):
+    """Return the index for this menu version, building it on a miss."""
+    with _lock:
+        cached = _indexes.get(restaurant_id)
+        if cached is not None and cached[0] == menu_version:
+            _indexes.move_to_end(restaurant_id)
+            return cached[1]
+
+    # Built outside the lock; a concurrent duplicate build is harmless
+    index = build_search_index(restaurant_id)
+
+    with _lock:
+        cached = _indexes.get(restaurant_id)
+        if cached is None or cached[0] <= menu_version:
+            _indexes[restaurant_id] = (menu_version, index)
+            _indexes.move_to_end(restaurant_id)
+        while len(_indexes) > _cache_size():
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_search_indexes():
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,240 @@
+# menu/images.py
+"""
+Responsive image variants for menu images and restaurant logos.
+
+Variant URLs are computed once, when an image is saved, and stored on the row
+as {"name": <stored file name>, "srcset": {"200": url, "400": url, ...}}, so
+serializers only read a JSON field instead of asking the storage for a URL
+on every request.
+
+On Cloudinary each width is a URL transformation of the original upload and
+is stored straight away. Other storages (FileSystemStorage when
+USE_CLOUDINARY is off) get real thumbnails, written next to the original
+(items/.../momo.jpg -> items/.../momo_w400.webp) by a small thread pool once
+the row is committed, so resizing never holds up the request. Until they are
+ready the original URL is served.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Widths (px) stored for menu item/category images and for logos
+IMAGE_WIDTHS = (200, 400, 800)
+LOGO_WIDTHS = (250, 500, 1000)
+
+# Width used for the plain `image`/`logo` URL in API responses
+DEFAULT_IMAGE_WIDTH = 400
+DEFAULT_LOGO_WIDTH = 500
+
+# Encoder quality for generated thumbnails
+THUMBNAIL_QUALITY = 80
+
+
+def resizes_by_url(storage):
+    """True when the storage resizes images from URL parameters (Cloudinary)"""
+    return isinstance(storage, MediaCloudinaryStorage)
+
+
+def transformed_url(url, width):
+    """Cloudinary URL resized to `width`, auto format and quality"""
+    return url.replace("/upload/", f"/upload/w_{width},q_auto,f_auto/")
+
+
+def build_variants(field_file, widths):
+    url = field_file.url
+    return {
+        'name': field_file.name,
+        'srcset': {str(width): transformed_url(url, width) for width in widths},
+    }
+
+
+def sync_image_variants(instance, file_field, variants_field, widths, update_fields=None):
+    """
+    Bring instance.<variants_field> in line with instance.<file_field>.
+    Call from save() before super().save(), and queue_image_jobs() after it.
+    A pending upload is stored first (as FileField.pre_save would) so the
+    final file name is known. Returns update_fields with the variants field
+    added when the image is saved.
+    """
+    if update_fields is not None:
+        if file_field not in update_fields:
+            return update_fields
+        update_fields = set(update_fields) | {variants_field}
+
+    field_file = getattr(instance, file_field)
+    variants = getattr(instance, variants_field) or {}
+
+    if not field_file:
+        if variants:
+            setattr(instance, variants_field, {})
+        return update_fields
+
+    if not field_file._committed:
+        field_file.save(field_file.name, field_file.file, save=False)
+    if variants.get('name') == field_file.name:
+        return update_fields
+
+    if resizes_by_url(field_file.storage):
+        setattr(instance, variants_field, build_variants(field_file, widths))
+    else:
+        setattr(instance, variants_field, {'name': field_file.name})
+        defer_image_job(instance, process_thumbnails, file_field, variants_field, widths)
+    return update_fields
+
+
+def variant_url(field_file, variants, width):
+    """Stored URL for one width; falls back to the Cloudinary transformation or the original"""
+    if not field_file:
+        return None
+    url = (variants or {}).get('srcset', {}).get(str(width))
+    if url:
+        return url
+    if resizes_by_url(field_file.storage):
+        return transformed_url(field_file.url, width)
+    return field_file.url
+
+
+def variant_srcset(field_file, variants, widths):
+    if not field_file:
+        return None
+    srcset = (variants or {}).get('srcset')
+    if srcset:
+        return srcset
+    if resizes_by_url(field_file.storage):
+        return build_variants(field_file, widths)['srcset']
+    return None
+
+
+# ────────────────────────────────────────────────
+# Local thumbnails
+# ────────────────────────────────────────────────
+
+def thumbnail_format():
+    """WebP where Pillow was built with it, JPEG otherwise"""
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def make_thumbnails(field_file, widths):
+    """Write one resized copy per width next to the original and return the variants."""
+    storage = field_file.storage
+    image_format, extension = thumbnail_format()
+    stem = os.path.splitext(field_file.name)[0]
+
+    with storage.open(field_file.name, 'rb') as source:
+        original = Image.open(source)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    if image_format == 'JPEG' or original.mode not in ('RGB', 'RGBA'):
+        has_alpha = original.mode in ('RGBA', 'LA', 'PA') or 'transparency' in original.info
+        original = original.convert('RGBA' if has_alpha and image_format != 'JPEG' else 'RGB')
+
+    srcset = {}
+    for width in widths:
+        # Never upscale; small originals are re-encoded at their own size
+        if width < original.width:
+            height = max(1, round(original.height * width / original.width))
+            thumbnail = original.resize((width, height), Image.LANCZOS)
+        else:
+            thumbnail = original
+        buffer = BytesIO()
+        thumbnail.save(buffer, image_format, quality=THUMBNAIL_QUALITY)
+
+        name = f"{stem}_w{width}.{extension}"
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+        srcset[str(width)] = storage.url(name)
+
+    return {'name': field_file.name, 'srcset': srcset}
+
+
+def process_thumbnails(model, pk, file_field, variants_field, widths):
+    """Generate thumbnails for one row and store their URLs if its image hasn't changed since."""
+    from menu.cache import menu_changed
+    from menu.signals import get_restaurant_id
+
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, file_field):
+        return
+    field_file = getattr(instance, file_field)
+
+    try:
+        variants = make_thumbnails(field_file, widths)
+    except Exception as e:
+        logger.error(f"Failed to generate thumbnails for {model.__name__} {pk} ({field_file.name}): {e}")
+        return
+
+    with transaction.atomic():
+        updated = model.objects.filter(
+            pk=pk, **{file_field: field_file.name}
+        ).update(**{variants_field: variants})
+        if updated:
+            menu_changed(get_restaurant_id(instance))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def image_workers():
+    return getattr(settings, 'MENU_IMAGE_WORKERS', 2)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=image_workers(), thread_name_prefix='menu-images'
+            )
+        return _executor
+
+
+def _run_in_worker(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception(f"Image worker job {func.__name__} failed")
+    finally:
+        connection.close()
+
+
+def run_image_job(func, *args):
+    """Run func(*args) on the image worker pool; MENU_IMAGE_WORKERS = 0 runs it inline (tests, scripts)."""
+    if image_workers() <= 0:
+        func(*args)
+        return
+    _get_executor().submit(_run_in_worker, func, *args)
+
+
+IMAGE_JOBS_ATTR = '_image_jobs'
+
+
+def defer_image_job(instance, func, *args):
+    """
+    Have func(model, pk, *args) run on the image workers for this instance
+    once the save in progress has written the row (see queue_image_jobs).
+    """
+    instance.__dict__.setdefault(IMAGE_JOBS_ATTR, []).append((func, args))
+
+
+def queue_image_jobs(instance):
+    """
+    Call from save() after super().save(). The row now exists with its new
+    file name, so the jobs can run as soon as it's committed: at once in
+    autocommit, or when the enclosing atomic block commits.
+    """
+    model, pk = type(instance), instance.pk
+    for func, args in instance.__dict__.pop(IMAGE_JOBS_ATTR, ()):
+        transaction.on_commit(lambda func=func, args=args: run_image_job(func, model, pk, *args))
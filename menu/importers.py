@@ -0,0 +1,306 @@
+# menu/importers.py
+"""
+Menu import: upserts groups, categories and items into one restaurant from a
+stream of flat rows, e.g. parsed CSV or NDJSON.
+
+Each row names its group (MenuGroup.type) and category, and optionally an
+item with its fields:
+
+    group, group_order, category, cat_order, name, description, price,
+    item_order, is_disabled, is_highlight
+
+Rows are matched by natural key (group type / category name / item name
+within the restaurant). Existing item ids are loaded once up front; new and
+changed items are written with bulk_create/bulk_update every `chunk_size`
+rows, so memory stays flat however long the input is. Groups and
+categories are created as they first appear. Writes skip model signals, so
+finish() updates the search index and bumps the menu version once.
+"""
+import codecs
+import csv
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from menu.cache import menu_changed
+from menu.models import MenuCategory, MenuGroup, MenuItem
+from menu.search import index_menu_items
+
+ITEM_FIELDS = ('description', 'price', 'item_order', 'is_disabled', 'is_highlight')
+
+TRUE_STRINGS = ("true", "1", "yes", "on", "t")
+
+
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+class MenuImportError(Exception):
+    pass
+
+
+class MenuImporter:
+    """Feed rows with add_row(), then call finish() (inside a transaction)."""
+
+    def __init__(self, restaurant, chunk_size=None):
+        self.restaurant = restaurant
+        self.chunk_size = chunk_size or getattr(settings, 'MENU_BULK_CREATE_BATCH_SIZE', 500)
+        self.report = []
+        self.counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0,
+                       'groups_created': 0, 'groups_updated': 0,
+                       'categories_created': 0, 'categories_updated': 0}
+        self.touched_item_ids = set()
+        # Every item named by the input, written or not
+        self.seen_item_ids = set()
+
+        self.groups = {
+            group.type: group for group in MenuGroup.objects.filter(restaurant=restaurant)
+        }
+        self.categories = {
+            (category.menu_group_id, category.name): category
+            for category in MenuCategory.objects.filter(restaurant=restaurant)
+        }
+        self.items = {
+            (item.category_id, item.name): item
+            for item in MenuItem.objects.filter(restaurant=restaurant).only(
+                'id', 'name', 'category_id', *ITEM_FIELDS
+            )
+        }
+        # Pending writes for the current chunk, and the report entries
+        # waiting for the ids of their items
+        self._new = {}
+        self._changed = {}
+        self._waiting = []
+
+    # Groups and categories in bulk (optional; add_row creates missing ones too)
+
+    def sync_groups(self, groups):
+        """Create or reorder groups in one pass. groups: [(type, group_order)]"""
+        new, changed = [], []
+        for group_type, group_order in groups:
+            group = self.groups.get(group_type)
+            if group is None:
+                if not group_type or len(group_type) > MenuGroup._meta.get_field('type').max_length:
+                    raise MenuImportError(f"Invalid group type {group_type!r}")
+                group = MenuGroup(restaurant=self.restaurant, type=group_type, group_order=group_order)
+                self.groups[group_type] = group
+                new.append(group)
+            elif group.group_order != group_order:
+                group.group_order = group_order
+                if group.pk is not None:
+                    changed.append(group)
+        MenuGroup.objects.bulk_create(new, batch_size=self.chunk_size)
+        MenuGroup.objects.bulk_update(changed, ['group_order'], batch_size=self.chunk_size)
+        self.counts['groups_created'] += len(new)
+        self.counts['groups_updated'] += len(changed)
+
+    def sync_categories(self, categories):
+        """Create or update categories in one pass. categories: [(group type, name, cat_order, is_disabled)]"""
+        new, changed = [], []
+        for group_type, name, cat_order, is_disabled in categories:
+            group = self.groups[group_type]
+            category = self.categories.get((group.pk, name))
+            if category is None:
+                if not name or len(name) > MenuCategory._meta.get_field('name').max_length:
+                    raise MenuImportError(f"Invalid category name {name!r}")
+                category = MenuCategory(menu_group=group, restaurant=self.restaurant, name=name,
+                                        cat_order=cat_order, is_disabled=is_disabled)
+                self.categories[(group.pk, name)] = category
+                new.append(category)
+            elif (category.cat_order, category.is_disabled) != (cat_order, is_disabled):
+                category.cat_order, category.is_disabled = cat_order, is_disabled
+                if category.pk is not None:
+                    changed.append(category)
+        MenuCategory.objects.bulk_create(new, batch_size=self.chunk_size)
+        MenuCategory.objects.bulk_update(changed, ['cat_order', 'is_disabled'], batch_size=self.chunk_size)
+        self.counts['categories_created'] += len(new)
+        self.counts['categories_updated'] += len(changed)
+
+    # Rows
+
+    def add_row(self, row_number, row):
+        entry = {'row': row_number}
+        try:
+            if not isinstance(row, dict):
+                raise MenuImportError("Row must be an object")
+            row = {key.strip() if isinstance(key, str) else key: _clean(value) for key, value in row.items()}
+            group = self.get_group(row)
+            category = self.get_category(group, row)
+            if row.get('name') in (None, ''):
+                entry.update(status='ok', group=group.type, category=category.name if category else None)
+                self.report.append(entry)
+                return
+            if category is None:
+                raise MenuImportError("An item needs a category")
+            self.add_item(category, row, entry)
+        except MenuImportError as e:
+            entry.update(status='error', errors=[str(e)])
+            self.counts['errors'] += 1
+        self.report.append(entry)
+
+        if len(self._waiting) >= self.chunk_size:
+            self.flush()
+
+    def get_group(self, row):
+        group_type = row.get('group')
+        if not group_type:
+            raise MenuImportError("Missing required field 'group'")
+        group = self.groups.get(group_type)
+        if group is None:
+            if len(group_type) > MenuGroup._meta.get_field('type').max_length:
+                raise MenuImportError("Group type is too long")
+            group = MenuGroup(restaurant=self.restaurant, type=group_type,
+                              group_order=self.parse_order(row, 'group_order'))
+            MenuGroup.objects.bulk_create([group])
+            self.groups[group_type] = group
+            self.counts['groups_created'] += 1
+        return group
+
+    def get_category(self, group, row):
+        name = row.get('category')
+        if not name:
+            return None
+        category = self.categories.get((group.pk, name))
+        if category is None:
+            if len(name) > MenuCategory._meta.get_field('name').max_length:
+                raise MenuImportError("Category name is too long")
+            category = MenuCategory(menu_group=group, restaurant=self.restaurant, name=name,
+                                    cat_order=self.parse_order(row, 'cat_order'))
+            MenuCategory.objects.bulk_create([category])
+            self.categories[(group.pk, name)] = category
+            self.counts['categories_created'] += 1
+        return category
+
+    @staticmethod
+    def parse_order(row, field):
+        value = row.get(field)
+        if value in (None, ''):
+            return 0
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise MenuImportError(f"{field} must be a valid integer")
+        if value < 0:
+            raise MenuImportError(f"{field} must be non-negative")
+        return value
+
+    def add_item(self, category, row, entry):
+        from menu.serializers import BulkMenuItemCreateSerializer
+
+        data = {field: row[field] for field in ('name',) + ITEM_FIELDS if row.get(field) not in (None, '')}
+        for field in ('is_disabled', 'is_highlight'):
+            if field in data:
+                data[field] = parse_bool(data[field])
+        errors = BulkMenuItemCreateSerializer.validate_item(data)
+        if errors:
+            raise MenuImportError('; '.join(errors))
+
+        key = (category.pk, data['name'])
+        item = self.items.get(key)
+        entry.update(group=category.menu_group.type, category=category.name, name=data['name'])
+        if item is None:
+            item = MenuItem(category=category, restaurant=self.restaurant, **data)
+            self.items[key] = item
+            self._new[key] = item
+            entry['status'] = 'created'
+            self._waiting.append((item, entry))
+            return
+
+        changed = [
+            field for field in ITEM_FIELDS
+            if field in data and getattr(item, field) != data[field]
+        ]
+        for field in changed:
+            setattr(item, field, data[field])
+        if item.pk is None:
+            # Repeated before the chunk that inserts it was written
+            entry['status'] = 'created'
+        elif changed:
+            self._changed[key] = item
+            entry['status'] = 'updated'
+        else:
+            entry['status'] = 'unchanged'
+        self._waiting.append((item, entry))
+
+    # Writes
+
+    def flush(self):
+        if self._new:
+            MenuItem.objects.bulk_create(list(self._new.values()), batch_size=self.chunk_size)
+        if self._changed:
+            MenuItem.objects.bulk_update(list(self._changed.values()), ITEM_FIELDS, batch_size=self.chunk_size)
+        for status, pending in (('created', self._new), ('updated', self._changed)):
+            self.counts[status] += len(pending)
+            self.touched_item_ids.update(item.pk for item in pending.values())
+        for item, entry in self._waiting:
+            entry['id'] = item.pk
+            self.seen_item_ids.add(item.pk)
+            if entry['status'] == 'unchanged':
+                self.counts['unchanged'] += 1
+        self._new, self._changed, self._waiting = {}, {}, []
+
+    def finish(self):
+        """Write what's left, then reindex touched items and bump the menu version once."""
+        self.flush()
+        touched = sorted(self.touched_item_ids)
+        for start in range(0, len(touched), self.chunk_size):
+            index_menu_items(touched[start:start + self.chunk_size])
+        structure_changed = any(self.counts[key] for key in (
+            'groups_created', 'groups_updated', 'categories_created', 'categories_updated'
+        ))
+        if touched or structure_changed:
+            menu_changed(self.restaurant.pk)
+        return self.counts
+
+
+# ────────────────────────────────────────────────
+# Input formats
+# ────────────────────────────────────────────────
+
+def iter_text_lines(stream, encoding='utf-8'):
+    """Decode a binary stream (request body, uploaded file) line by line."""
+    return codecs.iterdecode(iter(stream.readline, b''), encoding)
+
+
+def iter_csv_rows(lines):
+    """(row_number, dict) per data row; the first line is the header. Row numbers count the header as 1."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(lines):
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line, parse_float=Decimal)
+        except ValueError as e:
+            yield row_number, MenuImportError(f"Invalid JSON: {e}")
+
+
+def import_rows(restaurant, rows, chunk_size=None, dry_run=False):
+    """
+    Run an import in one transaction and return (counts, report). A dry run
+    does all the work, then rolls it back.
+    """
+    with transaction.atomic():
+        importer = MenuImporter(restaurant, chunk_size=chunk_size)
+        for row_number, row in rows:
+            if isinstance(row, MenuImportError):
+                importer.report.append({'row': row_number, 'status': 'error', 'errors': [str(row)]})
+                importer.counts['errors'] += 1
+                continue
+            importer.add_row(row_number, row)
+        counts = importer.finish()
+        if dry_run:
+            transaction.set_rollback(True)
+    return counts, importer.report
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from menu.cache import menu_changed
+from menu.models import MenuCategory, MenuGroup, MenuItem
+from menu.search import index_menu_items
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that MenuCategory.restaurant and MenuItem.restaurant match their menu group's restaurant "
+        "(they can drift after queryset.update() of menu_group/category). --fix repairs them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Repair mismatched rows")
+
+    def handle(self, *args, **options):
+        categories = MenuCategory.objects.exclude(restaurant_id=F('menu_group__restaurant_id'))
+        bad_categories = list(categories.values_list('pk', 'restaurant_id', 'menu_group__restaurant_id'))
+        for pk, stored, actual in bad_categories:
+            self.stdout.write(f"Category {pk}: restaurant {stored}, should be {actual}")
+
+        if options['fix'] and bad_categories:
+            with transaction.atomic():
+                MenuCategory.objects.filter(pk__in=[pk for pk, _, _ in bad_categories]).update(
+                    restaurant_id=Subquery(
+                        MenuGroup.objects.filter(pk=OuterRef('menu_group_id')).values('restaurant_id')[:1]
+                    )
+                )
+
+        # Items are checked after categories are repaired, against the category's column
+        items = MenuItem.objects.exclude(restaurant_id=F('category__restaurant_id'))
+        bad_items = list(items.values_list('pk', 'restaurant_id', 'category__restaurant_id'))
+        for pk, stored, actual in bad_items:
+            self.stdout.write(f"Item {pk}: restaurant {stored}, should be {actual}")
+
+        if not options['fix']:
+            if bad_categories or bad_items:
+                raise CommandError(
+                    f"{len(bad_categories)} categorie(s) and {len(bad_items)} item(s) out of step; run with --fix"
+                )
+            self.stdout.write(self.style.SUCCESS("Menu restaurant columns are consistent."))
+            return
+
+        with transaction.atomic():
+            if bad_items:
+                MenuItem.objects.filter(pk__in=[pk for pk, _, _ in bad_items]).update(
+                    restaurant_id=Subquery(
+                        MenuCategory.objects.filter(pk=OuterRef('category_id')).values('restaurant_id')[:1]
+                    )
+                )
+                # Search rows carry the restaurant id
+                index_menu_items([pk for pk, _, _ in bad_items])
+            affected = {
+                restaurant_id for rows in (bad_categories, bad_items)
+                for _, stored, actual in rows for restaurant_id in (stored, actual)
+            }
+            for restaurant_id in sorted(affected):
+                menu_changed(restaurant_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {len(bad_categories)} categorie(s) and {len(bad_items)} item(s)."
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from menu.exports import export_menu, export_root
+from menu.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = "Write pre-compressed static copies (.json, .json.gz, .json.br) of every restaurant's public menu."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help="Only export this restaurant id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        restaurant_ids = options['restaurants'] or list(
+            Restaurant.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+        exported = 0
+        for restaurant_id in restaurant_ids:
+            paths = export_menu(restaurant_id)
+            if not paths:
+                self.stderr.write(f"Restaurant {restaurant_id} not found, skipped.")
+                continue
+            exported += 1
+            if options['verbosity'] > 1:
+                for path in paths:
+                    self.stdout.write(f"  {path} ({path.stat().st_size} bytes)")
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {exported} menu(s) to {export_root()}."))
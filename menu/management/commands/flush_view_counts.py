@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from menu.counters import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = "Write menu views buffered in the cache to Restaurant.view_menu_count. Run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help="Only flush this restaurant id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        moved = flush_view_counts(options['restaurants'])
+        self.stdout.write(self.style.SUCCESS(f"Flushed {moved} menu view(s)."))
@@ -0,0 +1,160 @@
+import json
+import os
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from menu.cache import menu_changed
+from menu.importers import ITEM_FIELDS, MenuImporter, MenuImportError
+from menu.models import MenuCategory, MenuGroup, MenuItem, Restaurant
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'menu.json')
+
+# Restaurant fields taken from the file when present
+RESTAURANT_FIELDS = ('address', 'phone', 'facebook_url', 'instagram_url', 'tiktok_url')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load restaurant menus from a JSON file in the public menu API format "
+        "(a restaurant with nested menu_groups/categories/items, or a list of them). "
+        "Rows are matched by name and created or updated in bulk; running it twice changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH, help="JSON file (default: menu.json next to this command)")
+        parser.add_argument(
+            '--restaurant', type=int,
+            help="Load into this existing restaurant id instead of matching by name (file must hold one menu)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without saving")
+        parser.add_argument(
+            '--replace', action='store_true',
+            help="Remove groups, categories and items missing from the file "
+                 "(items already ordered are disabled instead)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                data = json.load(f, parse_float=Decimal)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        menus = data if isinstance(data, list) else [data]
+        if options['restaurant'] is not None and len(menus) != 1:
+            raise CommandError("--restaurant needs a file with exactly one menu")
+
+        with transaction.atomic():
+            for menu in menus:
+                self.load_menu(menu, options)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING("Dry run, nothing saved."))
+
+    def get_restaurant(self, menu, restaurant_id):
+        if restaurant_id is not None:
+            restaurant = Restaurant.objects.filter(pk=restaurant_id).first()
+            if restaurant is None:
+                raise CommandError(f"Restaurant {restaurant_id} not found")
+        else:
+            name = menu.get('name')
+            if not name:
+                raise CommandError("Each menu needs a restaurant name")
+            restaurant = Restaurant.objects.filter(name=name).order_by('pk').first()
+            if restaurant is None:
+                restaurant = Restaurant.objects.create(
+                    name=name, **{field: menu.get(field) or '' for field in RESTAURANT_FIELDS}
+                )
+                self.stdout.write(f"Created restaurant {restaurant.name} ({restaurant.pk})")
+                return restaurant
+
+        changed = [
+            field for field in RESTAURANT_FIELDS
+            if field in menu and (menu[field] or '') != getattr(restaurant, field)
+        ]
+        for field in changed:
+            setattr(restaurant, field, menu[field] or '')
+        if changed:
+            restaurant.save(update_fields=changed)
+        return restaurant
+
+    def load_menu(self, menu, options):
+        restaurant = self.get_restaurant(menu, options['restaurant'])
+        groups = menu.get('menu_groups') or []
+        importer = MenuImporter(restaurant)
+
+        try:
+            importer.sync_groups([
+                (group.get('type'), int(group.get('group_order') or 0)) for group in groups
+            ])
+            importer.sync_categories([
+                (group['type'], category.get('name'), int(category.get('cat_order') or 0),
+                 bool(category.get('is_disabled', False)))
+                for group in groups for category in group.get('categories') or []
+            ])
+        except (MenuImportError, TypeError, ValueError) as e:
+            raise CommandError(f"{restaurant.name}: {e}")
+
+        row_number = 0
+        for group in groups:
+            for category in group.get('categories') or []:
+                for item in category.get('items') or []:
+                    row_number += 1
+                    importer.add_row(row_number, {
+                        'group': group['type'],
+                        'category': category['name'],
+                        **{field: item[field] for field in ('name',) + ITEM_FIELDS if field in item},
+                    })
+
+        errors = [entry for entry in importer.report if entry['status'] == 'error']
+        if errors:
+            for entry in errors:
+                self.stderr.write(f"Item {entry['row']}: {'; '.join(entry['errors'])}")
+            raise CommandError(f"{restaurant.name}: {len(errors)} invalid item(s), nothing loaded")
+
+        counts = importer.finish()
+        self.stdout.write(
+            f"{restaurant.name}: {counts['created']} item(s) created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged; {counts['groups_created']} group(s) and "
+            f"{counts['categories_created']} categorie(s) created"
+        )
+        if options['replace']:
+            self.remove_missing(restaurant, importer, groups)
+
+    def remove_missing(self, restaurant, importer, groups):
+        keep_groups = {importer.groups[group['type']].pk for group in groups}
+        keep_categories = {
+            importer.categories[(importer.groups[group['type']].pk, category['name'])].pk
+            for group in groups for category in group.get('categories') or []
+        }
+
+        stale_items = set(MenuItem.objects.filter(
+            restaurant=restaurant
+        ).values_list('pk', flat=True)) - importer.seen_item_ids
+        # Items on existing orders are protected; hide them instead
+        ordered = set(MenuItem.objects.filter(
+            pk__in=stale_items, order_items__isnull=False
+        ).values_list('pk', flat=True))
+        MenuItem.objects.filter(pk__in=stale_items - ordered).delete()
+        disabled = MenuItem.objects.filter(pk__in=ordered, is_disabled=False).update(is_disabled=True)
+
+        stale_categories = MenuCategory.objects.filter(
+            restaurant=restaurant
+        ).exclude(pk__in=keep_categories)
+        disabled_categories = stale_categories.filter(
+            items__isnull=False, is_disabled=False
+        ).update(is_disabled=True)
+        stale_categories.filter(items__isnull=True).delete()
+        MenuGroup.objects.filter(restaurant=restaurant, categories__isnull=True).exclude(
+            pk__in=keep_groups
+        ).delete()
+        # Queryset updates send no signals; deletes do (menu/signals.py)
+        if disabled or disabled_categories:
+            menu_changed(restaurant.pk)
+
+        self.stdout.write(
+            f"{restaurant.name}: removed {len(stale_items) - len(ordered)} item(s) missing from the file"
+            + (f", disabled {disabled} already ordered" if disabled else "")
+        )
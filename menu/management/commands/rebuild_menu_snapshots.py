@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from menu.cache import rebuild_menu_snapshot
+from menu.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached public menu snapshot for every restaurant (or the given ones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant', type=int, action='append', dest='restaurants',
+            help="Only rebuild this restaurant id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        restaurant_ids = options['restaurants'] or list(
+            Restaurant.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+        rebuilt = 0
+        for restaurant_id in restaurant_ids:
+            payload = rebuild_menu_snapshot(restaurant_id)
+            if payload is None:
+                self.stderr.write(f"Restaurant {restaurant_id} not found, skipped.")
+                continue
+            rebuilt += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Restaurant {restaurant_id}: {len(payload)} bytes")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} menu snapshot(s)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from menu.search import rebuild_search_index, search_index_available
+
+
+class Command(BaseCommand):
+    help = "Rebuild the menu item full-text search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help="Only reindex this restaurant id")
+
+    def handle(self, *args, **options):
+        if not search_index_available():
+            self.stderr.write("This database has no full-text index; search falls back to icontains.")
+            return
+
+        count = rebuild_search_index(restaurant_id=options['restaurant'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} menu item(s)."))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from menu.cache import menu_changed
+from menu.images import IMAGE_WIDTHS, LOGO_WIDTHS, build_variants, make_thumbnails, resizes_by_url
+from menu.models import MenuCategory, MenuItem, Restaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute stored responsive image URLs for logos, category and item images "
+        "(regenerating thumbnails on local storage)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help="Only refresh this restaurant id")
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recompute every image, not only rows whose variants are missing or stale",
+        )
+
+    def handle(self, *args, **options):
+        restaurant_id = options['restaurant']
+        sources = (
+            (Restaurant.objects.all(), 'logo', 'logo_variants', LOGO_WIDTHS, 'pk'),
+            (MenuCategory.objects.all(), 'image', 'image_variants', IMAGE_WIDTHS, 'restaurant_id'),
+            (MenuItem.objects.all(), 'image', 'image_variants', IMAGE_WIDTHS, 'restaurant_id'),
+        )
+
+        changed_restaurants = set()
+        total = 0
+        with transaction.atomic():
+            for queryset, file_field, variants_field, widths, restaurant_path in sources:
+                queryset = queryset.exclude(**{file_field: ''}).exclude(**{f'{file_field}__isnull': True})
+                if restaurant_id is not None:
+                    queryset = queryset.filter(**{restaurant_path: restaurant_id})
+                rows = []
+                for obj in queryset.annotate(owner_id=F(restaurant_path)).order_by('pk'):
+                    field_file = getattr(obj, file_field)
+                    current = getattr(obj, variants_field) or {}
+                    if not options['all'] and current.get('name') == field_file.name and current.get('srcset'):
+                        continue
+                    try:
+                        if resizes_by_url(field_file.storage):
+                            variants = build_variants(field_file, widths)
+                        else:
+                            variants = make_thumbnails(field_file, widths)
+                    except Exception as e:
+                        self.stderr.write(f"{queryset.model.__name__} {obj.pk} ({field_file.name}): {e}")
+                        continue
+                    setattr(obj, variants_field, variants)
+                    rows.append(obj)
+                    changed_restaurants.add(obj.owner_id)
+                queryset.model.objects.bulk_update(rows, [variants_field], batch_size=500)
+                total += len(rows)
+
+            for changed_id in sorted(changed_restaurants):
+                menu_changed(changed_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {total} image(s) across {len(changed_restaurants)} restaurant(s)."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from menu.models import IMAGE_UPLOAD_FAILED, IMAGE_UPLOAD_PENDING, MenuCategory, MenuItem
+from menu.uploads import upload_staged_image
+
+
+class Command(BaseCommand):
+    help = "Upload staged menu images whose deferred upload failed or never ran."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-pending', action='store_true',
+            help="Also retry uploads still marked pending (e.g. after a worker restart)",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [IMAGE_UPLOAD_FAILED]
+        if options['include_pending']:
+            statuses.append(IMAGE_UPLOAD_PENDING)
+
+        uploaded = failed = 0
+        for model in (MenuCategory, MenuItem):
+            rows = model.objects.filter(
+                image_upload_status__in=statuses
+            ).exclude(image_staging_name='').values_list('pk', 'image_staging_name')
+            for pk, staged_name in rows:
+                if upload_staged_image(model, pk, staged_name):
+                    uploaded += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {pk}: upload of {staged_name} failed")
+
+        self.stdout.write(self.style.SUCCESS(f"Uploaded {uploaded} image(s), {failed} failed."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from menu.analytics import rollup_view_events
+
+
+class Command(BaseCommand):
+    help = "Fold menu view events into the hourly and daily rollups and delete them. Run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Events rolled up per transaction")
+
+    def handle(self, *args, **options):
+        count = rollup_view_events(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {count} menu view event(s)."))
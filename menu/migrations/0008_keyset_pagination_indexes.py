@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0007_restaurant_menu_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['category', 'item_order', 'id'], name='menuitem_category_order_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Full-text search index for menu items (see menu/search.py)
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from menu.search import create_search_table, populate_search_table
+
+    create_search_table(schema_editor)
+    populate_search_table(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    from menu.search import drop_search_table
+
+    drop_search_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
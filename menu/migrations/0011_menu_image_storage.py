@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:09
+
+import menu.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menucategory',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=menu.models.menu_image_storage, upload_to=menu.models.menu_category_path),
+        ),
+        migrations.AlterField(
+            model_name='menuitem',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=menu.models.menu_image_storage, upload_to=menu.models.menu_item_path),
+        ),
+        migrations.AlterField(
+            model_name='restaurant',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=menu.models.menu_image_storage, upload_to=menu.models.restaurant_logo_path),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0011_menu_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menucategory',
+            name='image_staging_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='menucategory',
+            name='image_upload_status',
+            field=models.CharField(choices=[('ready', 'ready'), ('pending', 'pending'), ('failed', 'failed')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_staging_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_upload_status',
+            field=models.CharField(choices=[('ready', 'ready'), ('pending', 'pending'), ('failed', 'failed')], default='ready', max_length=10),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0012_image_upload_status'),
+        ('order', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuViewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField()),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='menu.restaurant')),
+                ('table', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='order.restauranttable')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MenuViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nepali_date', models.CharField(help_text='Nepali date in YYYY-MM-DD format', max_length=10)),
+                ('table_pk', models.PositiveIntegerField(default=0, help_text='RestaurantTable id, 0 for scans without a table')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_days', to='menu.restaurant')),
+            ],
+            options={
+                'ordering': ['nepali_date', 'table_pk'],
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'nepali_date', 'table_pk'), name='menuviewdaily_restaurant_date_table')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuViewHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_hours', to='menu.restaurant')),
+            ],
+            options={
+                'ordering': ['hour'],
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'hour'), name='menuviewhourly_restaurant_hour')],
+            },
+        ),
+    ]
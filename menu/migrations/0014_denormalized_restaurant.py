@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_restaurant(apps, schema_editor):
+    MenuGroup = apps.get_model('menu', 'MenuGroup')
+    MenuCategory = apps.get_model('menu', 'MenuCategory')
+    MenuItem = apps.get_model('menu', 'MenuItem')
+    MenuCategory.objects.update(restaurant_id=Subquery(
+        MenuGroup.objects.filter(pk=OuterRef('menu_group_id')).values('restaurant_id')[:1]
+    ))
+    MenuItem.objects.update(restaurant_id=Subquery(
+        MenuCategory.objects.filter(pk=OuterRef('category_id')).values('restaurant_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0013_menu_view_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menucategory',
+            name='restaurant',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='menu_categories', to='menu.restaurant'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='restaurant',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='menu.restaurant'),
+        ),
+        migrations.RunPython(backfill_restaurant, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='menucategory',
+            name='restaurant',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='menu_categories', to='menu.restaurant'),
+        ),
+        migrations.AlterField(
+            model_name='menuitem',
+            name='restaurant',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='menu.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='menucategory',
+            index=models.Index(fields=['restaurant', 'is_disabled', 'cat_order'], name='menucategory_restaurant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['restaurant', 'item_order', 'id'], name='menuitem_restaurant_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['restaurant', 'is_highlight', 'is_disabled'], name='menuitem_highlight_idx'),
+        ),
+    ]
@@ -1,6 +1,40 @@
 import os
-from cloudinary_storage.storage import MediaCloudinaryStorage   
+from django.core.files.storage import storages
 from django.db import models
+from django.utils import timezone
+
+from menu.images import IMAGE_WIDTHS, LOGO_WIDTHS, queue_image_jobs, sync_image_variants
+
+def menu_image_storage():
+    """
+    Storage for menu images and logos: whatever STORAGES['default'] is
+    (Cloudinary, or the local filesystem when USE_CLOUDINARY is off).
+    """
+    return storages['default']
+
+# MenuItem/MenuCategory.image_upload_status (menu/uploads.py)
+IMAGE_UPLOAD_READY = 'ready'
+IMAGE_UPLOAD_PENDING = 'pending'
+IMAGE_UPLOAD_FAILED = 'failed'
+
+IMAGE_UPLOAD_STATUS_CHOICES = (
+    (IMAGE_UPLOAD_READY, 'ready'),
+    (IMAGE_UPLOAD_PENDING, 'pending'),
+    (IMAGE_UPLOAD_FAILED, 'failed'),
+)
+
+def sync_restaurant(instance, parent_field, update_fields=None):
+    """
+    Copy the parent's restaurant_id onto instance.restaurant_id. Call from
+    save() before super().save(); returns update_fields with 'restaurant'
+    added when the parent is being saved.
+    """
+    if update_fields is not None:
+        if parent_field not in update_fields and f'{parent_field}_id' not in update_fields:
+            return update_fields
+        update_fields = set(update_fields) | {'restaurant'}
+    instance.restaurant_id = getattr(instance, parent_field).restaurant_id
+    return update_fields
 
 def restaurant_logo_path(instance, filename):
     """
@@ -37,16 +71,40 @@ class Restaurant(models.Model):
             upload_to=restaurant_logo_path, 
             blank=True,
             null=True,
-            storage=MediaCloudinaryStorage()  
+            storage=menu_image_storage  
         )
+    # Resized logo URLs computed on upload (menu/images.py)
+    logo_variants = models.JSONField(default=dict, blank=True)
     facebook_url = models.CharField(max_length=200, blank=True)
     instagram_url = models.CharField(max_length=200, blank=True)
     tiktok_url = models.CharField(max_length=200, blank=True)
     view_menu_count = models.PositiveIntegerField(default=0)
 
+    # Bumped by menu.cache.menu_changed() whenever any menu row changes
+    menu_version = models.PositiveIntegerField(default=1)
+    menu_updated_at = models.DateTimeField(default=timezone.now)
+
+    # Only ever advanced with F() updates, never written back from an instance
+    MENU_VERSION_FIELDS = ('menu_version', 'menu_updated_at')
+    COUNTER_FIELDS = MENU_VERSION_FIELDS + ('view_menu_count',)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = sync_image_variants(
+            self, 'logo', 'logo_variants', LOGO_WIDTHS, kwargs.get('update_fields')
+        )
+        # A full save of an instance loaded earlier must not roll back a
+        # version bump or view count flush made since it was loaded.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        queue_image_jobs(self)
+
 class MenuGroup(models.Model):
     type = models.CharField(max_length=100)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='menu_groups')
@@ -58,24 +116,63 @@ class MenuGroup(models.Model):
     def __str__(self):
         return f"{self.type} ({self.restaurant.name})"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (update_fields is None or 'restaurant' in update_fields):
+            # Moved to another restaurant: carry the denormalized column down
+            MenuCategory.objects.filter(menu_group=self).exclude(
+                restaurant_id=self.restaurant_id
+            ).update(restaurant_id=self.restaurant_id)
+            MenuItem.objects.filter(category__menu_group=self).exclude(
+                restaurant_id=self.restaurant_id
+            ).update(restaurant_id=self.restaurant_id)
+
 class MenuCategory(models.Model):
     name = models.CharField(max_length=100)
     image = models.ImageField(
         upload_to=menu_category_path,
         blank=True,
         null=True,
-        storage=MediaCloudinaryStorage()
+        storage=menu_image_storage
+    )
+    # Resized image URLs computed on upload (menu/images.py)
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Deferred uploads: the staged file still to be pushed to storage
+    image_upload_status = models.CharField(
+        max_length=10, choices=IMAGE_UPLOAD_STATUS_CHOICES, default=IMAGE_UPLOAD_READY
     )
+    image_staging_name = models.CharField(max_length=255, blank=True)
     menu_group = models.ForeignKey(MenuGroup, on_delete=models.CASCADE, related_name='categories')
+    # Copy of menu_group.restaurant, kept in step by save(), so queries can
+    # filter by restaurant without joining up the menu tree
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name='menu_categories', editable=False, db_index=False
+    )
     cat_order = models.PositiveIntegerField(default=0)
     is_disabled = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['cat_order']
+        indexes = [
+            models.Index(fields=['restaurant', 'is_disabled', 'cat_order'], name='menucategory_restaurant_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.menu_group.type} - {self.menu_group.restaurant.name})"
 
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = sync_image_variants(
+            self, 'image', 'image_variants', IMAGE_WIDTHS, kwargs.get('update_fields')
+        )
+        previous_restaurant_id = self.restaurant_id
+        kwargs['update_fields'] = sync_restaurant(self, 'menu_group', kwargs['update_fields'])
+        super().save(*args, **kwargs)
+        queue_image_jobs(self)
+        if previous_restaurant_id is not None and previous_restaurant_id != self.restaurant_id:
+            self.items.update(restaurant_id=self.restaurant_id)
+
 class MenuItem(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -84,15 +181,87 @@ class MenuItem(models.Model):
         upload_to=menu_item_path,
         blank=True,
         null=True,
-        storage=MediaCloudinaryStorage()
+        storage=menu_image_storage
+    )
+    # Resized image URLs computed on upload (menu/images.py)
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Deferred uploads: the staged file still to be pushed to storage
+    image_upload_status = models.CharField(
+        max_length=10, choices=IMAGE_UPLOAD_STATUS_CHOICES, default=IMAGE_UPLOAD_READY
     )
+    image_staging_name = models.CharField(max_length=255, blank=True)
     category = models.ForeignKey(MenuCategory, on_delete=models.CASCADE, related_name='items')
+    # Copy of category.restaurant, kept in step by save() (see MenuCategory.restaurant)
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name='menu_items', editable=False, db_index=False
+    )
     item_order = models.PositiveIntegerField(default=0)
     is_disabled = models.BooleanField(default=False)
     is_highlight = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['item_order']
+        indexes = [
+            # Keyset pagination of a category's items (menu/views/api_views.py)
+            models.Index(fields=['category', 'item_order', 'id'], name='menuitem_category_order_idx'),
+            # Admin item lists and highlighted items, filtered by restaurant
+            models.Index(fields=['restaurant', 'item_order', 'id'], name='menuitem_restaurant_order_idx'),
+            models.Index(fields=['restaurant', 'is_highlight', 'is_disabled'], name='menuitem_highlight_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = sync_image_variants(
+            self, 'image', 'image_variants', IMAGE_WIDTHS, kwargs.get('update_fields')
+        )
+        kwargs['update_fields'] = sync_restaurant(self, 'category', kwargs['update_fields'])
+        super().save(*args, **kwargs)
+        queue_image_jobs(self)
+
+
+class MenuViewEvent(models.Model):
+    """
+    One menu scan, appended in batches by menu/analytics.py and compacted into
+    the rollups below by `manage.py rollup_menu_views`. Kept narrow: the table
+    column has no constraint or index to maintain on insert.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='+')
+    table = models.ForeignKey(
+        'order.RestaurantTable',
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    viewed_at = models.DateTimeField()
+
+
+class MenuViewHourly(models.Model):
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='view_hours')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['hour']
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'hour'], name='menuviewhourly_restaurant_hour'),
+        ]
+
+
+class MenuViewDaily(models.Model):
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='view_days')
+    nepali_date = models.CharField(max_length=10, help_text="Nepali date in YYYY-MM-DD format")
+    table_pk = models.PositiveIntegerField(default=0, help_text="RestaurantTable id, 0 for scans without a table")
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['nepali_date', 'table_pk']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'nepali_date', 'table_pk'], name='menuviewdaily_restaurant_date_table'
+            ),
+        ]
@@ -0,0 +1,214 @@
+# menu/search.py
+"""
+Full-text index over MenuItem.name/description.
+
+SQLite uses an FTS5 virtual table and PostgreSQL a tsvector column with a GIN
+index, both named SEARCH_TABLE and created by migration 0009. Each row holds
+the item id, its restaurant id (so searches are scoped per restaurant) and the
+indexed text. Other databases have no table; callers fall back to icontains.
+
+Rows are kept in sync from menu/signals.py inside the same transaction as
+the item write; bulk writers call index_menu_items() themselves.
+"""
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+
+SEARCH_TABLE = 'menu_menuitem_search'
+
+# Most results a single search returns
+SEARCH_LIMIT = 100
+
+# Name matches count for more than description matches
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+
+def search_index_available(using=None):
+    return (using or connection).vendor in SUPPORTED_VENDORS
+
+
+# ────────────────────────────────────────────────
+# Schema (called from migrations)
+# ────────────────────────────────────────────────
+
+def create_search_table(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "name, description, restaurant_id UNINDEXED, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "item_id bigint PRIMARY KEY REFERENCES menu_menuitem(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "restaurant_id bigint, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)")
+        schema_editor.execute(f"CREATE INDEX {SEARCH_TABLE}_restaurant_idx ON {SEARCH_TABLE} (restaurant_id)")
+
+
+def populate_search_table(schema_editor):
+    """Index every existing item straight from the menu tables."""
+    vendor = schema_editor.connection.vendor
+    source = (
+        "FROM menu_menuitem i "
+        "JOIN menu_menucategory c ON c.id = i.category_id "
+        "JOIN menu_menugroup g ON g.id = c.menu_group_id"
+    )
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, description, restaurant_id) "
+            f"SELECT i.id, i.name, i.description, g.restaurant_id {source}"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (item_id, document, restaurant_id) "
+            "SELECT i.id, setweight(to_tsvector('simple', i.name), 'A') || "
+            f"setweight(to_tsvector('simple', i.description), 'B'), g.restaurant_id {source}"
+        )
+
+
+def drop_search_table(schema_editor):
+    if schema_editor.connection.vendor in SUPPORTED_VENDORS:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+# ────────────────────────────────────────────────
+# Keeping the index in sync
+# ────────────────────────────────────────────────
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def remove_menu_items(item_ids, using=None):
+    conn = using or connection
+    item_ids = list(item_ids)
+    if not item_ids or conn.vendor not in SUPPORTED_VENDORS:
+        return
+    key = 'rowid' if conn.vendor == 'sqlite' else 'item_id'
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN ({_placeholders(item_ids)})", item_ids)
+
+
+def _insert_rows(cursor, vendor, rows):
+    if vendor == 'sqlite':
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, description, restaurant_id) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+    else:
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (item_id, document, restaurant_id) VALUES "
+            "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'), %s)",
+            rows,
+        )
+
+
+def index_menu_items(item_ids, using=None):
+    """(Re)index the given items from their current rows; missing items are dropped."""
+    from menu.models import MenuItem
+
+    conn = using or connection
+    item_ids = list(item_ids)
+    if not item_ids or conn.vendor not in SUPPORTED_VENDORS:
+        return
+
+    rows = MenuItem.objects.using(conn.alias).filter(pk__in=item_ids).values_list(
+        'pk', 'name', 'description', 'restaurant_id'
+    )
+    remove_menu_items(item_ids, using=conn)
+    with conn.cursor() as cursor:
+        _insert_rows(cursor, conn.vendor, [
+            (pk, name, description or '', restaurant_id) for pk, name, description, restaurant_id in rows
+        ])
+
+
+def rebuild_search_index(restaurant_id=None, using=None, batch_size=1000):
+    """Rebuild the index for one restaurant, or for every item."""
+    from menu.models import MenuItem
+
+    conn = using or connection
+    if conn.vendor not in SUPPORTED_VENDORS:
+        return 0
+
+    with conn.cursor() as cursor:
+        if restaurant_id is None:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        else:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE restaurant_id = %s", [restaurant_id])
+
+    items = MenuItem.objects.using(conn.alias).order_by('pk')
+    if restaurant_id is not None:
+        items = items.filter(restaurant_id=restaurant_id)
+    item_ids = list(items.values_list('pk', flat=True))
+    for start in range(0, len(item_ids), batch_size):
+        index_menu_items(item_ids[start:start + batch_size], using=conn)
+    return len(item_ids)
+
+
+# ────────────────────────────────────────────────
+# Querying
+# ────────────────────────────────────────────────
+
+# \w alone splits Devanagari words at their vowel signs
+WORD_RE = re.compile(r'[\w\u0900-\u097f]+')
+
+
+def search_terms(query):
+    return WORD_RE.findall(query.lower())
+
+
+def search_menu_item_ids(query, restaurant_ids=None, limit=SEARCH_LIMIT, using=None, within=None):
+    """
+    Return ids of items matching every word of the query (as a prefix), best
+    match first. restaurant_ids limits the search to those restaurants, and
+    within (a MenuItem queryset) to its items; both apply before the limit.
+    """
+    conn = using or connection
+    terms = search_terms(query)
+    if not terms or conn.vendor not in SUPPORTED_VENDORS:
+        return []
+
+    params = []
+    if conn.vendor == 'sqlite':
+        sql = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+        params.append(' '.join(f'"{term}"*' for term in terms))
+        rank = f"bm25({SEARCH_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}, 0.0)"
+    else:
+        sql = f"SELECT item_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query WHERE document @@ query"
+        params.append(' & '.join(f'{term}:*' for term in terms))
+        # ts_rank is higher for better matches; negate so both sort ascending
+        rank = "-ts_rank(document, query)"
+
+    if restaurant_ids is not None:
+        restaurant_ids = list(restaurant_ids)
+        if not restaurant_ids:
+            return []
+        sql += f" AND restaurant_id IN ({_placeholders(restaurant_ids)})"
+        params.extend(restaurant_ids)
+
+    if within is not None:
+        try:
+            subquery, subquery_params = within.order_by().values('pk').query.get_compiler(
+                using=conn.alias
+            ).as_sql()
+        except EmptyResultSet:
+            return []
+        key = 'rowid' if conn.vendor == 'sqlite' else 'item_id'
+        sql += f" AND {key} IN ({subquery})"
+        params.extend(subquery_params)
+
+    sql += f" ORDER BY {rank} LIMIT %s"
+    params.append(limit)
+
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
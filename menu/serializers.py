@@ -1,65 +1,120 @@
 # menu/serializers.py
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
+from .images import (
+    DEFAULT_IMAGE_WIDTH, DEFAULT_LOGO_WIDTH, IMAGE_WIDTHS, LOGO_WIDTHS,
+    variant_srcset, variant_url,
+)
 from .models import Restaurant, MenuGroup, MenuCategory, MenuItem
+from .uploads import attach_image
+from utils.models import Announcement
 from utils.serializers import AnnouncementSerializer
 
 
+def prefetch_menu_items(prefix=''):
+    return Prefetch(f'{prefix}items', queryset=MenuItem.objects.order_by('item_order', 'id'))
+
+
+def prefetch_menu_categories(prefix=''):
+    return Prefetch(f'{prefix}categories', queryset=MenuCategory.objects.order_by('cat_order', 'id'))
+
+
+def prefetch_menu_groups(prefix=''):
+    return Prefetch(f'{prefix}menu_groups', queryset=MenuGroup.objects.order_by('group_order', 'id'))
+
+
 class BulkMenuItemCreateSerializer(serializers.Serializer):
     """
-    Serializer for bulk creating menu items for a specific category
+    Serializer for bulk creating menu items for a specific category.
+    Every row is checked and all problems are reported together.
     """
     items = serializers.ListField(
         child=serializers.DictField(),
         min_length=1,
-        max_length=50,  # Limit to prevent abuse
         help_text="List of menu items to create"
     )
     
     def validate_items(self, items):
         """Validate each item in the bulk list"""
+        # Limit to prevent abuse
+        max_items = getattr(settings, 'MENU_BULK_CREATE_MAX_ITEMS', 1000)
+        if len(items) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} items can be created at once")
+
+        errors = []
+        for i, item in enumerate(items):
+            errors.extend(f"Item {i+1}: {error}" for error in self.validate_item(item))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return items
+
+    @staticmethod
+    def validate_item(item):
+        """Normalize one item in place and return its problems"""
+        errors = []
         required_fields = ['name', 'price']
-        optional_fields = ['description', 'item_order', 'is_disabled', 'is_highlight']
         
-        for i, item in enumerate(items):
-            # Check required fields
-            for field in required_fields:
-                if field not in item:
-                    raise serializers.ValidationError(
-                        f"Item {i+1}: Missing required field '{field}'"
-                    )
-            
-            # Validate field types
+        # Check required fields
+        for field in required_fields:
+            if field not in item:
+                errors.append(f"Missing required field '{field}'")
+        
+        # Validate field types
+        if 'name' in item:
             if not isinstance(item['name'], str) or not item['name'].strip():
-                raise serializers.ValidationError(f"Item {i+1}: Name must be a non-empty string")
-            
+                errors.append("Name must be a non-empty string")
+            elif len(item['name']) > MenuItem._meta.get_field('name').max_length:
+                errors.append("Name is too long")
+        
+        if 'price' in item:
             try:
-                price = float(item['price'])
+                price = Decimal(str(item['price']))
+                if not price.is_finite():
+                    raise InvalidOperation
                 if price <= 0:
-                    raise serializers.ValidationError(f"Item {i+1}: Price must be greater than 0")
-                item['price'] = str(price)  # Convert to string for DecimalField
+                    errors.append("Price must be greater than 0")
+                elif price != price.quantize(Decimal('0.01')) or price >= Decimal('1e8'):
+                    errors.append("Price must have at most 8 digits and 2 decimal places")
+                else:
+                    item['price'] = price.quantize(Decimal('0.01'))
+            except (InvalidOperation, ValueError, TypeError):
+                errors.append("Price must be a valid number")
+        
+        # Validate optional fields
+        if 'description' in item and not isinstance(item['description'], str):
+            item['description'] = str(item['description'])
+        
+        if 'item_order' in item:
+            try:
+                item_order = int(item['item_order'])
+                if item_order < 0:
+                    errors.append("Item order must be non-negative")
+                item['item_order'] = item_order
             except (ValueError, TypeError):
-                raise serializers.ValidationError(f"Item {i+1}: Price must be a valid number")
-            
-            # Validate optional fields
-            if 'description' in item and not isinstance(item['description'], str):
-                item['description'] = str(item['description'])
-            
-            if 'item_order' in item:
-                try:
-                    item_order = int(item['item_order'])
-                    if item_order < 0:
-                        raise serializers.ValidationError(f"Item {i+1}: Item order must be non-negative")
-                    item['item_order'] = item_order
-                except (ValueError, TypeError):
-                    raise serializers.ValidationError(f"Item {i+1}: Item order must be a valid integer")
-            
-            if 'is_disabled' in item:
-                item['is_disabled'] = bool(item['is_disabled'])
-            
-            if 'is_highlight' in item:
-                item['is_highlight'] = bool(item['is_highlight'])
+                errors.append("Item order must be a valid integer")
         
-        return items
+        if 'is_disabled' in item:
+            item['is_disabled'] = bool(item['is_disabled'])
+        
+        if 'is_highlight' in item:
+            item['is_highlight'] = bool(item['is_highlight'])
+
+        return errors
+
+
+class MenuReorderSerializer(serializers.Serializer):
+    """
+    One row of a reorder request: {"id": ..., "<order_field>": ...}.
+    Use with many=True and order_field='item_order', 'cat_order' or 'group_order'.
+    """
+    id = serializers.IntegerField(min_value=1)
+
+    def __init__(self, *args, order_field, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields[order_field] = serializers.IntegerField(min_value=0, max_value=2147483647)
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
@@ -70,6 +125,7 @@ class MenuItemSerializer(serializers.ModelSerializer):
     """
     # For GET requests - return optimized Cloudinary URL
     image = serializers.SerializerMethodField(read_only=True)
+    image_srcset = serializers.SerializerMethodField(read_only=True)
     
     # For POST/PUT/PATCH - accept image upload
     image_upload = serializers.ImageField(write_only=True, required=False)
@@ -77,17 +133,18 @@ class MenuItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuItem
         fields = (
-            'id', 'name', 'description', 'price', 'image', 'image_upload',
-            'category', 'item_order', 'is_disabled', 'is_highlight'
+            'id', 'name', 'description', 'price', 'image', 'image_srcset', 'image_upload',
+            'image_upload_status', 'category', 'item_order', 'is_disabled', 'is_highlight'
         )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'image_upload_status')
     
     def get_image(self, obj):
         """Return optimized Cloudinary URL for GET requests"""
-        if obj.image:
-            # Resize to 400px width, auto format, quality 80
-            return obj.image.url.replace("/upload/", "/upload/w_400,q_auto,f_auto/")
-        return None
+        # Resize to 400px width, auto format and quality (stored on save)
+        return variant_url(obj.image, obj.image_variants, DEFAULT_IMAGE_WIDTH)
+
+    def get_image_srcset(self, obj):
+        return variant_srcset(obj.image, obj.image_variants, IMAGE_WIDTHS)
     
     def create(self, validated_data):
         """Handle image upload on create"""
@@ -96,7 +153,7 @@ class MenuItemSerializer(serializers.ModelSerializer):
         item = MenuItem.objects.create(**validated_data)
         
         if image_upload:
-            item.image = image_upload
+            attach_image(item, image_upload)
             item.save()
         
         return item
@@ -111,29 +168,32 @@ class MenuItemSerializer(serializers.ModelSerializer):
         
         # Handle image upload if provided
         if image_upload:
-            instance.image = image_upload
+            attach_image(instance, image_upload)
         
         instance.save()
         return instance
 
 
 class MenuCategorySerializer(serializers.ModelSerializer):
-    items = serializers.SerializerMethodField()
+    # Include all items (including disabled) - frontend handles disabled state
+    items = MenuItemSerializer(many=True, read_only=True)
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = MenuCategory
-        fields = ('id', 'name', 'image', 'cat_order', 'is_disabled', 'items')
-    
-    def get_items(self, obj):
-        # Include all items (including disabled) - frontend handles disabled state
-        all_items = obj.items.all().order_by('item_order')
-        return MenuItemSerializer(all_items, many=True).data
+        fields = ('id', 'name', 'image', 'image_srcset', 'cat_order', 'is_disabled', 'items')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load items in order with one extra query for the whole queryset"""
+        return queryset.prefetch_related(prefetch_menu_items())
     
     def get_image(self, obj):
-        if obj.image:
-            return obj.image.url.replace("/upload/", "/upload/w_400,q_auto,f_auto/")
-        return None
+        return variant_url(obj.image, obj.image_variants, DEFAULT_IMAGE_WIDTH)
+
+    def get_image_srcset(self, obj):
+        return variant_srcset(obj.image, obj.image_variants, IMAGE_WIDTHS)
 
 
 class MenuCategoryAdminSerializer(serializers.ModelSerializer):
@@ -141,6 +201,7 @@ class MenuCategoryAdminSerializer(serializers.ModelSerializer):
     Admin serializer for MenuCategory with full CRUD support including image upload.
     """
     image = serializers.SerializerMethodField(read_only=True)
+    image_srcset = serializers.SerializerMethodField(read_only=True)
     image_upload = serializers.ImageField(write_only=True, required=False)
     menu_group_name = serializers.CharField(source='menu_group.type', read_only=True)
     item_count = serializers.SerializerMethodField(read_only=True)
@@ -148,15 +209,16 @@ class MenuCategoryAdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuCategory
         fields = (
-            'id', 'name', 'image', 'image_upload', 'cat_order', 
-            'is_disabled', 'menu_group', 'menu_group_name', 'item_count'
+            'id', 'name', 'image', 'image_srcset', 'image_upload', 'image_upload_status',
+            'cat_order', 'is_disabled', 'menu_group', 'menu_group_name', 'item_count'
         )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'image_upload_status')
     
     def get_image(self, obj):
-        if obj.image:
-            return obj.image.url.replace("/upload/", "/upload/w_400,q_auto,f_auto/")
-        return None
+        return variant_url(obj.image, obj.image_variants, DEFAULT_IMAGE_WIDTH)
+
+    def get_image_srcset(self, obj):
+        return variant_srcset(obj.image, obj.image_variants, IMAGE_WIDTHS)
     
     def get_item_count(self, obj):
         return obj.items.count()
@@ -166,7 +228,7 @@ class MenuCategoryAdminSerializer(serializers.ModelSerializer):
         category = MenuCategory.objects.create(**validated_data)
         
         if image_upload:
-            category.image = image_upload
+            attach_image(category, image_upload)
             category.save()
         
         return category
@@ -178,7 +240,7 @@ class MenuCategoryAdminSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         
         if image_upload:
-            instance.image = image_upload
+            attach_image(instance, image_upload)
         
         instance.save()
         return instance
@@ -191,6 +253,14 @@ class MenuGroupSerializer(serializers.ModelSerializer):
         model = MenuGroup
         fields = ('id', 'type', 'group_order', 'categories')
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load categories and their items in order with two extra queries"""
+        return queryset.prefetch_related(
+            prefetch_menu_categories(),
+            prefetch_menu_items('categories__'),
+        )
+
 
 class MenuGroupAdminSerializer(serializers.ModelSerializer):
     """
@@ -214,20 +284,41 @@ class RestaurantSerializer(serializers.ModelSerializer):
     menu_groups = MenuGroupSerializer(many=True, read_only=True)
     announcements = serializers.SerializerMethodField()
     logo = serializers.SerializerMethodField()
+    logo_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Restaurant
         fields = (
-            'id', 'name', 'address', 'phone', 'logo', 'announcements',
+            'id', 'name', 'address', 'phone', 'logo', 'logo_srcset', 'announcements',
             'facebook_url', 'instagram_url', 'tiktok_url', 'menu_groups', 'view_menu_count'
         )
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load the whole menu tree and active announcements with a fixed number
+        of queries (one per level), however big the menu is.
+        """
+        return queryset.prefetch_related(
+            prefetch_menu_groups(),
+            prefetch_menu_categories('menu_groups__'),
+            prefetch_menu_items('menu_groups__categories__'),
+            Prefetch(
+                'announcements',
+                queryset=Announcement.objects.filter(is_active=True),
+                to_attr='active_announcements',
+            ),
+        )
+    
     def get_announcements(self, obj):
         # Only return currently active announcements
-        active_announcements = obj.announcements.filter(is_active=True)
+        active_announcements = getattr(obj, 'active_announcements', None)
+        if active_announcements is None:
+            active_announcements = obj.announcements.filter(is_active=True)
         return AnnouncementSerializer(active_announcements, many=True).data
     
     def get_logo(self, obj):
-        if obj.logo:
-            return obj.logo.url.replace("/upload/", "/upload/w_500,q_auto,f_auto/")
-        return None
\ No newline at end of file
+        return variant_url(obj.logo, obj.logo_variants, DEFAULT_LOGO_WIDTH)
+
+    def get_logo_srcset(self, obj):
+        return variant_srcset(obj.logo, obj.logo_variants, LOGO_WIDTHS)
\ No newline at end of file
@@ -0,0 +1,82 @@
+# menu/signals.py
+"""
+Keep derived menu caches (menu/cache.py) and the full-text search index
+(menu/search.py) in sync with menu rows. Connected in MenuConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from menu.cache import menu_changed
+from menu.models import Restaurant, MenuGroup, MenuCategory, MenuItem
+from menu.search import index_menu_items, remove_menu_items
+from utils.models import Announcement
+
+MENU_MODELS = (Restaurant, MenuGroup, MenuCategory, MenuItem, Announcement)
+
+# Models whose rows carry their restaurant_id (categories and items keep
+# theirs in step with their parent in save())
+RESTAURANT_OWNED_MODELS = (MenuGroup, MenuCategory, MenuItem, Announcement)
+
+
+def get_restaurant_id(instance):
+    """The restaurant a menu row belongs to."""
+    if isinstance(instance, Restaurant):
+        return instance.pk
+    return instance.restaurant_id
+
+
+def _is_view_count_only(update_fields):
+    return update_fields is not None and set(update_fields) <= {'view_menu_count'}
+
+
+def remember_previous_restaurant(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record which restaurant a row belonged to before it is saved, in case it moves."""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if sender not in RESTAURANT_OWNED_MODELS:
+        return
+    instance._previous_restaurant_id = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('restaurant_id', flat=True).first()
+
+
+def menu_row_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Menu scans bump the counter; that alone doesn't change the menu
+    if sender is Restaurant and _is_view_count_only(update_fields):
+        return
+
+    restaurant_id = get_restaurant_id(instance)
+    menu_changed(restaurant_id)
+
+    previous_id = getattr(instance, '_previous_restaurant_id', None)
+    if previous_id is not None and previous_id != restaurant_id:
+        menu_changed(previous_id)
+        # Search rows carry the restaurant id, so moved items need reindexing
+        if sender is MenuGroup:
+            index_menu_items(MenuItem.objects.filter(category__menu_group=instance).values_list('pk', flat=True))
+        elif sender is MenuCategory:
+            index_menu_items(instance.items.values_list('pk', flat=True))
+
+
+def menu_row_deleted(sender, instance, **kwargs):
+    menu_changed(get_restaurant_id(instance))
+
+
+def menu_item_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_menu_items([instance.pk])
+
+
+def menu_item_deleted(sender, instance, **kwargs):
+    remove_menu_items([instance.pk])
+
+
+for model in MENU_MODELS:
+    pre_save.connect(remember_previous_restaurant, sender=model, dispatch_uid=f'menu_pre_save_{model.__name__}')
+    post_save.connect(menu_row_saved, sender=model, dispatch_uid=f'menu_post_save_{model.__name__}')
+    post_delete.connect(menu_row_deleted, sender=model, dispatch_uid=f'menu_post_delete_{model.__name__}')
+
+# Full-text search index (menu/search.py)
+post_save.connect(menu_item_saved, sender=MenuItem, dispatch_uid='menu_search_post_save')
+post_delete.connect(menu_item_deleted, sender=MenuItem, dispatch_uid='menu_search_post_delete')
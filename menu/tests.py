@@ -1,13 +1,45 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from menu.models import Restaurant
+from menu.analytics import flush_view_events
+from menu.cache import snapshot_cache_key
+from menu.counters import add_view, flush_view_count, flush_view_counts
+from menu.exports import BROTLI_AVAILABLE
+from menu.fuzzy_search import clear_search_indexes
+from menu.search import SEARCH_LIMIT, index_menu_items
+from menu.models import (
+    Restaurant, MenuGroup, MenuCategory, MenuItem, MenuViewDaily, MenuViewEvent, MenuViewHourly,
+)
+from menu.serializers import MenuItemSerializer, RestaurantSerializer
+from order.models import Order, OrderItem, RestaurantTable
+from utils.models import Announcement
+
+User = get_user_model()
 
 # Create your tests here.
 
+@override_settings(MENU_VIEW_COUNT_FLUSH_THRESHOLD=0, MENU_VIEW_EVENT_BATCH_SIZE=1)
 class IncrementViewMenuCountTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.restaurant = Restaurant.objects.create(
             name="Test Restaurant",
             address="123 Test Street",
@@ -30,7 +62,8 @@ class IncrementViewMenuCountTest(TestCase):
         self.assertTrue(response.json()['success'])
         self.assertEqual(response.json()['view_menu_count'], 1)
         
-        # Check database was updated
+        # Check database was updated once the buffered views are flushed
+        self.assertEqual(flush_view_counts(), 1)
         self.restaurant.refresh_from_db()
         self.assertEqual(self.restaurant.view_menu_count, 1)
 
@@ -46,9 +79,64 @@ class IncrementViewMenuCountTest(TestCase):
             self.assertEqual(response.json()['view_menu_count'], expected_count)
         
         # Check final database state
+        flush_view_counts()
         self.restaurant.refresh_from_db()
         self.assertEqual(self.restaurant.view_menu_count, 3)
 
+    def test_scan_does_not_write_restaurant(self):
+        url = reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk})
+        # Reading the stored count, plus the analytics event (inline at batch size 1)
+        with self.assertNumQueries(2):
+            self.client.post(url)
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.view_menu_count, 0)
+
+    def test_count_includes_views_after_flush(self):
+        url = reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk})
+        self.client.post(url)
+        self.client.post(url)
+        call_command('flush_view_counts', stdout=StringIO())
+        self.assertEqual(self.client.post(url).json()['view_menu_count'], 3)
+        self.assertEqual(flush_view_counts(), 1)
+        self.assertEqual(flush_view_counts(), 0)
+
+    def test_full_save_keeps_flushed_views(self):
+        stale = Restaurant.objects.get(pk=self.restaurant.pk)
+        self.client.post(reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk}))
+        flush_view_counts()
+        stale.name = "Renamed Restaurant"
+        stale.save()
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.view_menu_count, 1)
+
+    def test_overlapping_flushes_move_each_view_once(self):
+        for _ in range(5):
+            add_view(self.restaurant.pk)
+        overlapping = []
+
+        def flush_again(execute, sql, params, many, context):
+            # A second flush (and more scans) while the first one's UPDATE runs
+            if not overlapping:
+                add_view(self.restaurant.pk)
+                overlapping.append(flush_view_count(self.restaurant.pk))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(flush_again):
+            self.assertEqual(flush_view_count(self.restaurant.pk), 5)
+        self.assertEqual(overlapping, [0])
+
+        self.assertEqual(flush_view_count(self.restaurant.pk), 1)
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.view_menu_count, 6)
+
+    def test_non_object_body_rejected(self):
+        url = reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk})
+        for body in ([1, 2], 5, "table"):
+            response = self.client.post(url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(response.json()['success'])
+        self.assertEqual(flush_view_counts(), 0)
+
     def test_increment_view_menu_count_invalid_restaurant(self):
         """Test that invalid restaurant ID returns 404"""
         url = reverse('increment-view-count', kwargs={'restaurant_pk': 999})
@@ -57,3 +145,1049 @@ class IncrementViewMenuCountTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertFalse(response.json()['success'])
         self.assertEqual(response.json()['error'], 'Restaurant not found')
+
+
+class RestaurantMenuSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Snapshot Cafe", address="1 Cache Lane")
+        self.group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Momo", menu_group=self.group)
+        self.item = MenuItem.objects.create(name="Veg Momo", price="150.00", category=self.category)
+        self.url = reverse('restaurant-detail', kwargs={'pk': self.restaurant.pk})
+        self.client = APIClient()
+
+    def test_snapshot_matches_serializer_output(self):
+        """The snapshot is exactly what RestaurantSerializer would render"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), RestaurantSerializer(self.restaurant).data)
+
+    @override_settings(MENU_VIEW_COUNT_FLUSH_THRESHOLD=0, MENU_VIEW_EVENT_BATCH_SIZE=1)
+    def test_view_count_is_live_not_snapshotted(self):
+        self.client.get(self.url)
+        scan_url = reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk})
+        self.client.post(scan_url)
+        self.assertEqual(self.client.get(self.url).json()['view_menu_count'], 1)
+        flush_view_counts()
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(view_menu_count=F('view_menu_count') + 5)
+        self.assertEqual(self.client.get(self.url).json()['view_menu_count'], 6)
+
+    def test_snapshot_served_from_cache(self):
+        """Once rendered, the menu is served with a single version lookup"""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_snapshot_rebuilt_after_item_change(self):
+        """Saving or deleting a menu row refreshes the snapshot on commit"""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Chicken Momo"
+            self.item.save()
+        items = self.client.get(self.url).json()['menu_groups'][0]['categories'][0]['items']
+        self.assertEqual(items[0]['name'], "Chicken Momo")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        items = self.client.get(self.url).json()['menu_groups'][0]['categories'][0]['items']
+        self.assertEqual(items, [])
+
+    def test_snapshot_rebuilt_after_announcement_change(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(restaurant=self.restaurant, title="Dashain offer", message="10% off")
+        announcements = self.client.get(self.url).json()['announcements']
+        self.assertEqual([a['title'] for a in announcements], ["Dashain offer"])
+
+    def test_deleted_restaurant_returns_404(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_command(self):
+        self.restaurant.refresh_from_db()
+        cache.set(snapshot_cache_key(self.restaurant.pk, self.restaurant.menu_version), b'stale')
+        call_command('rebuild_menu_snapshots', stdout=StringIO())
+        self.assertEqual(self.client.get(self.url).json()['name'], "Snapshot Cafe")
+
+
+class MenuVersionETagTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="ETag Cafe", address="2 Cache Lane")
+        self.group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Thali", menu_group=self.group)
+        self.item = MenuItem.objects.create(
+            name="Dal Bhat", price="300.00", category=self.category, is_highlight=True
+        )
+        self.client = APIClient()
+        self.urls = [
+            reverse('restaurant-detail', kwargs={'pk': self.restaurant.pk}),
+            reverse('highlighted-items', kwargs={'restaurant_pk': self.restaurant.pk}),
+            reverse('menu-group-list') + f'?restaurant={self.restaurant.pk}',
+            reverse('menu-category-list') + f'?menu_group={self.group.pk}',
+            reverse('menu-item-list') + f'?category={self.category.pk}',
+        ]
+
+    def test_not_modified_without_touching_menu_tables(self):
+        for url in self.urls:
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_menu_change_bumps_version(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.price = "320.00"
+            self.item.save()
+
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertIn('Last-Modified', response)
+
+    def test_stale_restaurant_save_keeps_version(self):
+        """Saving an old Restaurant instance never rolls the version back"""
+        stale = Restaurant.objects.get(pk=self.restaurant.pk)
+        MenuItem.objects.create(name="Sel Roti", price="50.00", category=self.category)
+        bumped = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+
+        stale.name = "ETag Cafe & Bar"
+        stale.save()
+        self.assertGreater(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, bumped)
+
+    def test_unscoped_list_has_no_etag(self):
+        response = self.client.get(reverse('menu-item-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+
+class MenuQueryCountTest(TestCase):
+    """The nested menu costs the same number of queries whatever its size"""
+
+    def build_menu(self, item_count):
+        restaurant = Restaurant.objects.create(name=f"{item_count} Item Kitchen", address="3 Query Road")
+        Announcement.objects.create(restaurant=restaurant, title="Open late", message="Until 11pm")
+        categories = []
+        for g in range(2):
+            group = MenuGroup.objects.create(type=f"Group {g}", restaurant=restaurant, group_order=g)
+            for c in range(5):
+                categories.append(MenuCategory.objects.create(
+                    name=f"Category {g}-{c}", menu_group=group, cat_order=c
+                ))
+        MenuItem.objects.bulk_create(
+            MenuItem(
+                name=f"Item {i}",
+                price="100.00",
+                category=categories[i % len(categories)],
+                restaurant=restaurant,
+                item_order=item_count - i,
+            )
+            for i in range(item_count)
+        )
+        return restaurant
+
+    def test_restaurant_detail_query_count(self):
+        client = APIClient()
+        for item_count in (10, 100, 1000):
+            with self.subTest(items=item_count):
+                cache.clear()
+                restaurant = self.build_menu(item_count)
+                url = reverse('restaurant-detail', kwargs={'pk': restaurant.pk})
+                # version, restaurant, groups, categories, items, announcements
+                with self.assertNumQueries(6):
+                    response = client.get(url)
+                data = response.json()
+                self.assertEqual(
+                    sum(len(c['items']) for g in data['menu_groups'] for c in g['categories']),
+                    item_count,
+                )
+                self.assertEqual(len(data['announcements']), 1)
+
+    def test_menu_group_list_query_count(self):
+        client = APIClient()
+        for item_count in (10, 100, 1000):
+            with self.subTest(items=item_count):
+                restaurant = self.build_menu(item_count)
+                url = reverse('menu-group-list') + f'?restaurant={restaurant.pk}'
+                # version, groups, categories, items
+                with self.assertNumQueries(4):
+                    self.client.get(url)
+
+    def test_items_keep_item_order(self):
+        restaurant = self.build_menu(20)
+        data = RestaurantSerializer(
+            RestaurantSerializer.setup_eager_loading(Restaurant.objects.filter(pk=restaurant.pk)).get()
+        ).data
+        for group in data['menu_groups']:
+            for category in group['categories']:
+                orders = [item['item_order'] for item in category['items']]
+                self.assertEqual(orders, sorted(orders))
+
+
+class MenuStaticExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_dir, ignore_errors=True)
+        self.restaurant = Restaurant.objects.create(name="Export Cafe", address="4 Static Street")
+        self.group = MenuGroup.objects.create(type="Drinks", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Tea", menu_group=self.group)
+
+    def read_export(self, suffix):
+        with open(os.path.join(self.export_dir, f'{self.restaurant.pk}.json{suffix}'), 'rb') as f:
+            return f.read()
+
+    def test_export_command_writes_compressed_copies(self):
+        with self.settings(MENU_EXPORT_ROOT=self.export_dir):
+            call_command('export_menus', stdout=StringIO())
+
+        payload = self.read_export('')
+        # The live view count is the only thing the API adds to the export
+        served = json.loads(self.client.get(reverse('restaurant-detail', kwargs={'pk': self.restaurant.pk})).content)
+        served.pop('view_menu_count')
+        self.assertEqual(json.loads(payload), served)
+        self.assertEqual(gzip.decompress(self.read_export('.gz')), payload)
+        if BROTLI_AVAILABLE:
+            import brotli
+            self.assertEqual(brotli.decompress(self.read_export('.br')), payload)
+
+    def test_menu_change_refreshes_export(self):
+        with self.settings(MENU_EXPORT_ENABLED=True, MENU_EXPORT_ROOT=self.export_dir):
+            with self.captureOnCommitCallbacks(execute=True):
+                MenuItem.objects.create(name="Masala Chiya", price="40.00", category=self.category)
+            self.assertIn(b"Masala Chiya", gzip.decompress(self.read_export('.gz')))
+
+            restaurant_pk = self.restaurant.pk
+            with self.captureOnCommitCallbacks(execute=True):
+                self.restaurant.delete()
+            self.assertFalse(os.path.exists(os.path.join(self.export_dir, f'{restaurant_pk}.json')))
+
+
+class MenuItemPaginationTest(TestCase):
+    def setUp(self):
+        restaurant = Restaurant.objects.create(name="Paged Cafe", address="5 Cursor Court")
+        group = MenuGroup.objects.create(type="Food", restaurant=restaurant)
+        self.category = MenuCategory.objects.create(name="Snacks", menu_group=group)
+        # Mostly ties on item_order, which is what bulk-created menus look like
+        MenuItem.objects.bulk_create(
+            MenuItem(name=f"Snack {i}", price="50.00", category=self.category, restaurant=restaurant, item_order=i % 3)
+            for i in range(25)
+        )
+        self.client = APIClient()
+
+    def test_pages_cover_every_item_once_in_order(self):
+        url = reverse('menu-item-list') + f'?category={self.category.pk}&page_size=10'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend((item['item_order'], item['id']) for item in data['results'])
+            url = data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_previous_link_returns_previous_page(self):
+        url = reverse('menu-item-list') + f'?category={self.category.pk}&page_size=10'
+        first = self.client.get(url).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('menu-item-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MenuItemFullTextSearchTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Search Sekuwa", address="7 Index Avenue")
+        other = Restaurant.objects.create(name="Other Place", address="8 Elsewhere")
+        group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Grill", menu_group=group)
+        other_category = MenuCategory.objects.create(
+            name="Grill", menu_group=MenuGroup.objects.create(type="Food", restaurant=other)
+        )
+        self.sekuwa = MenuItem.objects.create(
+            name="Chicken Sekuwa", description="Charcoal grilled", price="350.00", category=self.category
+        )
+        self.choila = MenuItem.objects.create(
+            name="Buff Choila", description="Spicy, goes well with chicken sekuwa", price="300.00",
+            category=self.category,
+        )
+        MenuItem.objects.create(name="Chicken Sekuwa", price="360.00", category=other_category)
+        self.client = APIClient()
+
+    def search(self, query):
+        url = reverse('menu-item-list') + f'?restaurant={self.restaurant.pk}&search={query}'
+        return [item['id'] for item in self.client.get(url).json()['results']]
+
+    def test_ranked_and_scoped_to_restaurant(self):
+        # Name matches outrank description matches; the other restaurant is excluded
+        self.assertEqual(self.search("chicken sekuwa"), [self.sekuwa.pk, self.choila.pk])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search("choi"), [self.choila.pk])
+
+    def test_index_follows_item_changes(self):
+        self.sekuwa.name = "Mutton Sekuwa"
+        self.sekuwa.save()
+        self.assertEqual(self.search("mutton"), [self.sekuwa.pk])
+
+        self.sekuwa.delete()
+        self.assertEqual(self.search("mutton"), [])
+
+    def test_category_filter_applies_before_the_limit(self):
+        # More better-ranked matches elsewhere in the restaurant than one search returns
+        specials_category = MenuCategory.objects.create(name="Sekuwa Specials", menu_group=self.category.menu_group)
+        specials = MenuItem.objects.bulk_create([
+            MenuItem(name="Sekuwa", price="400.00", category=specials_category, restaurant=self.restaurant, item_order=i)
+            for i in range(SEARCH_LIMIT)
+        ])
+        index_menu_items([item.pk for item in specials])
+
+        url = reverse('menu-item-list') + f'?category={self.category.pk}&search=sekuwa'
+        results = [item['id'] for item in self.client.get(url).json()['results']]
+        self.assertEqual(results, [self.sekuwa.pk, self.choila.pk])
+
+
+class RestaurantMenuSearchTest(TestCase):
+    def setUp(self):
+        clear_search_indexes()
+        self.restaurant = Restaurant.objects.create(name="Typo Tolerant Thakali", address="9 Fuzzy Lane")
+        group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Mains", menu_group=group)
+        self.momo = MenuItem.objects.create(name="Momo", description="Steamed dumplings", price="150.00", category=self.category)
+        self.chow_mein = MenuItem.objects.create(name="Chow Mein", price="180.00", category=self.category)
+        MenuItem.objects.create(name="Thukpa", price="200.00", category=self.category, is_disabled=True)
+        self.url = reverse('restaurant-menu-search', kwargs={'restaurant_pk': self.restaurant.pk})
+        self.client = APIClient()
+
+    def search(self, query):
+        return [item['id'] for item in self.client.get(self.url, {'q': query}).json()['results']]
+
+    def test_misspellings_match(self):
+        self.assertEqual(self.search("chowmin")[0], self.chow_mein.pk)
+        self.assertEqual(self.search("mo:mo")[0], self.momo.pk)
+        self.assertEqual(self.search("dumpling")[0], self.momo.pk)
+
+    def test_disabled_items_excluded(self):
+        self.assertEqual(self.search("thukpa"), [])
+
+    def test_warm_index_only_checks_version(self):
+        self.search("momo")
+        with self.assertNumQueries(1):
+            self.search("chowmein")
+
+    def test_menu_change_rebuilds_index(self):
+        self.search("momo")
+        MenuItem.objects.create(name="Jhol Momo", price="170.00", category=self.category)
+        self.assertEqual(len(self.search("momo")), 2)
+
+
+def png_upload(name, size=(1000, 500)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MENU_IMAGE_WORKERS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.restaurant = Restaurant.objects.create(name="Srcset Sekuwa", address="4 Pixel Road")
+        group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Grill", menu_group=group)
+        self.item = MenuItem.objects.create(name="Sekuwa", price="300.00", category=self.category)
+
+    def upload_item_image(self, size=(1000, 500)):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.image = png_upload('sekuwa.png', size)
+            self.item.save()
+        self.item.refresh_from_db()
+
+    def thumbnail_size(self, url):
+        path = os.path.join(self.media_root, url.removeprefix('/media/'))
+        with Image.open(path) as thumbnail:
+            return thumbnail.format, thumbnail.size
+
+    def test_thumbnails_written_next_to_original(self):
+        self.upload_item_image()
+        srcset = self.item.image_variants['srcset']
+        self.assertEqual(set(srcset), {'200', '400', '800'})
+        self.assertEqual(srcset['400'], '/media/items/srcset-sekuwa/food/grill/sekuwa_w400.webp')
+        self.assertEqual(self.thumbnail_size(srcset['400']), ('WEBP', (400, 200)))
+        self.assertEqual(self.thumbnail_size(srcset['800']), ('WEBP', (800, 400)))
+
+    def test_small_originals_not_upscaled(self):
+        self.upload_item_image(size=(300, 300))
+        self.assertEqual(self.thumbnail_size(self.item.image_variants['srcset']['800'])[1], (300, 300))
+
+    def test_original_served_until_thumbnails_ready(self):
+        self.item.image = png_upload('sekuwa.png')
+        self.item.save()
+        data = MenuItemSerializer(self.item).data
+        self.assertEqual(data['image'], self.item.image.url)
+        self.assertIsNone(data['image_srcset'])
+
+    def test_thumbnails_bump_menu_version(self):
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        self.upload_item_image()
+        self.assertGreater(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version)
+
+    def test_serializer_reads_stored_urls(self):
+        self.upload_item_image()
+        stored = {'name': self.item.image.name, 'srcset': {'200': 'a', '400': 'b', '800': 'c'}}
+        MenuItem.objects.filter(pk=self.item.pk).update(image_variants=stored)
+        data = MenuItemSerializer(MenuItem.objects.get(pk=self.item.pk)).data
+        self.assertEqual(data['image'], 'b')
+        self.assertEqual(data['image_srcset'], stored['srcset'])
+
+    def test_partial_save_leaves_variants(self):
+        self.upload_item_image()
+        MenuItem.objects.filter(pk=self.item.pk).update(image_variants={})
+        self.item.image_variants = {}
+        self.item.save(update_fields=['name'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_variants, {})
+
+    def test_removing_image_clears_variants(self):
+        self.upload_item_image()
+        self.item.image = None
+        self.item.save()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_variants, {})
+        self.assertIsNone(MenuItemSerializer(self.item).data['image_srcset'])
+
+    def test_refresh_command_backfills(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.logo = png_upload('logo.png', (600, 600))
+            self.restaurant.save()
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(logo_variants={})
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+
+        call_command('refresh_image_variants', stdout=StringIO())
+
+        restaurant = Restaurant.objects.get(pk=self.restaurant.pk)
+        self.assertEqual(set(restaurant.logo_variants['srcset']), {'250', '500', '1000'})
+        self.assertEqual(self.thumbnail_size(restaurant.logo_variants['srcset']['500'])[1], (500, 500))
+        self.assertGreater(restaurant.menu_version, version)
+
+
+@override_settings(MENU_IMAGE_WORKERS=0)
+class ImageVariantsAutocommitTest(TransactionTestCase):
+    """Thumbnails outside an atomic block, where on_commit callbacks run at once"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        restaurant = Restaurant.objects.create(name="Autocommit Adda", address="5 Pixel Road")
+        group = MenuGroup.objects.create(type="Food", restaurant=restaurant)
+        self.category = MenuCategory.objects.create(name="Grill", menu_group=group)
+
+    def test_new_row_gets_thumbnails(self):
+        item = MenuItem.objects.create(
+            name="Sekuwa", price="300.00", category=self.category, image=png_upload('sekuwa.png')
+        )
+        item.refresh_from_db()
+        self.assertEqual(set(item.image_variants['srcset']), {'200', '400', '800'})
+
+    def test_replaced_image_gets_thumbnails(self):
+        item = MenuItem.objects.create(name="Sekuwa", price="300.00", category=self.category)
+        item.image = png_upload('sekuwa.png')
+        item.save()
+        item.refresh_from_db()
+        self.assertEqual(item.image_variants['name'], item.image.name)
+        self.assertEqual(set(item.image_variants['srcset']), {'200', '400', '800'})
+
+
+class DeferredImageUploadTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        for path in (self.media_root, self.staging_root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MENU_IMAGE_STAGING_ROOT=self.staging_root,
+            MENU_IMAGE_DEFERRED_UPLOADS=True,
+            MENU_IMAGE_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        restaurant = Restaurant.objects.create(name="Deferred Dhaba", address="8 Queue Street")
+        group = MenuGroup.objects.create(type="Food", restaurant=restaurant)
+        self.category = MenuCategory.objects.create(name="Curry", menu_group=group)
+
+    def create_item(self):
+        serializer = MenuItemSerializer(data={
+            'name': "Dal Bhat", 'price': "250.00", 'category': self.category.pk,
+            'image_upload': png_upload('dal-bhat.png'),
+        })
+        serializer.is_valid(raise_exception=True)
+        item = serializer.save()
+        return item, MenuItemSerializer(item).data
+
+    def staged_files(self):
+        return [files for _, _, files in os.walk(self.staging_root) if files]
+
+    def test_request_returns_before_upload(self):
+        item, data = self.create_item()
+        self.assertEqual(data['image_upload_status'], 'pending')
+        self.assertIsNone(data['image'])
+        self.assertFalse(item.image)
+        self.assertEqual(len(self.staged_files()), 1)
+
+    def test_worker_uploads_staged_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item, _ = self.create_item()
+        item.refresh_from_db()
+        self.assertEqual(item.image_upload_status, 'ready')
+        self.assertEqual(item.image.name, 'items/deferred-dhaba/food/curry/dal-bhat.png')
+        self.assertEqual(item.image_staging_name, '')
+        self.assertEqual(self.staged_files(), [])
+        self.assertEqual(set(item.image_variants['srcset']), {'200', '400', '800'})
+
+    def test_missing_staged_file_marks_failed(self):
+        with self.assertLogs('menu.uploads', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            item, _ = self.create_item()
+            os.remove(os.path.join(self.staging_root, item.image_staging_name))
+        item.refresh_from_db()
+        self.assertEqual(item.image_upload_status, 'failed')
+        self.assertFalse(item.image)
+
+    def test_retry_command_uploads_pending(self):
+        item, _ = self.create_item()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('retry_image_uploads', '--include-pending', stdout=StringIO())
+        item.refresh_from_db()
+        self.assertEqual(item.image_upload_status, 'ready')
+        self.assertTrue(item.image)
+
+
+class DeferredImageUploadAutocommitTest(TransactionTestCase):
+    """Deferred uploads through the admin API, outside an atomic block"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        for path in (self.media_root, self.staging_root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MENU_IMAGE_STAGING_ROOT=self.staging_root,
+            MENU_IMAGE_DEFERRED_UPLOADS=True,
+            MENU_IMAGE_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        restaurant = Restaurant.objects.create(name="Autocommit Dhaba", address="9 Queue Street")
+        group = MenuGroup.objects.create(type="Food", restaurant=restaurant)
+        self.category = MenuCategory.objects.create(name="Curry", menu_group=group)
+        user = User.objects.create_user(phone="9800000019", password="pass", role='MANAGER')
+        user.managed_restaurants.add(restaurant)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_upload_runs_after_the_row_is_written(self):
+        response = self.client.post(reverse('admin-menu-item-list'), {
+            'name': "Dal Bhat", 'price': "250.00", 'category': self.category.pk,
+            'image_upload': png_upload('dal-bhat.png'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        item = MenuItem.objects.get(pk=response.json()['id'])
+        self.assertEqual(item.image_upload_status, 'ready')
+        self.assertEqual(item.image.name, 'items/autocommit-dhaba/food/curry/dal-bhat.png')
+        self.assertEqual(item.image_staging_name, '')
+        self.assertEqual([files for _, _, files in os.walk(self.staging_root) if files], [])
+
+
+@override_settings(MENU_VIEW_COUNT_FLUSH_THRESHOLD=0, MENU_VIEW_EVENT_BATCH_SIZE=1000)
+class MenuViewAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        flush_view_events()
+        # Nothing left buffered for the exit flush once the test database is gone
+        self.addCleanup(flush_view_events)
+        self.restaurant = Restaurant.objects.create(name="Analytics Aangan", address="11 Metric Marg")
+        self.table = RestaurantTable.objects.create(restaurant=self.restaurant, name="T1")
+        self.user = User.objects.create_user(phone="9800000011", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+        self.scan_url = reverse('increment-view-count', kwargs={'restaurant_pk': self.restaurant.pk})
+        self.stats_url = reverse('admin-menu-view-stats', kwargs={'restaurant_pk': self.restaurant.pk})
+
+    def scan(self, table=None):
+        self.client.post(self.scan_url, {'table': table} if table else {})
+
+    def test_scans_are_buffered_then_batch_inserted(self):
+        self.scan()
+        self.scan(self.table.pk)
+        self.assertEqual(MenuViewEvent.objects.count(), 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_view_events(), 2)
+        self.assertEqual(
+            list(MenuViewEvent.objects.order_by('id').values_list('table_id', flat=True)),
+            [None, self.table.pk],
+        )
+
+    def test_unknown_or_foreign_tables_are_dropped(self):
+        other = Restaurant.objects.create(name="Other Aangan", address="12 Metric Marg")
+        foreign = RestaurantTable.objects.create(restaurant=other, name="T9")
+        for table in (-5, 2 ** 70, foreign.pk, self.table.pk):
+            self.scan(table)
+        flush_view_events()
+        self.assertEqual(
+            list(MenuViewEvent.objects.order_by('id').values_list('table_id', flat=True)),
+            [None, None, None, self.table.pk],
+        )
+        call_command('rollup_menu_views', stdout=StringIO())
+        daily = dict(MenuViewDaily.objects.filter(restaurant=self.restaurant).values_list('table_pk', 'views'))
+        self.assertEqual(daily, {0: 3, self.table.pk: 1})
+
+    def test_rollup_compacts_events(self):
+        for _ in range(3):
+            self.scan()
+        self.scan(self.table.pk)
+        flush_view_events()
+        call_command('rollup_menu_views', stdout=StringIO())
+
+        self.assertEqual(MenuViewEvent.objects.count(), 0)
+        self.assertEqual(MenuViewHourly.objects.get(restaurant=self.restaurant).views, 4)
+        daily = dict(MenuViewDaily.objects.filter(restaurant=self.restaurant).values_list('table_pk', 'views'))
+        self.assertEqual(daily, {0: 3, self.table.pk: 1})
+
+        # A second run adds onto the same buckets
+        self.scan()
+        flush_view_events()
+        call_command('rollup_menu_views', stdout=StringIO())
+        self.assertEqual(MenuViewHourly.objects.get(restaurant=self.restaurant).views, 5)
+
+    def test_report_reads_rollups_only(self):
+        self.scan(self.table.pk)
+        self.scan()
+        flush_view_events()
+        call_command('rollup_menu_views', stdout=StringIO())
+        self.client.force_authenticate(self.user)
+
+        hourly = self.client.get(self.stats_url).json()
+        self.assertEqual([row['views'] for row in hourly['results']], [2])
+
+        with CaptureQueriesContext(connection) as queries:
+            daily = self.client.get(self.stats_url, {'granularity': 'day'}).json()
+        self.assertFalse(any('menu_menuviewevent' in query['sql'] for query in queries.captured_queries))
+        day = daily['results'][0]
+        self.assertEqual(day['views'], 2)
+        self.assertEqual(day['tables'], [{'table': self.table.pk, 'views': 1, 'name': 'T1'}])
+
+    def test_report_requires_manager(self):
+        other = User.objects.create_user(phone="9800000012", password="pass", role='MANAGER')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.stats_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.client.get(self.stats_url, {'start': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+
+class BulkCreateMenuItemsTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Bulk Bhatti", address="2 Batch Bazaar")
+        group = MenuGroup.objects.create(type="Food", restaurant=self.restaurant)
+        self.category = MenuCategory.objects.create(name="Snacks", menu_group=group)
+        self.user = User.objects.create_user(phone="9800000021", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('bulk-create-menu-items', kwargs={'category_pk': self.category.pk})
+
+    def post(self, items):
+        return self.client.post(self.url, {'items': items}, format='json')
+
+    def test_rows_inserted_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post([{'name': f"Samosa {i}", 'price': 40} for i in range(300)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "menu_menuitem"')]
+        # SQLite caps the rows per statement by its parameter limit; still far from one per row
+        self.assertLessEqual(len(inserts), 5)
+        self.assertLess(len(queries.captured_queries), 20)
+        self.assertEqual(MenuItem.objects.filter(category=self.category).count(), 300)
+
+    def test_response_built_from_inserted_rows(self):
+        data = self.post([{'name': "Sel Roti", 'price': "35.5", 'is_highlight': True}]).json()
+        item = MenuItem.objects.get(name="Sel Roti")
+        self.assertEqual(data['created_items'][0]['id'], item.pk)
+        self.assertEqual(data['created_items'][0]['price'], "35.50")
+        self.assertTrue(item.is_highlight)
+
+    def test_every_row_error_reported(self):
+        response = self.post([
+            {'name': "Ok", 'price': 10},
+            {'price': 10},
+            {'name': "Cheap", 'price': -1},
+            {'name': "Odd", 'price': "1.234", 'item_order': "x"},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()['items']
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(errors[0].startswith("Item 2:"))
+        self.assertTrue(errors[1].startswith("Item 3:"))
+        self.assertTrue(all(error.startswith("Item 4:") for error in errors[2:]))
+        self.assertFalse(MenuItem.objects.exists())
+
+    @override_settings(MENU_BULK_CREATE_MAX_ITEMS=5)
+    def test_cap_is_configurable(self):
+        response = self.post([{'name': f"Item {i}", 'price': 10} for i in range(6)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_menu_refreshed_once(self):
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        self.post([{'name': "Chatpate", 'price': 60}, {'name': "Panipuri", 'price': 80}])
+        self.assertEqual(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version + 1)
+        search_url = reverse('admin-menu-item-list')
+        results = self.client.get(search_url, {'search': "panipuri"}).json()['results']
+        self.assertEqual([item['name'] for item in results], ["Panipuri"])
+
+
+class MenuImportTest(TestCase):
+    CSV = (
+        "group,category,name,price,description,is_highlight\n"
+        "Food,Momo,Chicken Momo,180,Steamed,yes\n"
+        "Food,Momo,Buff Momo,160,,\n"
+        "Food,Noodles,Thukpa,200,,\n"
+        "Drinks,Tea,Masala Chiya,40,,\n"
+        "Drinks,Tea,Bad Price,abc,,\n"
+    )
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Import Inn", address="5 Upload Alley")
+        self.user = User.objects.create_user(phone="9800000031", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('import-menu', kwargs={'restaurant_pk': self.restaurant.pk})
+
+    def import_csv(self, text, **params):
+        url = self.url + ('?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else '')
+        return self.client.post(url, data=text.encode(), content_type='text/csv')
+
+    def items(self):
+        return MenuItem.objects.filter(category__menu_group__restaurant=self.restaurant)
+
+    def test_csv_creates_tree_and_reports_rows(self):
+        data = self.import_csv(self.CSV).json()
+        self.assertEqual((data['created'], data['errors']), (4, 1))
+        self.assertEqual((data['groups_created'], data['categories_created']), (2, 3))
+        self.assertEqual([row['status'] for row in data['rows']], ['created'] * 4 + ['error'])
+        self.assertEqual(data['rows'][4]['row'], 6)
+        momo = self.items().get(name="Chicken Momo")
+        self.assertTrue(momo.is_highlight)
+        self.assertEqual(data['rows'][0]['id'], momo.pk)
+        self.assertEqual(momo.category.menu_group.type, "Food")
+
+    def test_reimport_upserts_by_natural_key(self):
+        self.import_csv(self.CSV)
+        data = self.import_csv(
+            "group,category,name,price\n"
+            "Food,Momo,Chicken Momo,190\n"
+            "Food,Momo,Buff Momo,160\n"
+            "Food,Momo,Veg Momo,150\n"
+        ).json()
+        self.assertEqual([row['status'] for row in data['rows']], ['updated', 'unchanged', 'created'])
+        self.assertEqual(self.items().filter(name="Chicken Momo").get().price, Decimal('190.00'))
+        self.assertEqual(self.items().count(), 5)
+
+    @override_settings(MENU_BULK_CREATE_BATCH_SIZE=2)
+    def test_writes_in_chunks(self):
+        rows = ''.join(f"Food,Snacks,Item {i},50\n" for i in range(7))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.import_csv("group,category,name,price\n" + rows).json()
+        self.assertEqual(data['created'], 7)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "menu_menuitem"')]
+        self.assertEqual(len(inserts), 4)
+
+    def test_ndjson_upload_and_dry_run(self):
+        lines = (
+            '{"group": "Food", "category": "Rice", "name": "Dal Bhat", "price": 250.5}\n'
+            'not json\n'
+        )
+        upload = SimpleUploadedFile('menu.ndjson', lines.encode(), content_type='application/x-ndjson')
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        data = self.client.post(self.url + '?dry_run=true', {'file': upload}, format='multipart').json()
+        self.assertTrue(data['dry_run'])
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['rows'][1]['status'], 'error')
+        self.assertFalse(self.items().exists())
+        self.assertEqual(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version)
+
+    def test_import_searchable_and_versioned(self):
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        self.import_csv(self.CSV)
+        self.assertEqual(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version + 1)
+        results = self.client.get(reverse('admin-menu-item-list'), {'search': "thukpa"}).json()['results']
+        self.assertEqual([item['name'] for item in results], ["Thukpa"])
+
+    def test_unsupported_type_and_other_restaurant(self):
+        response = self.client.post(self.url, data=b'<xml/>', content_type='application/xml')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        other = Restaurant.objects.create(name="Not Mine", address="x")
+        url = reverse('import-menu', kwargs={'restaurant_pk': other.pk})
+        self.assertEqual(
+            self.client.post(url, data=self.CSV.encode(), content_type='text/csv').status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class PopulateMenuTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def write_menu(self, menu):
+        path = os.path.join(self.tmpdir, 'menu.json')
+        with open(path, 'w') as f:
+            json.dump(menu, f)
+        return path
+
+    def menu(self, items=None):
+        return {
+            'name': "Fixture Cafe", 'address': "1 Seed Street",
+            'menu_groups': [{
+                'type': "Food", 'group_order': 0,
+                'categories': [{'name': "Momo", 'cat_order': 0, 'items': items or [
+                    {'name': "Chicken Momo", 'price': "180.00", 'item_order': 0},
+                    {'name': "Veg Momo", 'price': "140.00", 'item_order': 1},
+                ]}],
+            }],
+        }
+
+    def populate(self, *args, **options):
+        out = StringIO()
+        call_command('populate_menu', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def items(self):
+        return MenuItem.objects.filter(category__menu_group__restaurant__name="Fixture Cafe")
+
+    def test_bundled_fixture_loads_and_reruns_unchanged(self):
+        self.populate()
+        restaurant = Restaurant.objects.get(name="Himalayan Kitchen")
+        count = MenuItem.objects.filter(category__menu_group__restaurant=restaurant).count()
+        self.assertGreater(count, 0)
+        version = Restaurant.objects.get(pk=restaurant.pk).menu_version
+
+        output = self.populate()
+        self.assertIn(f"0 item(s) created, 0 updated, {count} unchanged", output)
+        self.assertEqual(Restaurant.objects.filter(name="Himalayan Kitchen").count(), 1)
+        self.assertEqual(Restaurant.objects.get(pk=restaurant.pk).menu_version, version)
+
+    def test_creates_in_bulk(self):
+        path = self.write_menu(self.menu(items=[
+            {'name': f"Item {i}", 'price': "50", 'item_order': i} for i in range(30)
+        ]))
+        with CaptureQueriesContext(connection) as queries:
+            self.populate(path)
+        self.assertEqual(self.items().count(), 30)
+        self.assertLess(len(queries), 25)
+
+    def test_updates_changed_items(self):
+        path = self.write_menu(self.menu())
+        self.populate(path)
+        menu = self.menu()
+        menu['menu_groups'][0]['categories'][0]['items'][0]['price'] = "200.00"
+        self.populate(self.write_menu(menu))
+        self.assertEqual(self.items().get(name="Chicken Momo").price, Decimal('200.00'))
+        self.assertEqual(self.items().count(), 2)
+
+    def test_dry_run_saves_nothing(self):
+        output = self.populate(self.write_menu(self.menu()), dry_run=True)
+        self.assertIn("Dry run", output)
+        self.assertFalse(Restaurant.objects.filter(name="Fixture Cafe").exists())
+
+    def test_replace_removes_missing_items(self):
+        self.populate(self.write_menu(self.menu()))
+        menu = self.menu(items=[{'name': "Chicken Momo", 'price': "180.00"}])
+        menu['menu_groups'].append({'type': "Drinks", 'categories': []})
+        self.populate(self.write_menu(menu), replace=True)
+        self.assertEqual(list(self.items().values_list('name', flat=True)), ["Chicken Momo"])
+
+        menu['menu_groups'].pop()
+        self.populate(self.write_menu(menu), replace=True)
+        self.assertFalse(MenuGroup.objects.filter(type="Drinks").exists())
+
+    def test_replace_that_only_disables_bumps_menu_version(self):
+        self.populate(self.write_menu(self.menu()))
+        restaurant = Restaurant.objects.get(name="Fixture Cafe")
+        veg = self.items().get(name="Veg Momo")
+        OrderItem.objects.create(order=Order.objects.create(restaurant=restaurant), menu_item=veg, unit_price=veg.price)
+        version = Restaurant.objects.get(pk=restaurant.pk).menu_version
+
+        # Veg Momo is on an order, so dropping it from the file only disables it
+        self.populate(self.write_menu(self.menu(items=[
+            {'name': "Chicken Momo", 'price': "180.00", 'item_order': 0},
+        ])), replace=True)
+        self.assertTrue(self.items().get(name="Veg Momo").is_disabled)
+        self.assertGreater(Restaurant.objects.get(pk=restaurant.pk).menu_version, version)
+
+    def test_into_existing_restaurant_and_invalid_items(self):
+        restaurant = Restaurant.objects.create(name="Somewhere Else", address="x")
+        self.populate(self.write_menu(self.menu()), restaurant=restaurant.pk)
+        self.assertEqual(MenuItem.objects.filter(category__menu_group__restaurant=restaurant).count(), 2)
+        self.assertFalse(Restaurant.objects.filter(name="Fixture Cafe").exists())
+
+        path = self.write_menu(self.menu(items=[
+            {'name': "Fine", 'price': "10"}, {'name': "Broken", 'price': "abc"},
+        ]))
+        with self.assertRaises(CommandError):
+            self.populate(path, stderr=StringIO())
+        self.assertFalse(Restaurant.objects.filter(name="Fixture Cafe").exists())
+
+
+class MenuReorderTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Drag Diner", address="9 Drop Road")
+        self.group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        self.category = MenuCategory.objects.create(menu_group=self.group, name="Mains")
+        self.items = [
+            MenuItem.objects.create(category=self.category, name=f"Dish {i}", price=100, item_order=i)
+            for i in range(4)
+        ]
+        self.user = User.objects.create_user(phone="9800000041", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reorders_items_in_one_update(self):
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        payload = [{'id': item.pk, 'item_order': 3 - i} for i, item in enumerate(self.items)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('reorder-menu-items'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['updated'], 4)
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "menu_menuitem"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(MenuItem.objects.filter(category=self.category).values_list('name', flat=True)),
+            ["Dish 3", "Dish 2", "Dish 1", "Dish 0"],
+        )
+        self.assertEqual(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version + 1)
+
+    def test_unchanged_order_writes_nothing(self):
+        version = Restaurant.objects.get(pk=self.restaurant.pk).menu_version
+        payload = [{'id': item.pk, 'item_order': item.item_order} for item in self.items]
+        response = self.client.post(reverse('reorder-menu-items'), payload, format='json')
+        self.assertEqual(response.json()['updated'], 0)
+        self.assertEqual(Restaurant.objects.get(pk=self.restaurant.pk).menu_version, version)
+
+    def test_categories_and_groups(self):
+        second = MenuCategory.objects.create(menu_group=self.group, name="Sides", cat_order=1)
+        response = self.client.post(reverse('reorder-menu-categories'), [
+            {'id': self.category.pk, 'cat_order': 1}, {'id': second.pk, 'cat_order': 0},
+        ], format='json')
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(MenuCategory.objects.filter(menu_group=self.group).first(), second)
+
+        response = self.client.post(reverse('reorder-menu-groups'), [{'id': self.group.pk, 'group_order': 5}], format='json')
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(MenuGroup.objects.get(pk=self.group.pk).group_order, 5)
+
+    def test_rejects_other_restaurants_and_bad_rows(self):
+        other = Restaurant.objects.create(name="Not Mine", address="x")
+        foreign = MenuItem.objects.create(
+            category=MenuCategory.objects.create(
+                menu_group=MenuGroup.objects.create(restaurant=other, type="Food"), name="X"
+            ),
+            name="Theirs", price=10,
+        )
+        response = self.client.post(reverse('reorder-menu-items'), [
+            {'id': self.items[0].pk, 'item_order': 9}, {'id': foreign.pk, 'item_order': 0},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()['ids'], [foreign.pk])
+        self.assertEqual(MenuItem.objects.get(pk=self.items[0].pk).item_order, 0)
+
+        for payload in ([{'id': self.items[0].pk, 'item_order': -1}],
+                        [{'id': self.items[0].pk, 'item_order': 1}, {'id': self.items[0].pk, 'item_order': 2}],
+                        []):
+            response = self.client.post(reverse('reorder-menu-items'), payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DenormalizedRestaurantTest(TestCase):
+    def setUp(self):
+        self.first = Restaurant.objects.create(name="First", address="1 Road")
+        self.second = Restaurant.objects.create(name="Second", address="2 Road")
+        self.group = MenuGroup.objects.create(restaurant=self.first, type="Food")
+        self.category = MenuCategory.objects.create(menu_group=self.group, name="Mains")
+        self.item = MenuItem.objects.create(category=self.category, name="Dal Bhat", price=250)
+
+    def test_set_on_create(self):
+        self.assertEqual(self.category.restaurant_id, self.first.pk)
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).restaurant_id, self.first.pk)
+
+    def test_moves_cascade_down(self):
+        other_group = MenuGroup.objects.create(restaurant=self.second, type="Food")
+        self.category.menu_group = other_group
+        self.category.save(update_fields=['menu_group'])
+        self.assertEqual(MenuCategory.objects.get(pk=self.category.pk).restaurant_id, self.second.pk)
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).restaurant_id, self.second.pk)
+
+        self.group.restaurant = self.second
+        self.group.save()
+        self.category.menu_group = self.group
+        self.category.save()
+        self.group.restaurant = self.first
+        self.group.save()
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).restaurant_id, self.first.pk)
+
+        item = MenuItem.objects.get(pk=self.item.pk)
+        item.category = MenuCategory.objects.create(menu_group=other_group, name="Sides")
+        item.save()
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).restaurant_id, self.second.pk)
+
+    def test_check_command_reports_and_fixes_drift(self):
+        call_command('check_menu_restaurants', stdout=StringIO())
+        # queryset.update() skips save(), so the column falls behind
+        other_group = MenuGroup.objects.create(restaurant=self.second, type="Drinks")
+        MenuCategory.objects.filter(pk=self.category.pk).update(menu_group=other_group)
+        with self.assertRaises(CommandError):
+            call_command('check_menu_restaurants', stdout=StringIO())
+
+        call_command('check_menu_restaurants', fix=True, stdout=StringIO())
+        self.assertEqual(MenuCategory.objects.get(pk=self.category.pk).restaurant_id, self.second.pk)
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).restaurant_id, self.second.pk)
+        call_command('check_menu_restaurants', stdout=StringIO())
+
+    def test_admin_list_filters_without_joining_the_tree(self):
+        user = User.objects.create_user(phone="9800000051", password="pass", role='MANAGER')
+        user.managed_restaurants.add(self.first)
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('admin-menu-item-list'))
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.item.pk])
+        sql = ' '.join(q['sql'] for q in queries.captured_queries if 'menu_menuitem' in q['sql'])
+        self.assertNotIn('"menu_menugroup"', sql)
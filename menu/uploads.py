@@ -0,0 +1,108 @@
+# menu/uploads.py
+"""
+Deferred menu image uploads.
+
+With MENU_IMAGE_DEFERRED_UPLOADS on, admin writes don't push the uploaded
+image to the configured storage (a synchronous Cloudinary upload of up to
+30s) inside the request. The file is written to a local staging directory,
+the row is marked image_upload_status="pending" and the request returns.
+After commit, the image worker pool (menu/images.py) uploads the staged file,
+fills in the image field and marks it "ready". A failed upload is marked
+"failed" and keeps its staged file for `manage.py retry_image_uploads`.
+"""
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+from menu.images import defer_image_job
+from menu.models import IMAGE_UPLOAD_FAILED, IMAGE_UPLOAD_PENDING, IMAGE_UPLOAD_READY
+
+logger = logging.getLogger(__name__)
+
+
+def deferred_uploads_enabled():
+    return getattr(settings, 'MENU_IMAGE_DEFERRED_UPLOADS', False)
+
+
+def staging_storage():
+    return FileSystemStorage(location=settings.MENU_IMAGE_STAGING_ROOT)
+
+
+def attach_image(instance, uploaded_file):
+    """Set an uploaded image on a MenuItem/MenuCategory, staging it when deferred uploads are on."""
+    if deferred_uploads_enabled():
+        stage_image(instance, uploaded_file)
+        return
+    instance.image = uploaded_file
+    # Supersedes any upload still queued for this row
+    instance.image_staging_name = ''
+    instance.image_upload_status = IMAGE_UPLOAD_READY
+
+
+def discard_staged(staged_name):
+    staging = staging_storage()
+    if staging.exists(staged_name):
+        staging.delete(staged_name)
+    try:
+        os.rmdir(os.path.dirname(staging.path(staged_name)))
+    except OSError:
+        pass
+
+
+def stage_image(instance, uploaded_file):
+    """
+    Keep `uploaded_file` in the staging area and queue its upload for once
+    the instance is saved and committed. The caller saves the instance as usual.
+    """
+    original_name = os.path.basename(uploaded_file.name)
+    # A directory per upload keeps the original file name for upload_to
+    staged_name = staging_storage().save(f"{uuid.uuid4().hex}/{original_name}", uploaded_file)
+
+    instance.image_staging_name = staged_name
+    instance.image_upload_status = IMAGE_UPLOAD_PENDING
+    # Queued by the model's save() once the row is written (menu/images.py)
+    defer_image_job(instance, upload_staged_image, staged_name)
+
+
+def upload_staged_image(model, pk, staged_name):
+    """Push a staged file to the image field's storage and record the result."""
+    from menu.cache import menu_changed
+    from menu.signals import get_restaurant_id
+
+    instance = model.objects.filter(pk=pk, image_staging_name=staged_name).first()
+    if instance is None:
+        # Row deleted or its image replaced since; the newer write owns the row now
+        discard_staged(staged_name)
+        return False
+
+    try:
+        with staging_storage().open(staged_name, 'rb') as staged:
+            instance.image.save(os.path.basename(staged_name), File(staged), save=False)
+    except Exception as e:
+        logger.error(f"Failed to upload staged image {staged_name} for {model.__name__} {pk}: {e}")
+        with transaction.atomic():
+            if model.objects.filter(pk=pk, image_staging_name=staged_name).update(
+                image_upload_status=IMAGE_UPLOAD_FAILED
+            ):
+                menu_changed(get_restaurant_id(instance))
+        return False
+
+    with transaction.atomic():
+        current = model.objects.select_for_update().filter(
+            pk=pk, image_staging_name=staged_name
+        ).exists()
+        if not current:
+            instance.image.storage.delete(instance.image.name)
+            discard_staged(staged_name)
+            return False
+        instance.image_staging_name = ''
+        instance.image_upload_status = IMAGE_UPLOAD_READY
+        instance.save(update_fields=['image', 'image_staging_name', 'image_upload_status'])
+
+    discard_staged(staged_name)
+    return True
@@ -7,6 +7,7 @@ from .views.api_views import (
     MenuCategoryList, 
     MenuItemList, 
     HighlightedMenuItemsList,
+    RestaurantMenuSearch,
     
     # Admin views (for restaurant management)
     RestaurantDetailAdmin,
@@ -19,9 +20,14 @@ from .views.api_views import (
     
     # View menu count tracking
     increment_view_menu_count,
+    menu_view_stats,
     
     # Bulk operations
     bulk_create_menu_items,
+    import_menu,
+    reorder_menu_items,
+    reorder_menu_categories,
+    reorder_menu_groups,
 )
 
 urlpatterns = [
@@ -31,6 +37,7 @@ urlpatterns = [
     # ============================================
     path('restaurants/<int:pk>/', RestaurantDetail.as_view(), name='restaurant-detail'),
     path('restaurants/<int:restaurant_pk>/highlighted-items/', HighlightedMenuItemsList.as_view(), name='highlighted-items'),
+    path('restaurants/<int:restaurant_pk>/search/', RestaurantMenuSearch.as_view(), name='restaurant-menu-search'),
     path('restaurants/<int:restaurant_pk>/increment-view-count/', increment_view_menu_count, name='increment-view-count'),
     path('menu-groups/', MenuGroupList.as_view(), name='menu-group-list'),
     path('menu-categories/', MenuCategoryList.as_view(), name='menu-category-list'),
@@ -42,15 +49,20 @@ urlpatterns = [
     # ============================================
     path('admin/restaurants/<int:pk>/', RestaurantDetailAdmin.as_view(), name='admin-restaurant-detail'),
     path('admin/restaurants/<int:restaurant_pk>/highlighted-items/', HighlightedMenuItemsListAdmin.as_view(), name='admin-highlighted-items'),
+    path('admin/restaurants/<int:restaurant_pk>/view-stats/', menu_view_stats, name='admin-menu-view-stats'),
     path('admin/menu-groups/', MenuGroupListAdmin.as_view(), name='admin-menu-group-list'),
+    path('admin/menu-groups/reorder/', reorder_menu_groups, name='reorder-menu-groups'),  # POST [{id, group_order}]
     # Menu Categories - Full CRUD for admins
     path('admin/menu-categories/', MenuCategoryListAdmin.as_view(), name='admin-menu-category-list'),  # GET (list) + POST (create)
+    path('admin/menu-categories/reorder/', reorder_menu_categories, name='reorder-menu-categories'),  # POST [{id, cat_order}]
     path('admin/menu-categories/<int:pk>/', MenuCategoryDetailAdmin.as_view(), name='admin-menu-category-detail'),  # GET, PUT, PATCH, DELETE
     
     # Menu Items - Full CRUD for admins
     path('admin/menu-items/', MenuItemListAdmin.as_view(), name='admin-menu-item-list'),  # GET (list) + POST (create)
+    path('admin/menu-items/reorder/', reorder_menu_items, name='reorder-menu-items'),  # POST [{id, item_order}]
     path('admin/menu-items/<int:pk>/', MenuItemDetailAdmin.as_view(), name='admin-menu-item-detail'),  # GET, PUT, PATCH, DELETE
     
     # Bulk operations
     path('admin/menu-categories/<int:category_pk>/bulk-create-items/', bulk_create_menu_items, name='bulk-create-menu-items'),
+    path('admin/restaurants/<int:restaurant_pk>/import/', import_menu, name='import-menu'),
 ]
\ No newline at end of file
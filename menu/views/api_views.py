@@ -1,88 +1,273 @@
 # menu/views/api_views.py
-from rest_framework import generics, filters, status
+import csv
+
+from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
-from django.http import JsonResponse
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from menu.analytics import daily_report, hourly_report, record_view_event
+from menu.cache import get_menu_snapshot, get_menu_state, menu_changed, menu_etag, with_view_count
+from menu.counters import add_view, pending_views
+from menu.filters import MenuItemSearchFilter
+from menu.fuzzy_search import get_search_index
+from menu.importers import import_rows, iter_csv_rows, iter_ndjson_rows, iter_text_lines
+from menu.search import index_menu_items
 from menu.models import Restaurant, MenuGroup, MenuCategory, MenuItem
+from order.models import RestaurantTable
+from utils.pagination import KeysetPagination
+from profiles.permissions import managed_restaurant_ids, require_restaurant_member
 from menu.serializers import (
     RestaurantSerializer, MenuGroupSerializer, MenuGroupAdminSerializer,
     MenuCategorySerializer, MenuCategoryAdminSerializer, MenuItemSerializer,
-    BulkMenuItemCreateSerializer
+    BulkMenuItemCreateSerializer, MenuReorderSerializer
 )
 
 
+# ============================================
+# MENU VERSION (ETag / Last-Modified)
+# ============================================
+
+class MenuVersionMixin:
+    """
+    Adds ETag/Last-Modified headers derived from Restaurant.menu_version to GET
+    responses, and answers If-None-Match/If-Modified-Since with 304 before any
+    menu table is queried. Views return the lookup that identifies the
+    restaurant from get_menu_lookup(); without one the response is unversioned.
+    """
+
+    def get_menu_lookup(self):
+        return None
+
+    def get_menu_state(self):
+        if not hasattr(self, '_menu_state'):
+            lookup = self.get_menu_lookup()
+            self._menu_state = get_menu_state(**lookup) if lookup else None
+        return self._menu_state
+
+    def get_query_param_id(self, name):
+        try:
+            return int(self.request.query_params[name])
+        except (KeyError, ValueError):
+            return None
+
+    def get(self, request, *args, **kwargs):
+        state = self.get_menu_state()
+        if state is None:
+            return super().get(request, *args, **kwargs)
+
+        restaurant_id, version, updated_at = state
+        response = get_conditional_response(
+            request,
+            etag=menu_etag(restaurant_id, version),
+            last_modified=int(updated_at.timestamp()),
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            # The view may have served a newer version than checked above
+            restaurant_id, version, updated_at = self._menu_state
+
+        if response.status_code in (200, 304):
+            response['ETag'] = menu_etag(restaurant_id, version)
+            response['Last-Modified'] = http_date(updated_at.timestamp())
+            # Let clients keep the body but always revalidate it
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+# ============================================
+# PAGINATION
+# ============================================
+
+class MenuItemPagination(KeysetPagination):
+    """
+    Menu items in display order, keyed on (item_order, id).
+    Ranked search results (MenuItemSearchFilter) come back as a single page,
+    best match first.
+    """
+    ordering = ('item_order', 'id')
+    page_size = 100
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not getattr(view, 'search_ranked', False):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page = list(queryset[:self.get_page_size(request)])
+        self.has_next = self.has_previous = False
+        return self.page
+
+
 # ============================================
 # ORIGINAL VIEWS - For Customer QR Menu
 # (Keep these exactly as they were)
 # ============================================
 
-class RestaurantDetail(generics.RetrieveAPIView):
+class RestaurantDetail(MenuVersionMixin, generics.RetrieveAPIView):
     """Public view - Get restaurant details for QR menu"""
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantSerializer
     lookup_field = 'pk'
     
     def get_queryset(self):
-        return super().get_queryset().prefetch_related(
-            'menu_groups__categories__items'
-        )
-
-
-class MenuGroupList(generics.ListAPIView):
+        return RestaurantSerializer.setup_eager_loading(super().get_queryset())
+
+    def get_menu_lookup(self):
+        return {'pk': self.kwargs[self.lookup_field]}
+
+    def get_menu_state(self):
+        # Read the stored view count along with the version, in the same query
+        if not hasattr(self, '_menu_state'):
+            row = Restaurant.objects.filter(**self.get_menu_lookup()).values_list(
+                'pk', 'menu_version', 'menu_updated_at', 'view_menu_count'
+            ).first()
+            self._menu_state = row[:3] if row else None
+            self._stored_view_count = row[3] if row else 0
+        return self._menu_state
+
+    def retrieve(self, request, *args, **kwargs):
+        state = self.get_menu_state()
+        if state is None:
+            raise NotFound()
+
+        # Serve the pre-rendered snapshot (menu/cache.py) instead of
+        # serializing the whole menu tree on every scan. The view count isn't
+        # part of it (nor of the ETag): it's added live, stored plus pending.
+        restaurant_id, version, updated_at = state
+        version, payload = get_menu_snapshot(restaurant_id, version)
+        if payload is None:
+            raise NotFound()
+        self._menu_state = (restaurant_id, version, updated_at)
+        view_count = self._stored_view_count + pending_views(restaurant_id)
+        return HttpResponse(with_view_count(payload, view_count), content_type='application/json')
+
+
+class MenuGroupList(MenuVersionMixin, generics.ListAPIView):
     """Public view - List menu groups for customer"""
     queryset = MenuGroup.objects.all()
     serializer_class = MenuGroupSerializer
+
+    def get_menu_lookup(self):
+        restaurant_id = self.get_query_param_id('restaurant')
+        if restaurant_id is not None:
+            return {'pk': restaurant_id}
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = MenuGroupSerializer.setup_eager_loading(super().get_queryset())
         restaurant_id = self.request.query_params.get('restaurant', None)
         if restaurant_id is not None:
             queryset = queryset.filter(restaurant_id=restaurant_id)
         return queryset
 
 
-class MenuCategoryList(generics.ListAPIView):
+class MenuCategoryList(MenuVersionMixin, generics.ListAPIView):
     """Public view - List categories for customer"""
     queryset = MenuCategory.objects.all()
     serializer_class = MenuCategorySerializer
+
+    def get_menu_lookup(self):
+        menu_group_id = self.get_query_param_id('menu_group')
+        if menu_group_id is not None:
+            return {'menu_groups': menu_group_id}
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = MenuCategorySerializer.setup_eager_loading(super().get_queryset())
         menu_group_id = self.request.query_params.get('menu_group', None)
         if menu_group_id is not None:
             queryset = queryset.filter(menu_group_id=menu_group_id)
         return queryset
 
 
-class MenuItemList(generics.ListAPIView):
+class MenuItemList(MenuVersionMixin, generics.ListAPIView):
     """Public view - List menu items for customer"""
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
-    filter_backends = [filters.SearchFilter]
+    pagination_class = MenuItemPagination
+    filter_backends = [MenuItemSearchFilter]
     filterset_fields = ['category']
     search_fields = ['name', 'description']
+
+    def get_menu_lookup(self):
+        category_id = self.get_query_param_id('category')
+        if category_id is not None:
+            return {'menu_groups__categories': category_id}
+        restaurant_id = self.get_query_param_id('restaurant')
+        if restaurant_id is not None:
+            return {'pk': restaurant_id}
+
+    def get_search_restaurant_ids(self):
+        state = self.get_menu_state()
+        return [state[0]] if state is not None else None
     
     def get_queryset(self):
         queryset = super().get_queryset()
         category_id = self.request.query_params.get('category', None)
         if category_id is not None:
             queryset = queryset.filter(category_id=category_id)
+        restaurant_id = self.request.query_params.get('restaurant', None)
+        if restaurant_id is not None:
+            queryset = queryset.filter(restaurant_id=restaurant_id)
         return queryset
 
 
-class HighlightedMenuItemsList(generics.ListAPIView):
+class HighlightedMenuItemsList(MenuVersionMixin, generics.ListAPIView):
     """Public view - List highlighted items for customer"""
     serializer_class = MenuItemSerializer
+
+    def get_menu_lookup(self):
+        return {'pk': self.kwargs['restaurant_pk']}
     
     def get_queryset(self):
         return MenuItem.objects.filter(
-            category__menu_group__restaurant__pk=self.kwargs['restaurant_pk'],
+            restaurant_id=self.kwargs['restaurant_pk'],
             is_highlight=True,
             is_disabled=False
         ).order_by('item_order')
 
 
+class RestaurantMenuSearch(MenuVersionMixin, generics.ListAPIView):
+    """
+    Public view - Typo-tolerant search over a restaurant's menu
+    GET ?q=<text>&limit=<n>: best matches first, answered from an in-memory
+    trigram index (menu/fuzzy_search.py) without querying the menu tables
+    """
+    serializer_class = MenuItemSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 50
+
+    def get_menu_lookup(self):
+        return {'pk': self.kwargs['restaurant_pk']}
+
+    def list(self, request, *args, **kwargs):
+        state = self.get_menu_state()
+        if state is None:
+            raise NotFound()
+        restaurant_id, version, _ = state
+
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        results = []
+        if query:
+            index = get_search_index(restaurant_id, version)
+            results = [
+                {**item, 'score': score} for score, item in index.search(query, limit=max(limit, 1))
+            ]
+        return Response({'query': query, 'results': results})
+
+
 # ============================================
 # NEW ADMIN VIEWS - For Restaurant Management
 # (These require authentication and filter by user's restaurant)
@@ -97,9 +282,9 @@ class RestaurantDetailAdmin(generics.RetrieveAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Restaurant.objects.filter(
-            managers_and_staff=user
-        ).prefetch_related('menu_groups__categories__items')
+        return RestaurantSerializer.setup_eager_loading(
+            Restaurant.objects.filter(pk__in=managed_restaurant_ids(user))
+        )
 
 
 class MenuGroupListAdmin(generics.ListAPIView):
@@ -110,8 +295,8 @@ class MenuGroupListAdmin(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = MenuGroup.objects.filter(
-            restaurant__managers_and_staff=user
+        queryset = MenuGroupSerializer.setup_eager_loading(
+            MenuGroup.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
         )
         
         restaurant_id = self.request.query_params.get('restaurant', None)
@@ -134,7 +319,7 @@ class MenuCategoryListAdmin(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         queryset = MenuCategory.objects.filter(
-            menu_group__restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         )
         
         menu_group_id = self.request.query_params.get('menu_group', None)
@@ -153,9 +338,9 @@ class MenuCategoryListAdmin(generics.ListCreateAPIView):
         menu_group = serializer.validated_data.get('menu_group')
         user = self.request.user
         
-        if not menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to add categories to this menu group.")
+        require_restaurant_member(
+            user, menu_group.restaurant_id, "You don't have permission to add categories to this menu group."
+        )
         
         serializer.save()
 
@@ -173,17 +358,15 @@ class MenuCategoryDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         user = self.request.user
         return MenuCategory.objects.filter(
-            menu_group__restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         )
     
     def perform_update(self, serializer):
         """Ensure user can only update categories they manage"""
-        instance = self.get_object()
+        instance = serializer.instance
         user = self.request.user
         
-        if not instance.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to update this category.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to update this category.")
         
         serializer.save()
     
@@ -191,9 +374,7 @@ class MenuCategoryDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
         """Ensure user can only delete categories they manage"""
         user = self.request.user
         
-        if not instance.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to delete this category.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to delete this category.")
         
         instance.delete()
 
@@ -207,15 +388,19 @@ class MenuItemListAdmin(generics.ListCreateAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
+    pagination_class = MenuItemPagination
+    filter_backends = [MenuItemSearchFilter]
     search_fields = ['name', 'description']
+
+    def get_search_restaurant_ids(self):
+        return managed_restaurant_ids(self.request.user)
     
     def get_queryset(self):
         user = self.request.user
         
         # CRITICAL: Only return items from restaurants this user manages
         queryset = MenuItem.objects.filter(
-            category__menu_group__restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         )
         
         # Filter by category if provided
@@ -241,9 +426,7 @@ class MenuItemListAdmin(generics.ListCreateAPIView):
         user = self.request.user
         
         # Verify the category belongs to a restaurant this user manages
-        if not category.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to add items to this category.")
+        require_restaurant_member(user, category.restaurant_id, "You don't have permission to add items to this category.")
         
         serializer.save()
 
@@ -262,18 +445,16 @@ class MenuItemDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
         user = self.request.user
         # Only return items from restaurants this user manages
         return MenuItem.objects.filter(
-            category__menu_group__restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         )
     
     def perform_update(self, serializer):
         """Ensure user can only update items they manage"""
-        instance = self.get_object()
+        instance = serializer.instance
         user = self.request.user
         
         # Verify the item belongs to a restaurant this user manages
-        if not instance.category.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to update this item.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to update this item.")
         
         serializer.save()
     
@@ -282,9 +463,7 @@ class MenuItemDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
         user = self.request.user
         
         # Verify the item belongs to a restaurant this user manages
-        if not instance.category.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to delete this item.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to delete this item.")
         
         instance.delete()
 
@@ -300,8 +479,8 @@ class HighlightedMenuItemsListAdmin(generics.ListAPIView):
         
         # Verify user manages this restaurant
         return MenuItem.objects.filter(
-            category__menu_group__restaurant__pk=restaurant_pk,
-            category__menu_group__restaurant__managers_and_staff=user,
+            restaurant_id=restaurant_pk,
+            restaurant_id__in=managed_restaurant_ids(user),
             is_highlight=True,
             is_disabled=False
         ).order_by('item_order')
@@ -316,27 +495,171 @@ def increment_view_menu_count(request, restaurant_pk):
     """
     Increment the view_menu_count for a restaurant when View Menu button is pressed
     Public endpoint - no authentication required
+
+    The view is buffered in the cache (menu/counters.py) and written to the
+    row by a later flush; the count returned includes the pending views.
+    An optional `table` id (from a table's QR code) is kept for analytics.
     """
-    try:
-        restaurant = Restaurant.objects.get(pk=restaurant_pk)
-        restaurant.view_menu_count += 1
-        restaurant.save(update_fields=['view_menu_count'])
-        
+    if not isinstance(request.data, dict):
         return JsonResponse({
-            'success': True,
-            'view_menu_count': restaurant.view_menu_count
-        })
-    except Restaurant.DoesNotExist:
+            'success': False,
+            'error': 'Request body must be an object'
+        }, status=400)
+
+    stored_count = Restaurant.objects.filter(pk=restaurant_pk).values_list(
+        'view_menu_count', flat=True
+    ).first()
+    if stored_count is None:
         return JsonResponse({
             'success': False,
             'error': 'Restaurant not found'
         }, status=404)
 
+    pending = add_view(restaurant_pk)
+    table_id = request.data.get('table') or request.query_params.get('table')
+    try:
+        table_id = int(table_id) if table_id else None
+    except (TypeError, ValueError):
+        table_id = None
+    # The event column has no foreign key constraint: keep only real tables
+    # of this restaurant, so junk ids can't break the batch insert or rollup
+    if table_id is not None and (
+        table_id <= 0
+        or not RestaurantTable.objects.filter(pk=table_id, restaurant_id=restaurant_pk).exists()
+    ):
+        table_id = None
+    record_view_event(restaurant_pk, table_id)
+
+    return JsonResponse({
+        'success': True,
+        'view_menu_count': stored_count + pending
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def menu_view_stats(request, restaurant_pk):
+    """
+    Menu views for a manager's restaurant, read from the rollups only
+    (events newer than the last `rollup_menu_views` run are not included).
+    GET ?granularity=hour&start=<ISO datetime>&end=<ISO datetime> (default: last 48 hours)
+    GET ?granularity=day&start=<YYYY-MM-DD>&end=<YYYY-MM-DD> (Nepali dates, inclusive)
+    """
+    restaurant = Restaurant.objects.filter(
+        pk=restaurant_pk, pk__in=managed_restaurant_ids(request.user)
+    ).values('pk', 'view_menu_count').first()
+    if restaurant is None:
+        return Response(
+            {'error': 'Restaurant not found.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    granularity = request.query_params.get('granularity', 'hour')
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+    if granularity == 'hour':
+        bounds = []
+        for value in (start, end):
+            try:
+                parsed = parse_datetime(value) if value else None
+            except ValueError:
+                parsed = None
+            if value and parsed is None:
+                return Response(
+                    {'error': 'start and end must be ISO 8601 datetimes.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if parsed is not None and timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            bounds.append(parsed)
+        results = hourly_report(restaurant_pk, *bounds)
+    elif granularity == 'day':
+        results = daily_report(restaurant_pk, start, end)
+    else:
+        return Response(
+            {'error': "granularity must be 'hour' or 'day'."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({
+        'restaurant': restaurant_pk,
+        'granularity': granularity,
+        'view_menu_count': restaurant['view_menu_count'],
+        'results': results,
+    })
+
+
+# ============================================
+# MENU IMPORT (CSV / NDJSON)
+# ============================================
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_menu(request, restaurant_pk):
+    """
+    Upsert groups, categories and items from a CSV or NDJSON upload
+    (columns/keys described in menu/importers.py).
+    POST the file as the raw body with Content-Type text/csv or
+    application/x-ndjson, or as multipart field `file` (.csv / .ndjson).
+    The upload is parsed line by line, never loaded whole.
+    ?dry_run=true reports what would happen without saving.
+    """
+    restaurant = Restaurant.objects.filter(pk=restaurant_pk, pk__in=managed_restaurant_ids(request.user)).first()
+    if restaurant is None:
+        return Response(
+            {'error': 'Restaurant not found.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    content_type = request.content_type.split(';')[0].strip().lower()
+    if content_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': "Missing file."}, status=status.HTTP_400_BAD_REQUEST)
+        stream = upload
+        name = upload.name.lower()
+        file_format = 'csv' if name.endswith('.csv') else 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else None
+    else:
+        stream = request.stream
+        file_format = 'csv' if content_type in CSV_CONTENT_TYPES else 'ndjson' if content_type in NDJSON_CONTENT_TYPES else None
+
+    if file_format is None:
+        return Response(
+            {'error': 'Upload a CSV or NDJSON file.'},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    if stream is None:
+        return Response({'error': "Empty upload."}, status=status.HTTP_400_BAD_REQUEST)
+
+    lines = iter_text_lines(stream)
+    rows = iter_csv_rows(lines) if file_format == 'csv' else iter_ndjson_rows(lines)
+    dry_run = request.query_params.get('dry_run', '').lower() in ("true", "1", "yes", "on", "t")
+    try:
+        counts, report = import_rows(restaurant, rows, dry_run=dry_run)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return Response({'error': f'Could not read the file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': counts['errors'] == 0,
+        'dry_run': dry_run,
+        **counts,
+        'rows': report,
+    })
+
 
 # ============================================
 # BULK MENU ITEM CREATION
 # ============================================
 
+# Item fields a bulk create row may set
+BULK_CREATE_FIELDS = ('name', 'description', 'price', 'item_order', 'is_disabled', 'is_highlight')
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def bulk_create_menu_items(request, category_pk):
@@ -350,7 +673,7 @@ def bulk_create_menu_items(request, category_pk):
         user = request.user
         
         # Verify user manages this category's restaurant
-        if not category.menu_group.restaurant.managers_and_staff.filter(id=user.id).exists():
+        if category.restaurant_id not in managed_restaurant_ids(user):
             return Response(
                 {'error': "You don't have permission to add items to this category."},
                 status=status.HTTP_403_FORBIDDEN
@@ -360,19 +683,26 @@ def bulk_create_menu_items(request, category_pk):
         serializer = BulkMenuItemCreateSerializer(data=request.data)
         if serializer.is_valid():
             items_data = serializer.validated_data['items']
-            created_items = []
+            created_items = [
+                MenuItem(category=category, restaurant_id=category.restaurant_id, **{
+                    field: item_data[field] for field in BULK_CREATE_FIELDS if field in item_data
+                })
+                for item_data in items_data
+            ]
             
             try:
-                # Create items in a transaction for data integrity
+                # Insert in chunks, in one transaction for data integrity.
+                # bulk_create skips signals, so index and refresh the menu once here.
                 from django.db import transaction
                 with transaction.atomic():
-                    for item_data in items_data:
-                        # Set the category for each item
-                        item_data['category'] = category
-                        item = MenuItem.objects.create(**item_data)
-                        created_items.append(item)
+                    MenuItem.objects.bulk_create(
+                        created_items,
+                        batch_size=getattr(settings, 'MENU_BULK_CREATE_BATCH_SIZE', 500),
+                    )
+                    index_menu_items([item.pk for item in created_items])
+                    menu_changed(category.restaurant_id)
                 
-                # Serialize created items for response
+                # Serialize created items for response (pks are set by bulk_create)
                 response_serializer = MenuItemSerializer(created_items, many=True)
                 
                 return Response({
@@ -394,4 +724,70 @@ def bulk_create_menu_items(request, category_pk):
         return Response(
             {'error': 'Category not found.'},
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+# ============================================
+# DRAG-AND-DROP REORDER
+# ============================================
+
+def _reorder(request, model, order_field):
+    """
+    Set `order_field` on many rows of `model` from [{id, <order_field>}].
+    Ownership comes from the user's cached memberships; changed rows are
+    written with one bulk_update and each affected menu is invalidated once.
+    """
+    serializer = MenuReorderSerializer(
+        data=request.data, many=True, order_field=order_field, allow_empty=False,
+        max_length=getattr(settings, 'MENU_BULK_CREATE_MAX_ITEMS', 1000),
+    )
+    serializer.is_valid(raise_exception=True)
+    orders = {row['id']: row[order_field] for row in serializer.validated_data}
+    if len(orders) != len(serializer.validated_data):
+        return Response({'error': 'Each id may only appear once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    current = {
+        pk: (restaurant_id, order)
+        for pk, restaurant_id, order in model.objects.filter(
+            pk__in=orders, restaurant_id__in=managed_restaurant_ids(request.user)
+        ).values_list('pk', 'restaurant_id', order_field)
+    }
+    missing = sorted(set(orders) - set(current))
+    if missing:
+        return Response(
+            {'error': 'Not found.', 'ids': missing},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    changed = [
+        model(pk=pk, **{order_field: order})
+        for pk, order in orders.items() if current[pk][1] != order
+    ]
+    if changed:
+        from django.db import transaction
+        with transaction.atomic():
+            model.objects.bulk_update(changed, [order_field], batch_size=getattr(settings, 'MENU_BULK_CREATE_BATCH_SIZE', 500))
+            for restaurant_id in sorted({current[row.pk][0] for row in changed}):
+                menu_changed(restaurant_id)
+
+    return Response({'success': True, 'updated': len(changed)})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder_menu_items(request):
+    """POST [{"id": 1, "item_order": 0}, ...]"""
+    return _reorder(request, MenuItem, 'item_order')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder_menu_categories(request):
+    """POST [{"id": 1, "cat_order": 0}, ...]"""
+    return _reorder(request, MenuCategory, 'cat_order')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder_menu_groups(request):
+    """POST [{"id": 1, "group_order": 0}, ...]"""
+    return _reorder(request, MenuGroup, 'group_order')
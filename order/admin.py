@@ -17,7 +17,7 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'restaurant', 'table', 'status', 'created_at')
+    list_display = ('id', 'restaurant', 'table', 'status', 'item_count', 'subtotal', 'created_at')
     list_filter = ('restaurant', 'status')
     search_fields = ('id', 'restaurant__name', 'table__name')
     inlines = [OrderItemInline]
@@ -1,8 +1,27 @@
-from rest_framework import generics
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, BasePermission
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 
-from order.models import Order, OrderItem, RestaurantTable
+from utils.pagination import KeysetPagination
+
+from order import events
+from order.models import Order, OrderItem, OrderTombstone, RestaurantTable
+from profiles.authentication import JWTAuthentication
+from profiles.permissions import can_manage_restaurant, managed_restaurant_ids, require_restaurant_member
 from order.serializers import (
     OrderCreateSerializer,
     OrderSerializer,
@@ -12,6 +31,7 @@ from order.serializers import (
     OrderAdminSerializer,
     OrderItemSerializer,
     OrderItemStatusUpdateSerializer,
+    OrderItemStatusBatchSerializer,
     OrderItemCreateSerializer,
     OrderCheckoutSerializer,
 )
@@ -53,6 +73,27 @@ class IsManagerOrOwnerOrWaiter(BasePermission):
         return request.user.role in ('MANAGER', 'OWNER', 'WAITER')
 
 
+# ────────────────────────────────────────────────
+# Pagination
+# ────────────────────────────────────────────────
+
+class OrderPagination(KeysetPagination):
+    """Newest orders first, keyed on (created_at, id)"""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+
+
+SYNC_TOKEN_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+class OrderSyncPagination(KeysetPagination):
+    """`updated_since` syncs: least recently changed first, keyed on (updated_at, id)"""
+    ordering = ('updated_at', 'id')
+    page_size = 50
+    max_page_size = 200
+
+
 class RestaurantTableListCreate(generics.ListCreateAPIView):
     queryset = RestaurantTable.objects.all()
     serializer_class = RestaurantTableSerializer
@@ -60,7 +101,7 @@ class RestaurantTableListCreate(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        qs = RestaurantTable.objects.filter(restaurant__managers_and_staff=user)
+        qs = RestaurantTable.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
 
         restaurant_id = self.request.query_params.get('restaurant', None)
         if restaurant_id is not None:
@@ -76,10 +117,7 @@ class RestaurantTableListCreate(generics.ListCreateAPIView):
         user = self.request.user
         restaurant = serializer.validated_data.get('restaurant')
 
-        if not restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-
-            raise PermissionDenied("You don't have permission to add tables to this restaurant.")
+        require_restaurant_member(user, restaurant.pk, "You don't have permission to add tables to this restaurant.")
 
         serializer.save()
 
@@ -87,11 +125,12 @@ class RestaurantTableListCreate(generics.ListCreateAPIView):
 class OrderListCreate(generics.ListCreateAPIView):
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderPagination
 
     def get_queryset(self):
         user = self.request.user
         qs = Order.objects.filter(
-            restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         ).select_related(
             'restaurant',
             'table',
@@ -122,10 +161,7 @@ class OrderListCreate(generics.ListCreateAPIView):
         user = self.request.user
         restaurant = serializer.validated_data.get('restaurant')
 
-        if not restaurant.managers_and_staff.filter(id=user.id).exists():
-            from rest_framework.exceptions import PermissionDenied
-
-            raise PermissionDenied("You don't have permission to create orders for this restaurant.")
+        require_restaurant_member(user, restaurant.pk, "You don't have permission to create orders for this restaurant.")
 
         serializer.save()
 
@@ -138,7 +174,7 @@ class OrderDetail(generics.RetrieveAPIView):
     def get_queryset(self):
         user = self.request.user
         return Order.objects.filter(
-            restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         ).select_related(
             'restaurant',
             'table',
@@ -154,10 +190,10 @@ class OrderStatusUpdate(generics.UpdateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Order.objects.filter(restaurant__managers_and_staff=user)
+        return Order.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
 
     def perform_update(self, serializer):
-        instance = self.get_object()
+        instance = serializer.instance
         new_status = serializer.validated_data.get('status')
         user = self.request.user
 
@@ -198,7 +234,7 @@ class RestaurantTableListAdmin(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        qs = RestaurantTable.objects.filter(restaurant__managers_and_staff=user)
+        qs = RestaurantTable.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
 
         restaurant_id = self.request.query_params.get('restaurant', None)
         if restaurant_id is not None:
@@ -210,8 +246,7 @@ class RestaurantTableListAdmin(generics.ListCreateAPIView):
         user = self.request.user
         restaurant = serializer.validated_data.get('restaurant')
 
-        if not restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to add tables to this restaurant.")
+        require_restaurant_member(user, restaurant.pk, "You don't have permission to add tables to this restaurant.")
 
         serializer.save()
 
@@ -228,22 +263,20 @@ class RestaurantTableDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return RestaurantTable.objects.filter(restaurant__managers_and_staff=user)
+        return RestaurantTable.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
 
     def perform_update(self, serializer):
-        instance = self.get_object()
+        instance = serializer.instance
         user = self.request.user
 
-        if not instance.restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to update this table.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to update this table.")
 
         serializer.save()
 
     def perform_destroy(self, instance):
         user = self.request.user
 
-        if not instance.restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to delete this table.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to delete this table.")
 
         instance.delete()
 
@@ -260,14 +293,85 @@ class OrderListAdmin(generics.ListCreateAPIView):
     Role-based filtering:
     - MANAGER/OWNER: Can see all orders including completed
     - WAITER/STAFF: Can only see in-progress orders (confirmed, cooking, checkout)
+
+    Incremental sync: with ?updated_since=<sync_token> only orders changed
+    since then are listed (item changes count, they bump the order's
+    updated_at), oldest change first. The last page also carries `deleted`,
+    the ids of orders deleted since then (or, for roles that don't see
+    completed orders, completed since then), and the `sync_token` to send
+    next time. Tokens older than ORDER_TOMBSTONE_RETENTION_DAYS are refused;
+    reload the full list instead.
     """
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated, IsOrderStaff]
+    pagination_class = OrderPagination
+
+    # Roles that only see in-progress orders
+    IN_PROGRESS_ROLES = ('WAITER', 'STAFF', 'COOK')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.method == 'GET' and self.get_updated_since() is not None:
+                self._paginator = OrderSyncPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_updated_since(self):
+        if not hasattr(self, '_updated_since'):
+            raw = self.request.query_params.get('updated_since')
+            since = None
+            if raw:
+                since = parse_datetime(raw)
+                if since is None:
+                    raise ValidationError({'updated_since': "Not a valid sync token."})
+                if timezone.is_naive(since):
+                    since = timezone.make_aware(since)
+                retention = timedelta(days=getattr(settings, 'ORDER_TOMBSTONE_RETENTION_DAYS', 7))
+                if since < timezone.now() - retention:
+                    raise ValidationError({'updated_since': "Sync token has expired; reload the full order list."})
+            self._updated_since = since
+        return self._updated_since
+
+    def list(self, request, *args, **kwargs):
+        since = self.get_updated_since()
+        if since is None:
+            return super().list(request, *args, **kwargs)
+
+        # Rows stamped just before now may still be committing: hand out a
+        # token a little in the past so the next sync sees them
+        sync_token = timezone.now() - timedelta(seconds=getattr(settings, 'ORDER_SYNC_OVERLAP', 10))
+        response = super().list(request, *args, **kwargs)
+        last_page = response.data.get('next') is None
+        response.data['deleted'] = self.get_deleted_ids(since) if last_page else []
+        # UTC with a Z suffix, so the token needs no escaping in a query string
+        response.data['sync_token'] = sync_token.strftime(SYNC_TOKEN_FORMAT) if last_page else None
+        return response
+
+    def get_deleted_ids(self, since):
+        user = self.request.user
+        restaurant_ids = managed_restaurant_ids(user)
+        restaurant_id = self.request.query_params.get('restaurant', None)
+
+        tombstones = OrderTombstone.objects.filter(restaurant_id__in=restaurant_ids, deleted_at__gt=since)
+        if restaurant_id is not None:
+            tombstones = tombstones.filter(restaurant_id=restaurant_id)
+        deleted = set(tombstones.values_list('order_id', flat=True))
+
+        if user.role in self.IN_PROGRESS_ROLES:
+            completed = Order.objects.filter(
+                restaurant_id__in=restaurant_ids, status='completed', updated_at__gt=since
+            )
+            if restaurant_id is not None:
+                completed = completed.filter(restaurant_id=restaurant_id)
+            deleted.update(completed.values_list('id', flat=True))
+        return sorted(deleted)
 
     def get_queryset(self):
         user = self.request.user
         qs = Order.objects.filter(
-            restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         ).select_related(
             'restaurant',
             'table',
@@ -277,9 +381,13 @@ class OrderListAdmin(generics.ListCreateAPIView):
         )
 
         # Role-based filtering: Waiter/Staff/Cook cannot see completed orders
-        if user.role in ('WAITER', 'STAFF', 'COOK'):
+        if user.role in self.IN_PROGRESS_ROLES:
             qs = qs.exclude(status='completed')
 
+        since = self.get_updated_since() if self.request.method == 'GET' else None
+        if since is not None:
+            qs = qs.filter(updated_at__gt=since)
+
         restaurant_id = self.request.query_params.get('restaurant', None)
         if restaurant_id is not None:
             qs = qs.filter(restaurant_id=restaurant_id)
@@ -316,8 +424,7 @@ class OrderListAdmin(generics.ListCreateAPIView):
         user = self.request.user
         restaurant = serializer.validated_data.get('restaurant')
 
-        if not restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to create orders for this restaurant.")
+        require_restaurant_member(user, restaurant.pk, "You don't have permission to create orders for this restaurant.")
 
         serializer.save()
 
@@ -335,7 +442,7 @@ class OrderDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         user = self.request.user
         return Order.objects.filter(
-            restaurant__managers_and_staff=user
+            restaurant_id__in=managed_restaurant_ids(user)
         ).select_related(
             'restaurant',
             'table',
@@ -345,19 +452,17 @@ class OrderDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
         )
 
     def perform_update(self, serializer):
-        instance = self.get_object()
+        instance = serializer.instance
         user = self.request.user
 
-        if not instance.restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to update this order.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to update this order.")
 
         serializer.save()
 
     def perform_destroy(self, instance):
         user = self.request.user
 
-        if not instance.restaurant.managers_and_staff.filter(id=user.id).exists():
-            raise PermissionDenied("You don't have permission to delete this order.")
+        require_restaurant_member(user, instance.restaurant_id, "You don't have permission to delete this order.")
 
         instance.delete()
 
@@ -366,6 +471,31 @@ class OrderDetailAdmin(generics.RetrieveUpdateDestroyAPIView):
 # Order Item Management Views
 # ────────────────────────────────────────────────
 
+# Item status changes a role may make; MANAGER, OWNER, WAITER and CASHIER may
+# make any, other roles none
+ITEM_STATUS_TRANSITIONS = {
+    'COOK': (
+        {(OrderItem.STATUS_PENDING, OrderItem.STATUS_PREPARING), (OrderItem.STATUS_PREPARING, OrderItem.STATUS_READY)},
+        "Cooks can only change: pending → preparing, preparing → ready",
+    ),
+    'STAFF': (
+        {(OrderItem.STATUS_READY, OrderItem.STATUS_SERVED)},
+        "Staff can only change: ready → served",
+    ),
+}
+ITEM_STATUS_ANY_ROLES = ('MANAGER', 'OWNER', 'WAITER', 'CASHIER')
+
+
+def item_status_transition_error(role, old_status, new_status):
+    """Why `role` may not move an item from old_status to new_status, or None if it may."""
+    if role in ITEM_STATUS_ANY_ROLES:
+        return None
+    if role in ITEM_STATUS_TRANSITIONS:
+        allowed, message = ITEM_STATUS_TRANSITIONS[role]
+        return None if (old_status, new_status) in allowed else message
+    return "You don't have permission to update item status."
+
+
 class OrderItemStatusUpdateView(generics.UpdateAPIView):
     """
     Update individual order item status
@@ -378,51 +508,89 @@ class OrderItemStatusUpdateView(generics.UpdateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return OrderItem.objects.filter(order__restaurant__managers_and_staff=user)
+        # order is read again when the change is published (order/signals.py)
+        return OrderItem.objects.filter(
+            order__restaurant_id__in=managed_restaurant_ids(user)
+        ).select_related('order')
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-        user = self.request.user
-        
+        instance = serializer.instance
+
         # Role-based item status transitions
-        if user.role == 'COOK':
-            # Cook can only change pending to preparing, and preparing to ready
-            old_status = instance.status
-            new_status = serializer.validated_data['status']
-            
-            if old_status == OrderItem.STATUS_PENDING and new_status == OrderItem.STATUS_PREPARING:
-                pass  # Allowed
-            elif old_status == OrderItem.STATUS_PREPARING and new_status == OrderItem.STATUS_READY:
-                pass  # Allowed
-            else:
-                from rest_framework.exceptions import ValidationError
-                raise ValidationError({'status': "Cooks can only change: pending → preparing, preparing → ready"})
-                
-        elif user.role == 'STAFF':
-            # Staff can only change ready to served
-            old_status = instance.status
-            new_status = serializer.validated_data['status']
-            
-            if old_status == OrderItem.STATUS_READY and new_status == OrderItem.STATUS_SERVED:
-                pass  # Allowed
-            else:
-                from rest_framework.exceptions import ValidationError
-                raise ValidationError({'status': "Staff can only change: ready → served"})
-                
-        elif user.role in ('MANAGER', 'OWNER', 'WAITER', 'CASHIER'):
-            # Manager, Owner, Waiter, Cashier can change any status
-            pass
-            
-        else:
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError({'status': "You don't have permission to update item status."})
-        
+        error = item_status_transition_error(
+            self.request.user.role, instance.status, serializer.validated_data['status']
+        )
+        if error:
+            raise ValidationError({'status': error})
+
         serializer.save()
         
         # Note: Order is NOT auto-completed when all items are served
         # Order should only be marked as completed after billing is done via the billing modal
 
 
+class OrderItemStatusBatchView(generics.GenericAPIView):
+    """
+    Update the status of many order items at once
+    POST [{"item_id": 1, "status": "ready"}, ...]
+    Accessible by Cook, Staff, Manager, Owner, Waiter
+
+    Every change must be allowed for the user's role, or none is made. The
+    items are locked and written with one bulk_update, and each affected
+    order gets one `items.updated` event on the live feed.
+    """
+    serializer_class = OrderItemStatusBatchSerializer
+    permission_classes = [IsAuthenticated, IsOrderStaff]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=getattr(settings, 'ORDER_ITEM_BATCH_MAX_ITEMS', 200),
+        )
+        serializer.is_valid(raise_exception=True)
+        statuses = {row['item_id']: row['status'] for row in serializer.validated_data}
+        if len(statuses) != len(serializer.validated_data):
+            return Response({'error': 'Each item_id may only appear once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            items = list(
+                OrderItem.objects.select_for_update(of=('self',)).filter(
+                    pk__in=statuses, order__restaurant_id__in=managed_restaurant_ids(request.user)
+                ).annotate(restaurant_id=F('order__restaurant_id'))
+            )
+            missing = sorted(set(statuses) - {item.pk for item in items})
+            if missing:
+                return Response({'error': 'Not found.', 'ids': missing}, status=status.HTTP_404_NOT_FOUND)
+
+            errors = {}
+            for item in items:
+                error = item_status_transition_error(request.user.role, item.status, statuses[item.pk])
+                if error:
+                    errors[item.pk] = error
+            if errors:
+                return Response({'status': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            now = timezone.now()
+            changed = [item for item in items if item.status != statuses[item.pk]]
+            for item in changed:
+                item.status = statuses[item.pk]
+                item.updated_at = now
+            if changed:
+                OrderItem.objects.bulk_update(changed, ['status', 'updated_at'])
+                # bulk_update skips OrderItem.save(): bump the orders for `updated_since` syncs
+                by_order = defaultdict(list)
+                for item in changed:
+                    by_order[item.order_id].append(item)
+                Order.objects.filter(pk__in=by_order).update(updated_at=now)
+                for order_id, order_items in by_order.items():
+                    events.publish_on_commit(order_items[0].restaurant_id, events.ITEMS_UPDATED, {
+                        'order': order_id,
+                        'items': [events.order_item_data(item) for item in order_items],
+                    })
+
+        return Response({'success': True, 'updated': len(changed)})
+
+
 class OrderAddItemView(generics.CreateAPIView):
     """
     Add items to existing order
@@ -441,7 +609,7 @@ class OrderAddItemView(generics.CreateAPIView):
         try:
             order = Order.objects.get(
                 id=order_id,
-                restaurant__managers_and_staff=user
+                restaurant_id__in=managed_restaurant_ids(user)
             )
             
             if order.status == Order.STATUS_COMPLETED:
@@ -480,8 +648,65 @@ class OrderCheckoutView(generics.UpdateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Order.objects.filter(restaurant__managers_and_staff=user)
+        return Order.objects.filter(restaurant_id__in=managed_restaurant_ids(user))
 
     def perform_update(self, serializer):
         # Save final_total and mark order as completed
         serializer.save(status=Order.STATUS_COMPLETED)
+
+
+# ────────────────────────────────────────────────
+# Live Order Feed (Server-Sent Events)
+# ────────────────────────────────────────────────
+
+# Roles that may open a restaurant's feed; order/events.py filters what each is sent
+ORDER_FEED_ROLES = ('WAITER', 'STAFF', 'COOK', 'CASHIER', 'MANAGER', 'OWNER')
+
+
+def _authenticate_feed(request):
+    """
+    The feed's user, from the Authorization header or, since browsers'
+    EventSource can't set headers, a `token` query parameter.
+    """
+    authenticator = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    if raw_token:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    result = authenticator.authenticate(request)
+    return result[0] if result else None
+
+
+def _feed_allowed(user, restaurant_id):
+    return user.role in ORDER_FEED_ROLES and can_manage_restaurant(user, restaurant_id)
+
+
+@require_GET
+async def order_event_stream(request, restaurant_pk):
+    """
+    Stream a restaurant's order and order item changes as Server-Sent Events.
+    Reconnecting with Last-Event-ID (or ?last_event_id=) replays missed events.
+    Needs the ASGI application (foodapp_backend/asgi.py); see order/events.py.
+    """
+    # Under WSGI Django drains an async stream before sending anything, and
+    # this one never ends: refuse rather than hold a worker forever
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': "The order feed is only served by the ASGI application."}, status=501)
+
+    try:
+        user = await sync_to_async(_authenticate_feed)(request)
+    except (AuthenticationFailed, InvalidToken) as e:
+        return JsonResponse(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, status=401)
+    if user is None:
+        return JsonResponse({'detail': "Authentication credentials were not provided."}, status=401)
+    if not await sync_to_async(_feed_allowed)(user, restaurant_pk):
+        return JsonResponse({'detail': "You don't have permission to access this restaurant."}, status=403)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(
+        events.event_stream(restaurant_pk, user.role, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,242 @@
+# order/events.py
+"""
+Live order events for kitchen and waiter tablets.
+
+Order and OrderItem saves and deletes (order/signals.py) publish small change
+events once their transaction commits: the changed row's fields, not the
+whole order. Each restaurant gets its own channel in this process's memory:
+
+- the last ORDER_EVENTS_HISTORY events per restaurant are kept, so a tablet
+  that reconnects with the id of the last event it saw (SSE Last-Event-ID)
+  is sent what it missed;
+- if those events are gone (older than the history, or the process has
+  restarted since) it is sent a `reset` event instead and should reload the
+  orders list before applying further events;
+- every open feed (order_event_stream in order/api_views.py) has a queue of
+  ORDER_EVENTS_QUEUE_SIZE events; a feed that falls that far behind is closed
+  and resumes from the history when the tablet reconnects.
+
+The feed needs the ASGI application (uvicorn, see foodapp_backend/asgi.py);
+under WSGI the view answers 501. The channels are per process, so the feed
+only sees writes made by the same process: run one worker, or move
+publish() onto a shared broker before scaling out. bulk_create() and
+queryset.update() send no signals; callers publish for those themselves
+(see OrderCreateSerializer.create and OrderItemStatusBatchView).
+"""
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+ORDER_CREATED = 'order.created'
+ORDER_UPDATED = 'order.updated'
+ORDER_DELETED = 'order.deleted'
+ITEM_CREATED = 'item.created'
+ITEM_UPDATED = 'item.updated'
+ITEM_DELETED = 'item.deleted'
+# Several of one order's items at once: {"order": id, "items": [...]}
+ITEMS_UPDATED = 'items.updated'
+RESET = 'reset'
+
+# Events each role is sent; roles not listed get everything
+ROLE_EVENT_TYPES = {
+    'COOK': {ORDER_CREATED, ORDER_DELETED, ITEM_CREATED, ITEM_UPDATED, ITEM_DELETED, ITEMS_UPDATED},
+    'CASHIER': {ORDER_CREATED, ORDER_UPDATED, ORDER_DELETED},
+}
+
+# Event ids are "<stream>-<sequence>"; the stream part changes whenever the
+# process starts, which tells a resuming tablet its cursor is useless
+STREAM_ID = uuid.uuid4().hex[:8]
+
+
+def history_size():
+    return getattr(settings, 'ORDER_EVENTS_HISTORY', 500)
+
+
+def queue_size():
+    return getattr(settings, 'ORDER_EVENTS_QUEUE_SIZE', 1000)
+
+
+def keepalive_interval():
+    return getattr(settings, 'ORDER_EVENTS_KEEPALIVE', 15)
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    sequence: int
+    type: str
+    restaurant_id: int
+    data: dict
+
+    @property
+    def id(self):
+        return f"{STREAM_ID}-{self.sequence}"
+
+    def visible_to(self, role):
+        types = ROLE_EVENT_TYPES.get(role)
+        return types is None or self.type in types
+
+
+class Subscription:
+    def __init__(self, restaurant_id, loop):
+        self.restaurant_id = restaurant_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size())
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+# ────────────────────────────────────────────────
+# Channels
+# ────────────────────────────────────────────────
+
+_sequence = itertools.count(1)
+_last_sequence = 0
+_history = defaultdict(deque)   # restaurant id -> recent OrderEvents, oldest first
+_evicted = {}                   # restaurant id -> sequence of the newest event dropped from history
+_subscribers = defaultdict(set)
+_lock = threading.Lock()
+
+
+def publish(restaurant_id, event_type, data):
+    """Record an event and hand it to every open feed for the restaurant."""
+    global _last_sequence
+    with _lock:
+        _last_sequence = next(_sequence)
+        event = OrderEvent(_last_sequence, event_type, restaurant_id, data)
+        history = _history[restaurant_id]
+        history.append(event)
+        while len(history) > history_size():
+            _evicted[restaurant_id] = history.popleft().sequence
+        subscribers = list(_subscribers.get(restaurant_id, ()))
+
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+        except RuntimeError:
+            # Its event loop has closed without unsubscribing
+            unsubscribe(subscription)
+    return event
+
+
+def publish_on_commit(restaurant_id, event_type, data):
+    transaction.on_commit(lambda: publish(restaurant_id, event_type, data))
+
+
+def parse_event_id(event_id):
+    """Sequence number of an event id from this process, else None."""
+    stream, _, sequence = (event_id or '').strip().rpartition('-')
+    if stream != STREAM_ID or not sequence.isdigit():
+        return None
+    return int(sequence)
+
+
+def subscribe(restaurant_id, last_event_id=None):
+    """
+    Open a feed on the running event loop. Returns (subscription, missed
+    events, reset) where reset means last_event_id can't be resumed from.
+    """
+    subscription = Subscription(restaurant_id, asyncio.get_running_loop())
+    after = parse_event_id(last_event_id)
+    with _lock:
+        _subscribers[restaurant_id].add(subscription)
+        if not last_event_id:
+            return subscription, [], False
+        if after is None or after > _last_sequence or after < _evicted.get(restaurant_id, 0):
+            return subscription, [], True
+        missed = [event for event in _history.get(restaurant_id, ()) if event.sequence > after]
+    return subscription, missed, False
+
+
+def unsubscribe(subscription):
+    with _lock:
+        subscribers = _subscribers.get(subscription.restaurant_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del _subscribers[subscription.restaurant_id]
+
+
+def current_event_id():
+    return f"{STREAM_ID}-{_last_sequence}"
+
+
+# ────────────────────────────────────────────────
+# Server-Sent Events
+# ────────────────────────────────────────────────
+
+def format_sse(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(restaurant_id, role, last_event_id=None):
+    """Async iterator of SSE text for one tablet's feed."""
+    subscription, missed, reset = subscribe(restaurant_id, last_event_id)
+    try:
+        yield f"retry: {keepalive_interval() * 1000}\n\n"
+        if reset:
+            yield format_sse(RESET, {}, current_event_id())
+        for event in missed:
+            if event.visible_to(role):
+                yield format_sse(event.type, event.data, event.id)
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), keepalive_interval())
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event.visible_to(role):
+                yield format_sse(event.type, event.data, event.id)
+    finally:
+        unsubscribe(subscription)
+
+
+# ────────────────────────────────────────────────
+# Payloads
+# ────────────────────────────────────────────────
+
+def order_data(order):
+    return {
+        'id': order.pk,
+        'table': order.table_id,
+        'status': order.status,
+        'final_total': order.final_total,
+        'updated_at': order.updated_at,
+    }
+
+
+def order_item_data(item):
+    return {
+        'id': item.pk,
+        'order': item.order_id,
+        'menu_item': item.menu_item_id,
+        'quantity': item.quantity,
+        'unit_price': item.unit_price,
+        'status': item.status,
+        'updated_at': item.updated_at,
+    }
+
+
+def order_items_created(order, items):
+    """Publish item.created for rows written with bulk_create()."""
+    for item in items:
+        publish_on_commit(order.restaurant_id, ITEM_CREATED, order_item_data(item))
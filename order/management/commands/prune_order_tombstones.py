@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from order.models import OrderTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete order tombstones older than ORDER_TOMBSTONE_RETENTION_DAYS. "
+        "Clients whose last sync is older than that must reload their order list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Keep this many days of tombstones instead of ORDER_TOMBSTONE_RETENTION_DAYS",
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'ORDER_TOMBSTONE_RETENTION_DAYS', 7)
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = OrderTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstone(s) older than {days} day(s)."))
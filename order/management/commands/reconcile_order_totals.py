@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from order.models import Order, OrderItem, item_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Check Order.subtotal and Order.item_count against the order's items "
+        "(they can drift after bulk_create()/queryset.update() of items). --fix repairs them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Repair mismatched orders")
+        parser.add_argument('--restaurant', type=int, help="Only check this restaurant's orders")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.all()
+        items = OrderItem.objects.all()
+        if options['restaurant']:
+            orders = orders.filter(restaurant_id=options['restaurant'])
+            items = items.filter(order__restaurant_id=options['restaurant'])
+
+        actual = item_totals(items)
+        bad_orders = []
+        for pk, subtotal, item_count in orders.values_list('pk', 'subtotal', 'item_count').iterator():
+            expected = actual.get(pk, (0, 0))
+            if (subtotal, item_count) != expected:
+                bad_orders.append(pk)
+                self.stdout.write(
+                    f"Order {pk}: subtotal {subtotal} / {item_count} item(s), "
+                    f"should be {expected[0]} / {expected[1]}"
+                )
+
+        if not options['fix']:
+            if bad_orders:
+                raise CommandError(f"{len(bad_orders)} order(s) out of step; run with --fix")
+            self.stdout.write(self.style.SUCCESS("Order totals are consistent."))
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Recount under the row locks so concurrent item writes aren't lost
+            locked = list(Order.objects.select_for_update().filter(pk__in=bad_orders).values_list('pk', flat=True))
+            totals = item_totals(OrderItem.objects.filter(order_id__in=locked))
+            for pk in locked:
+                subtotal, item_count = totals.get(pk, (0, 0))
+                # updated_at too, so `updated_since` syncs pick up the corrected totals
+                Order.objects.filter(pk=pk).update(subtotal=subtotal, item_count=item_count, updated_at=now)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(bad_orders)} order(s)."))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:32
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Order = apps.get_model('order', 'Order')
+    OrderItem = apps.get_model('order', 'OrderItem')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    items = OrderItem.objects.filter(order_id=OuterRef('pk')).values('order_id').order_by()
+    Order.objects.update(
+        subtotal=Coalesce(
+            Subquery(items.annotate(
+                total=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=money))
+            ).values('total')[:1]),
+            Decimal('0'),
+            output_field=money,
+        ),
+        item_count=Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')[:1]), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 
 from django.conf import settings
-from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from menu.models import MenuItem, Restaurant
 
@@ -69,6 +73,15 @@ class Order(models.Model):
         default=STATUS_IN_PROGRESS,
     )
     
+    # Running totals of the order's items, kept by OrderItem.save() and the
+    # post_delete signal (order/signals.py) with F() updates;
+    # `manage.py reconcile_order_totals` repairs drift
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Only ever advanced with F() updates, never written back from an instance
+    TOTAL_FIELDS = ('subtotal', 'item_count')
+
     # Final billed amount (populated when checkout is completed)
     final_total = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, help_text="Final amount with VAT")
     
@@ -86,6 +99,10 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['nepali_date']),
             models.Index(fields=['nepali_year', 'nepali_month']),
+            # Keyset pagination of a restaurant's orders (order/api_views.py)
+            models.Index(fields=['restaurant', 'created_at', 'id'], name='order_restaurant_created_idx'),
+            # `updated_since` syncs of a restaurant's orders, keyed on (updated_at, id)
+            models.Index(fields=['restaurant', 'updated_at', 'id'], name='order_restaurant_updated_idx'),
         ]
 
     def __str__(self):
@@ -104,6 +121,13 @@ class Order(models.Model):
                 self.nepali_day = nepali_now.day
             except Exception as e:
                 logger.error(f"Failed to set Nepali date fields: {e}")
+        # A full save of an instance loaded earlier must not roll back item
+        # totals added since it was loaded.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     @property
@@ -121,12 +145,38 @@ class Order(models.Model):
 
     @property
     def total(self):
-        total_expr = ExpressionWrapper(
-            F('quantity') * F('unit_price'),
-            output_field=DecimalField(max_digits=12, decimal_places=2),
-        )
-        agg = self.items.aggregate(total=Sum(total_expr))
-        return agg['total'] or 0
+        return self.subtotal
+
+    @classmethod
+    def item_changed(cls, order_id, subtotal=0, item_count=0):
+        """
+        Record a write to one of the order's items: bump updated_at, so
+        `updated_since` syncs pick the order up, and add the subtotal and
+        item_count deltas to its stored totals.
+        """
+        changes = {'updated_at': timezone.now()}
+        if subtotal or item_count:
+            changes.update(subtotal=F('subtotal') + subtotal, item_count=F('item_count') + item_count)
+        cls.objects.filter(pk=order_id).update(**changes)
+
+
+TOTAL_OUTPUT_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def line_total_expression():
+    return ExpressionWrapper(F('quantity') * F('unit_price'), output_field=TOTAL_OUTPUT_FIELD)
+
+
+def item_totals(items):
+    """
+    Aggregate subtotal and item count per order over an OrderItem queryset:
+    {order_id: (subtotal, item_count)}.
+    """
+    rows = items.values('order_id').annotate(
+        subtotal=Coalesce(Sum(line_total_expression()), Decimal('0'), output_field=TOTAL_OUTPUT_FIELD),
+        item_count=Count('pk'),
+    ).order_by()
+    return {row['order_id']: (row['subtotal'], row['item_count']) for row in rows}
 
 
 class OrderItem(models.Model):
@@ -162,8 +212,77 @@ class OrderItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Fields that feed Order.subtotal/item_count. save() moves the order's
+    # totals by the difference from the values loaded from the database;
+    # bulk_create() and queryset.update() bypass it, so callers using them
+    # must adjust the totals themselves (see OrderCreateSerializer.create).
+    TOTAL_FIELDS = ('order', 'quantity', 'unit_price')
+
     class Meta:
         unique_together = ('order', 'menu_item')
 
     def __str__(self):
         return f"{self.menu_item.name} x {self.quantity} ({self.status})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_totals = instance._totals_state()
+        return instance
+
+    def _totals_state(self):
+        """(order_id, line total) as currently set, or None if a field is deferred."""
+        deferred = self.get_deferred_fields()
+        if deferred & {'order_id', 'quantity', 'unit_price'}:
+            return None
+        return self.order_id, self.line_total
+
+    @property
+    def line_total(self):
+        return Decimal(self.quantity) * Decimal(str(self.unit_price))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        tracks_totals = update_fields is None or any(
+            name in update_fields for name in self.TOTAL_FIELDS + ('order_id',)
+        )
+        previous = None
+        if not self._state.adding and tracks_totals:
+            previous = getattr(self, '_loaded_totals', None)
+            if previous is None:
+                row = OrderItem.objects.filter(pk=self.pk).values_list('order_id', 'quantity', 'unit_price').first()
+                if row is not None:
+                    previous = (row[0], Decimal(row[1]) * row[2])
+
+        order_id, line_total = self.order_id, self.line_total
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not tracks_totals:
+                Order.item_changed(order_id)
+            elif previous is None:
+                Order.item_changed(order_id, line_total, 1)
+            elif previous[0] != order_id:
+                Order.item_changed(previous[0], -previous[1], -1)
+                Order.item_changed(order_id, line_total, 1)
+            else:
+                Order.item_changed(order_id, line_total - previous[1], 0)
+        if tracks_totals:
+            self._loaded_totals = (order_id, line_total)
+
+
+class OrderTombstone(models.Model):
+    """
+    Left behind by a deleted order (order/signals.py) so `updated_since`
+    syncs can report the deletion. Pruned by `manage.py prune_order_tombstones`.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='+')
+    order_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'deleted_at'], name='ordertombstone_restaurant_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted order {self.order_id}"
@@ -2,6 +2,7 @@ from django.db import transaction
 from rest_framework import serializers
 
 from menu.models import MenuItem, Restaurant
+from . import events
 from .models import Order, OrderItem, RestaurantTable
 
 
@@ -17,6 +18,15 @@ class OrderItemCreateSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1)
 
 
+class OrderLineSerializer(serializers.Serializer):
+    """
+    An item line of a new order. menu_item is just the id here:
+    OrderCreateSerializer.validate loads every line's item in one query.
+    """
+    menu_item = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
 class OrderItemStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
@@ -29,6 +39,12 @@ class OrderItemStatusUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+class OrderItemStatusBatchSerializer(serializers.Serializer):
+    """One row of a batch status update: {"item_id": ..., "status": ...}. Use with many=True."""
+    item_id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=OrderItem.STATUS_CHOICES)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     menu_item_name = serializers.CharField(source='menu_item.name', read_only=True)
 
@@ -46,16 +62,16 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = (
             'id', 'restaurant', 'table', 'status', 'created_by',
-            'created_at', 'updated_at', 'items', 'total'
+            'created_at', 'updated_at', 'items', 'item_count', 'total'
         )
-        read_only_fields = ('id', 'created_by', 'created_at', 'updated_at', 'items', 'total')
+        read_only_fields = ('id', 'created_by', 'created_at', 'updated_at', 'items', 'item_count', 'total')
 
     def get_total(self, obj):
         return str(obj.total)
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
-    items = OrderItemCreateSerializer(many=True, write_only=True)
+    items = OrderLineSerializer(many=True, write_only=True)
 
     class Meta:
         model = Order
@@ -83,15 +99,21 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
         seen_menu_item_ids = set()
         for item in items:
-            menu_item = item['menu_item']
+            if item['menu_item'] in seen_menu_item_ids:
+                raise serializers.ValidationError({'items': f'Menu item {item["menu_item"]} is duplicated in the request.'})
+            seen_menu_item_ids.add(item['menu_item'])
 
-            if menu_item.id in seen_menu_item_ids:
-                raise serializers.ValidationError({'items': f'Menu item {menu_item.id} is duplicated in the request.'})
-            seen_menu_item_ids.add(menu_item.id)
+        # One query for every line; restaurant_id is on the item row itself
+        menu_items = MenuItem.objects.in_bulk(seen_menu_item_ids)
+        for item in items:
+            menu_item = menu_items.get(item['menu_item'])
+            if menu_item is None:
+                raise serializers.ValidationError({'items': f'Menu item {item["menu_item"]} does not exist.'})
+            item['menu_item'] = menu_item
 
             if menu_item.is_disabled:
                 raise serializers.ValidationError({'items': f'Menu item {menu_item.id} is disabled.'})
-            if menu_item.category.menu_group.restaurant_id != restaurant.id:
+            if menu_item.restaurant_id != restaurant.id:
                 raise serializers.ValidationError({'items': f'Menu item {menu_item.id} does not belong to this restaurant.'})
 
         attrs['restaurant'] = restaurant
@@ -106,22 +128,29 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         if request and request.user and request.user.is_authenticated:
             created_by = request.user
 
-        order = Order.objects.create(created_by=created_by, **validated_data)
-
         order_items = []
         for item in items_data:
             menu_item = item['menu_item']
             quantity = item['quantity']
             order_items.append(
                 OrderItem(
-                    order=order,
                     menu_item=menu_item,
                     quantity=quantity,
                     unit_price=menu_item.price,
                 )
             )
 
+        # bulk_create skips OrderItem.save(), so the order starts out with its totals
+        order = Order.objects.create(
+            created_by=created_by,
+            subtotal=sum(order_item.line_total for order_item in order_items),
+            item_count=len(order_items),
+            **validated_data
+        )
+        for order_item in order_items:
+            order_item.order = order
         OrderItem.objects.bulk_create(order_items)
+        events.order_items_created(order, order_items)
         
         # Refresh instance to get items with prefetch
         order = Order.objects.select_related(
@@ -182,7 +211,7 @@ class OrderAdminSerializer(serializers.ModelSerializer):
             'id', 'restaurant', 'restaurant_name', 'table', 'table_name',
             'status', 'created_by', 'created_by_name', 'created_at', 'updated_at',
             'nepali_date', 'nepali_year', 'nepali_month', 'nepali_day', 'nepali_date_formatted',
-            'items', 'total', 'final_total'
+            'items', 'item_count', 'total', 'final_total'
         )
         read_only_fields = ('id', 'created_at', 'updated_at', 'nepali_date', 'nepali_year', 'nepali_month', 'nepali_day')
 
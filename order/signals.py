@@ -0,0 +1,54 @@
+# order/signals.py
+"""
+Keep Order.subtotal/item_count and updated_at in step when order items are
+deleted (OrderItem.save() handles creates and changes), leave tombstones for
+deleted orders, and publish order changes to the live feed (order/events.py).
+Connected in OrderConfig.ready().
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+from menu.models import Restaurant
+from order import events
+from order.models import Order, OrderItem, OrderTombstone
+
+
+def _deleting(origin, model):
+    """Whether a delete was started on model (an instance or a queryset of it)."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def order_saved(sender, instance, created, **kwargs):
+    event_type = events.ORDER_CREATED if created else events.ORDER_UPDATED
+    events.publish_on_commit(instance.restaurant_id, event_type, events.order_data(instance))
+
+
+def order_deleted(sender, instance, origin=None, **kwargs):
+    # The restaurant's own deletion takes its tombstones with it
+    if not _deleting(origin, Restaurant):
+        OrderTombstone.objects.create(restaurant_id=instance.restaurant_id, order_id=instance.pk)
+    events.publish_on_commit(instance.restaurant_id, events.ORDER_DELETED, {'id': instance.pk})
+
+
+def order_item_saved(sender, instance, created, **kwargs):
+    event_type = events.ITEM_CREATED if created else events.ITEM_UPDATED
+    events.publish_on_commit(instance.order.restaurant_id, event_type, events.order_item_data(instance))
+
+
+def order_item_deleted(sender, instance, origin=None, **kwargs):
+    # Items cascading from a deleted order: nothing left to keep in step,
+    # and order.deleted tells the tablets
+    if _deleting(origin, Order) or _deleting(origin, Restaurant):
+        return
+    Order.item_changed(instance.order_id, -instance.line_total, -1)
+    events.publish_on_commit(
+        instance.order.restaurant_id, events.ITEM_DELETED, {'id': instance.pk, 'order': instance.order_id}
+    )
+
+
+post_save.connect(order_saved, sender=Order, dispatch_uid='order_events_post_save')
+post_delete.connect(order_deleted, sender=Order, dispatch_uid='order_events_post_delete')
+post_save.connect(order_item_saved, sender=OrderItem, dispatch_uid='order_item_events_post_save')
+post_delete.connect(order_item_deleted, sender=OrderItem, dispatch_uid='order_item_totals')
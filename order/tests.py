@@ -1,3 +1,492 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from menu.models import MenuCategory, MenuGroup, MenuItem, Restaurant
+from order import events
+from order.models import Order, OrderItem, OrderTombstone
+
+User = get_user_model()
+
+
+class OrderListPaginationTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Busy Bhojanalaya", address="6 Order Street")
+        self.user = User.objects.create_user(phone="9800000001", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.orders = [Order.objects.create(restaurant=self.restaurant) for _ in range(7)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_orders_paginated_newest_first(self):
+        url = reverse('admin-order-list') + '?page_size=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 3)
+            seen.extend(order['id'] for order in data['results'])
+            url = data['next']
+
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_order_list_create_is_paginated(self):
+        data = self.client.get(reverse('order-list-create') + '?page_size=5').json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNotNone(data['next'])
+
+
+class OrderTotalsTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Sum Sekuwa", address="7 Order Street")
+        self.user = User.objects.create_user(phone="9800000002", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        category = MenuCategory.objects.create(menu_group=group, name="Grill")
+        self.sekuwa = MenuItem.objects.create(category=category, name="Sekuwa", price=Decimal('250.00'))
+        self.momo = MenuItem.objects.create(category=category, name="Momo", price=Decimal('120.50'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def totals(self, order):
+        order = Order.objects.get(pk=order.pk)
+        return order.subtotal, order.item_count
+
+    def test_create_stores_totals(self):
+        response = self.client.post(reverse('order-list-create'), {
+            'restaurant': self.restaurant.pk,
+            'items': [{'menu_item': self.sekuwa.pk, 'quantity': 2}, {'menu_item': self.momo.pk, 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['total'], '620.50')
+        self.assertEqual(response.json()['item_count'], 2)
+        self.assertEqual(self.totals(Order.objects.get()), (Decimal('620.50'), 2))
+
+    def order_queries(self, lines):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('order-list-create'), {
+                'restaurant': self.restaurant.pk, 'items': lines,
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        return len(queries)
+
+    def test_create_query_count_is_constant_in_lines(self):
+        category = self.sekuwa.category
+        extra = [MenuItem.objects.create(category=category, name=f"Dish {i}", price=10 + i) for i in range(8)]
+        # The first request also loads the user's restaurants into the cache
+        self.order_queries([{'menu_item': self.momo.pk, 'quantity': 1}])
+        few = self.order_queries([{'menu_item': self.sekuwa.pk, 'quantity': 1}])
+        many = self.order_queries([{'menu_item': item.pk, 'quantity': 2} for item in [self.sekuwa, *extra]])
+        self.assertEqual(few, many)
+
+    def test_create_rejects_unknown_items(self):
+        response = self.client.post(reverse('order-list-create'), {
+            'restaurant': self.restaurant.pk,
+            'items': [{'menu_item': self.sekuwa.pk, 'quantity': 1}, {'menu_item': 999999, 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('999999', str(response.json()['items']))
+        self.assertFalse(Order.objects.exists())
+
+    def test_item_writes_move_totals(self):
+        order = Order.objects.create(restaurant=self.restaurant)
+        item = OrderItem.objects.create(order=order, menu_item=self.sekuwa, quantity=1, unit_price=250)
+        self.assertEqual(self.totals(order), (Decimal('250.00'), 1))
+
+        item = OrderItem.objects.get(pk=item.pk)
+        item.quantity = 3
+        item.save()
+        self.assertEqual(self.totals(order), (Decimal('750.00'), 1))
+
+        OrderItem.objects.create(order=order, menu_item=self.momo, quantity=2, unit_price=Decimal('120.50'))
+        item.delete()
+        self.assertEqual(self.totals(order), (Decimal('241.00'), 1))
+
+        OrderItem.objects.filter(order=order).delete()
+        self.assertEqual(self.totals(order), (Decimal('0.00'), 0))
+
+    def test_status_change_leaves_totals_alone(self):
+        order = Order.objects.create(restaurant=self.restaurant)
+        item = OrderItem.objects.create(order=order, menu_item=self.sekuwa, quantity=1, unit_price=250)
+        item.status = OrderItem.STATUS_READY
+        # The item's UPDATE and the order's updated_at bump in a savepoint; no totals lookup
+        with self.assertNumQueries(4):
+            item.save(update_fields=['status'])
+        self.assertEqual(self.totals(order), (Decimal('250.00'), 1))
+
+    def test_stale_full_save_keeps_totals(self):
+        order = Order.objects.create(restaurant=self.restaurant)
+        OrderItem.objects.create(order=order, menu_item=self.sekuwa, quantity=1, unit_price=250)
+        order.final_total = Decimal('282.50')
+        order.save()
+        self.assertEqual(self.totals(order), (Decimal('250.00'), 1))
+
+    def test_list_needs_no_total_aggregates(self):
+        for _ in range(3):
+            order = Order.objects.create(restaurant=self.restaurant)
+            OrderItem.objects.create(order=order, menu_item=self.sekuwa, quantity=1, unit_price=250)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin-order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([order['total'] for order in response.json()['results']], ['250.00'] * 3)
+        self.assertFalse([q for q in queries.captured_queries if 'SUM(' in q['sql']])
+
+    def test_reconcile_command(self):
+        order = Order.objects.create(restaurant=self.restaurant)
+        OrderItem.objects.create(order=order, menu_item=self.sekuwa, quantity=2, unit_price=250)
+        empty = Order.objects.create(restaurant=self.restaurant)
+        Order.objects.filter(pk=order.pk).update(subtotal=1, item_count=5)
+        Order.objects.filter(pk=empty.pk).update(item_count=1)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_order_totals', stdout=StringIO())
+        call_command('reconcile_order_totals', '--fix', stdout=StringIO())
+        self.assertEqual(self.totals(order), (Decimal('500.00'), 1))
+        self.assertEqual(self.totals(empty), (Decimal('0.00'), 0))
+        call_command('reconcile_order_totals', stdout=StringIO())
+
+
+def parse_sse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+    if 'data' in fields:
+        fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+class OrderEventStreamTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Live Lounge", address="8 Order Street")
+        self.other = Restaurant.objects.create(name="Quiet Corner", address="9 Order Street")
+        group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        category = MenuCategory.objects.create(menu_group=group, name="Curry")
+        self.dal = MenuItem.objects.create(category=category, name="Dal Bhat", price=Decimal('300.00'))
+        self.order = Order.objects.create(restaurant=self.restaurant)
+        self.item = OrderItem.objects.create(order=self.order, menu_item=self.dal, quantity=1, unit_price=300)
+
+    def user(self, phone, role):
+        user = User.objects.create_user(phone=phone, password="pass", role=role)
+        user.managed_restaurants.add(self.restaurant)
+        return user
+
+    def token(self, user):
+        return str(AccessToken.for_user(user))
+
+    async def open_feed(self, user, restaurant=None, **headers):
+        restaurant = restaurant or self.restaurant
+        url = reverse('order-event-stream', kwargs={'restaurant_pk': restaurant.pk})
+        token = await sync_to_async(self.token)(user)
+        return await AsyncClient().get(url, headers={'Authorization': f'Bearer {token}', **headers})
+
+    async def read(self, stream):
+        while True:
+            chunk = await anext(stream)
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode()
+            if not chunk.startswith(('retry:', ':')):
+                return parse_sse(chunk)
+
+    def committed(self, change):
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+    def set_item_status(self, status_value):
+        def change():
+            self.item.status = status_value
+            self.item.save(update_fields=['status', 'updated_at'])
+        self.committed(change)
+
+    def set_order_total(self):
+        def change():
+            self.order.final_total = Decimal('339.00')
+            self.order.save()
+        self.committed(change)
+
+    async def test_feed_streams_item_and_order_changes(self):
+        user = await sync_to_async(self.user)("9800000011", 'WAITER')
+        response = await self.open_feed(user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+            await sync_to_async(self.set_item_status)(OrderItem.STATUS_PREPARING)
+            event = await self.read(stream)
+            self.assertEqual(event['event'], events.ITEM_UPDATED)
+            self.assertEqual(event['data']['id'], self.item.pk)
+            self.assertEqual(event['data']['status'], OrderItem.STATUS_PREPARING)
+
+            await sync_to_async(self.set_order_total)()
+            event = await self.read(stream)
+            self.assertEqual(event['event'], events.ORDER_UPDATED)
+            self.assertEqual(event['data']['final_total'], '339.00')
+        finally:
+            await stream.aclose()
+
+    async def test_cooks_only_get_kitchen_events(self):
+        cook = await sync_to_async(self.user)("9800000012", 'COOK')
+        response = await self.open_feed(cook)
+        stream = aiter(response.streaming_content)
+        try:
+            await anext(stream)
+            await sync_to_async(self.set_order_total)()
+            await sync_to_async(self.set_item_status)(OrderItem.STATUS_READY)
+            self.assertEqual((await self.read(stream))['event'], events.ITEM_UPDATED)
+        finally:
+            await stream.aclose()
+
+    async def test_reconnect_replays_missed_events(self):
+        user = await sync_to_async(self.user)("9800000013", 'WAITER')
+        seen = events.current_event_id()
+        await sync_to_async(self.set_item_status)(OrderItem.STATUS_PREPARING)
+        await sync_to_async(self.set_item_status)(OrderItem.STATUS_READY)
+
+        response = await self.open_feed(user, **{'Last-Event-ID': seen})
+        stream = aiter(response.streaming_content)
+        try:
+            statuses = [(await self.read(stream))['data']['status'] for _ in range(2)]
+            self.assertEqual(statuses, [OrderItem.STATUS_PREPARING, OrderItem.STATUS_READY])
+        finally:
+            await stream.aclose()
+
+    @override_settings(ORDER_EVENTS_HISTORY=1)
+    async def test_unknown_or_expired_cursor_gets_reset(self):
+        user = await sync_to_async(self.user)("9800000014", 'WAITER')
+        seen = events.current_event_id()
+        await sync_to_async(self.set_item_status)(OrderItem.STATUS_PREPARING)
+        await sync_to_async(self.set_item_status)(OrderItem.STATUS_READY)
+
+        for cursor in (seen, 'stale-stream-7'):
+            response = await self.open_feed(user, **{'Last-Event-ID': cursor})
+            stream = aiter(response.streaming_content)
+            try:
+                event = await self.read(stream)
+                self.assertEqual(event['event'], events.RESET)
+                self.assertEqual(event['id'], events.current_event_id())
+            finally:
+                await stream.aclose()
+
+    async def test_created_order_publishes_its_items(self):
+        user = await sync_to_async(self.user)("9800000015", 'MANAGER')
+        response = await self.open_feed(user)
+        stream = aiter(response.streaming_content)
+
+        def create_order():
+            client = APIClient()
+            client.force_authenticate(user)
+            response = client.post(reverse('order-list-create'), {
+                'restaurant': self.restaurant.pk, 'items': [{'menu_item': self.dal.pk, 'quantity': 2}],
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        try:
+            await anext(stream)
+            await sync_to_async(self.committed)(create_order)
+            order = await self.read(stream)
+            item = await self.read(stream)
+            self.assertEqual(order['event'], events.ORDER_CREATED)
+            self.assertEqual(item['event'], events.ITEM_CREATED)
+            self.assertEqual((item['data']['order'], item['data']['quantity']), (order['data']['id'], 2))
+        finally:
+            await stream.aclose()
+
+    def test_feed_refused_under_wsgi(self):
+        user = self.user("9800000017", 'WAITER')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token(user)}')
+        response = client.get(reverse('order-event-stream', kwargs={'restaurant_pk': self.restaurant.pk}))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_feed_requires_membership(self):
+        user = await sync_to_async(self.user)("9800000016", 'WAITER')
+        response = await self.open_feed(user, restaurant=self.other)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        url = reverse('order-event-stream', kwargs={'restaurant_pk': self.restaurant.pk})
+        response = await AsyncClient().get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderSyncTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Sync Sadan", address="10 Order Street")
+        group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        category = MenuCategory.objects.create(menu_group=group, name="Thali")
+        self.thali = MenuItem.objects.create(category=category, name="Thali", price=Decimal('400.00'))
+        self.orders = [Order.objects.create(restaurant=self.restaurant) for _ in range(3)]
+        self.items = [
+            OrderItem.objects.create(order=order, menu_item=self.thali, quantity=1, unit_price=400)
+            for order in self.orders
+        ]
+        # Everything so far happened well before the first sync
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.since = (timezone.now() - timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    def client_for(self, role):
+        user = User.objects.create_user(phone=f"98000002{len(role):02d}", password="pass", role=role)
+        user.managed_restaurants.add(self.restaurant)
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def sync(self, client, since=None, **params):
+        response = client.get(reverse('admin-order-list'), {'updated_since': since or self.since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_lists_only_changed_orders_and_deletions(self):
+        client = self.client_for('MANAGER')
+        self.assertEqual(self.sync(client)['results'], [])
+
+        self.orders[0].final_total = Decimal('452.00')
+        self.orders[0].save()
+        item = self.items[2]
+        item.status = OrderItem.STATUS_SERVED
+        item.save(update_fields=['status', 'updated_at'])
+        deleted_pk = self.orders[1].pk
+        self.orders[1].delete()
+
+        data = self.sync(client)
+        self.assertEqual([order['id'] for order in data['results']], [self.orders[0].pk, self.orders[2].pk])
+        self.assertEqual(data['deleted'], [deleted_pk])
+        self.assertTrue(data['sync_token'].endswith('Z'))
+
+    def test_pages_carry_the_token_on_the_last_one(self):
+        for order in self.orders:
+            order.save()
+        client = self.client_for('MANAGER')
+        first = self.sync(client, page_size=2)
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNone(first['sync_token'])
+
+        last = client.get(first['next']).json()
+        self.assertEqual(len(last['results']), 1)
+        self.assertIsNotNone(last['sync_token'])
+        self.assertEqual(last['deleted'], [])
+
+    def test_completed_orders_leave_in_progress_lists(self):
+        order = self.orders[0]
+        order.status = Order.STATUS_COMPLETED
+        order.save()
+        data = self.sync(self.client_for('WAITER'))
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['deleted'], [order.pk])
+
+    def test_bad_or_expired_tokens_are_refused(self):
+        client = self.client_for('MANAGER')
+        for since in ('yesterday', '2020-01-01T00:00:00Z'):
+            response = client.get(reverse('admin-order-list'), {'updated_since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_tombstones(self):
+        self.orders[0].delete()
+        OrderTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=30))
+        recent_pk = self.orders[1].pk
+        self.orders[1].delete()
+        call_command('prune_order_tombstones', stdout=StringIO())
+        self.assertEqual(list(OrderTombstone.objects.values_list('order_id', flat=True)), [recent_pk])
+
+    def test_restaurant_delete_leaves_no_tombstones(self):
+        restaurant = Restaurant.objects.create(name="Closing Down", address="11 Order Street")
+        Order.objects.create(restaurant=restaurant)
+        restaurant.delete()
+        self.assertFalse(OrderTombstone.objects.exists())
+
+
+class OrderItemStatusBatchTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ticket Tandoor", address="12 Order Street")
+        self.other = Restaurant.objects.create(name="Next Door", address="13 Order Street")
+        group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        category = MenuCategory.objects.create(menu_group=group, name="Naan")
+        self.dishes = [MenuItem.objects.create(category=category, name=f"Naan {i}", price=50) for i in range(4)]
+        self.orders = [Order.objects.create(restaurant=self.restaurant) for _ in range(2)]
+        self.items = [
+            OrderItem.objects.create(order=self.orders[i % 2], menu_item=dish, quantity=1, unit_price=50)
+            for i, dish in enumerate(self.dishes)
+        ]
+        self.url = reverse('order-item-status-batch')
+
+    def client_for(self, role, phone):
+        user = User.objects.create_user(phone=phone, password="pass", role=role)
+        user.managed_restaurants.add(self.restaurant)
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def statuses(self):
+        return list(OrderItem.objects.order_by('pk').values_list('status', flat=True))
+
+    def test_cook_moves_a_ticket_in_one_request(self):
+        client = self.client_for('COOK', "9800000301")
+        payload = [{'item_id': item.pk, 'status': OrderItem.STATUS_PREPARING} for item in self.items]
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['updated'], 4)
+        self.assertEqual(self.statuses(), [OrderItem.STATUS_PREPARING] * 4)
+        # One event per order, and the orders show up in updated_since syncs
+        self.assertEqual(len(callbacks), 2)
+        for order in Order.objects.all():
+            self.assertGreater(order.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_query_count_is_constant_in_items(self):
+        client = self.client_for('WAITER', "9800000302")
+        client.post(self.url, [{'item_id': self.items[0].pk, 'status': OrderItem.STATUS_READY}], format='json')
+        with CaptureQueriesContext(connection) as one:
+            client.post(self.url, [{'item_id': self.items[0].pk, 'status': OrderItem.STATUS_SERVED}], format='json')
+        with CaptureQueriesContext(connection) as four:
+            client.post(self.url, [
+                {'item_id': item.pk, 'status': OrderItem.STATUS_SERVED if item is self.items[0] else OrderItem.STATUS_READY}
+                for item in self.items
+            ], format='json')
+        self.assertEqual(len(one), len(four))
+
+    def test_disallowed_transition_rejects_the_whole_batch(self):
+        client = self.client_for('COOK', "9800000303")
+        OrderItem.objects.filter(pk=self.items[1].pk).update(status=OrderItem.STATUS_READY)
+        response = client.post(self.url, [
+            {'item_id': self.items[0].pk, 'status': OrderItem.STATUS_PREPARING},
+            {'item_id': self.items[1].pk, 'status': OrderItem.STATUS_SERVED},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.json()['status']), [str(self.items[1].pk)])
+        self.assertEqual(self.statuses()[0], OrderItem.STATUS_PENDING)
+
+    def test_foreign_and_duplicate_items(self):
+        client = self.client_for('MANAGER', "9800000304")
+        foreign_order = Order.objects.create(restaurant=self.other)
+        group = MenuGroup.objects.create(restaurant=self.other, type="Food")
+        dish = MenuItem.objects.create(
+            category=MenuCategory.objects.create(menu_group=group, name="Other"), name="Other", price=1
+        )
+        foreign = OrderItem.objects.create(order=foreign_order, menu_item=dish, quantity=1, unit_price=1)
+        response = client.post(self.url, [{'item_id': foreign.pk, 'status': OrderItem.STATUS_READY}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()['ids'], [foreign.pk])
+
+        row = {'item_id': self.items[0].pk, 'status': OrderItem.STATUS_READY}
+        response = client.post(self.url, [row, row], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_single_item_view_keeps_role_rules(self):
+        client = self.client_for('STAFF', "9800000305")
+        url = reverse('order-item-status-update', kwargs={'pk': self.items[0].pk})
+        response = client.patch(url, {'status': OrderItem.STATUS_SERVED}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['status'], "Staff can only change: ready → served")
@@ -12,8 +12,11 @@ from .api_views import (
     OrderDetailAdmin,
     # Item management
     OrderItemStatusUpdateView,
+    OrderItemStatusBatchView,
     OrderAddItemView,
     OrderCheckoutView,
+    # Live feed
+    order_event_stream,
 )
 
 urlpatterns = [
@@ -34,7 +37,11 @@ urlpatterns = [
     # Item management endpoints
     path('admin/orders/<int:order_id>/items/', OrderAddItemView.as_view(), name='order-add-item'),
     path('admin/items/<int:pk>/status/', OrderItemStatusUpdateView.as_view(), name='order-item-status-update'),
+    path('admin/items/status/', OrderItemStatusBatchView.as_view(), name='order-item-status-batch'),
     
     # Checkout endpoint
     path('admin/orders/<int:pk>/checkout/', OrderCheckoutView.as_view(), name='order-checkout'),
+
+    # Live order feed (Server-Sent Events, served over ASGI)
+    path('admin/restaurants/<int:restaurant_pk>/events/', order_event_stream, name='order-event-stream'),
 ]
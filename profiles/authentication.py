@@ -0,0 +1,78 @@
+# profiles/authentication.py
+"""
+JWT authentication for the API.
+
+On top of simplejwt's JWTAuthentication:
+
+- The user row is cached for JWT_USER_CACHE_TTL seconds (0 turns it off), so
+  tablets polling the order endpoints don't load CustomUser on every call.
+  Any save or delete of the user (password change, deactivation, role edit)
+  and any token_version bump drops the entry (profiles/signals.py); the
+  active and revoked-password checks still run against the cached row.
+  A queryset .update() of users skips the signals, so it shows up only
+  after the TTL.
+- The user's restaurant ids are taken from the token's `restaurants` claim
+  while its token_version is current, so membership checks for the request
+  need no lookup at all (profiles/permissions.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from profiles.permissions import use_restaurant_claims
+
+USER_CACHE_KEY = 'auth:user:{user_id}'
+
+
+def user_cache_timeout():
+    return getattr(settings, 'JWT_USER_CACHE_TTL', 60)
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id=user_id)
+
+
+def forget_cached_users(user_ids):
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again once committed, in case a request cached the old row meanwhile
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+
+    def load_user(self, user_id):
+        timeout = user_cache_timeout()
+        key = user_cache_key(user_id)
+        user = cache.get(key) if timeout > 0 else None
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            if timeout > 0:
+                cache.set(key, user, timeout=timeout)
+        return user
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = self.load_user(user_id)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        use_restaurant_claims(user, validated_token)
+        return user
@@ -100,6 +100,10 @@ class CustomUser(AbstractUser):
         blank=True,
     )
 
+    # Bumped (with an F() update) whenever the restaurant claims in issued
+    # JWTs go stale, e.g. managed_restaurants changed (profiles/signals.py)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
     objects = CustomUserManager()
     
     # Required for AbstractUser
@@ -119,6 +123,16 @@ class CustomUser(AbstractUser):
     def is_manager_or_owner(self):
         return self.role in ('MANAGER', 'OWNER', 'STAFF')
 
+    def save(self, *args, **kwargs):
+        # A full save of an instance loaded earlier must not roll back a
+        # token version bump made since it was loaded.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'token_version'
+            ]
+        super().save(*args, **kwargs)
+
 
 class PromoPhoneNumber(models.Model):
     """
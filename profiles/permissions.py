@@ -0,0 +1,100 @@
+# profiles/permissions.py
+"""
+Restaurant membership for authorization checks.
+
+The ids of the restaurants a user manages or staffs (managed_restaurants)
+are loaded at most once per request: they're memoized on the user object and
+kept in the cache under a per-user key for RESTAURANT_MEMBERSHIP_CACHE_TTL
+seconds. Changing a user's restaurants (m2m_changed, profiles/signals.py)
+drops the entry, so views can check membership and scope querysets with
+`restaurant_id__in=managed_restaurant_ids(user)` instead of joining through
+managers_and_staff on every query.
+
+When JWT_RESTAURANT_CLAIMS is on, access tokens also carry the ids in a
+`restaurants` claim with the user's `token_version`. Any membership change
+bumps the version (profiles/signals.py), so the authentication class
+(profiles/authentication.py) trusts the claim only while the versions match
+and falls back to the cache otherwise.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import PermissionDenied
+
+CACHE_KEY = 'auth:restaurants:{user_id}'
+MEMO_ATTR = '_managed_restaurant_ids'
+
+RESTAURANTS_CLAIM = 'restaurants'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+def cache_timeout():
+    return getattr(settings, 'RESTAURANT_MEMBERSHIP_CACHE_TTL', 300)
+
+
+def cache_key(user_id):
+    return CACHE_KEY.format(user_id=user_id)
+
+
+def managed_restaurant_ids(user):
+    """frozenset of the restaurant ids this user manages (empty for anonymous users)."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, MEMO_ATTR, None)
+    if ids is not None:
+        return ids
+
+    key = cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(user.managed_restaurants.values_list('pk', flat=True))
+        cache.set(key, ids, timeout=cache_timeout())
+    setattr(user, MEMO_ATTR, ids)
+    return ids
+
+
+def restaurant_claims_enabled():
+    return getattr(settings, 'JWT_RESTAURANT_CLAIMS', True)
+
+
+def add_restaurant_claims(token, user):
+    """Put the user's restaurant ids and token version into a JWT."""
+    if restaurant_claims_enabled():
+        token[RESTAURANTS_CLAIM] = sorted(managed_restaurant_ids(user))
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+
+
+def use_restaurant_claims(user, token):
+    """
+    Take the user's memberships from a validated token when its claims are
+    current. Returns whether they were used.
+    """
+    restaurants = token.get(RESTAURANTS_CLAIM)
+    if (
+        not restaurant_claims_enabled()
+        or not isinstance(restaurants, list)
+        or token.get(TOKEN_VERSION_CLAIM) != user.token_version
+    ):
+        return False
+    setattr(user, MEMO_ATTR, frozenset(restaurants))
+    return True
+
+
+def can_manage_restaurant(user, restaurant_id):
+    return restaurant_id in managed_restaurant_ids(user)
+
+
+def require_restaurant_member(user, restaurant_id, message="You don't have permission to access this restaurant."):
+    """Raise PermissionDenied unless the user manages restaurant_id."""
+    if not can_manage_restaurant(user, restaurant_id):
+        raise PermissionDenied(message)
+
+
+def invalidate_membership(user_ids, users=()):
+    """Forget cached memberships for these user ids (and memoized ones on these user objects)."""
+    keys = [cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again once committed, in case a request cached the old memberships meanwhile
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    for user in users:
+        user.__dict__.pop(MEMO_ATTR, None)
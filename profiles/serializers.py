@@ -3,8 +3,11 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
 from profiles.models import CustomUser, PromoPhoneNumber
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from profiles.permissions import add_restaurant_claims
 
 User = get_user_model()
 
@@ -72,9 +75,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['role'] = user.role
-        token['phone'] = user.phone
-        token['email'] = user.email
+        add_user_claims(token, user)
         return token
 
     def validate(self, attrs):
@@ -134,6 +135,52 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
+def add_user_claims(token, user):
+    token['role'] = user.role
+    token['phone'] = user.phone
+    token['email'] = user.email
+    add_restaurant_claims(token, user)
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that rebuilds the user claims (role, restaurants, token
+    version) from the current user row, so a refreshed access token never
+    carries memberships that changed since login.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+        add_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # Blacklist app not installed
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
 class PromoPhoneNumberSerializer(serializers.ModelSerializer):
     """
     Serializer for PromoPhoneNumber model
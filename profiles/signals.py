@@ -0,0 +1,62 @@
+# profiles/signals.py
+"""
+Drop cached restaurant memberships (profiles/permissions.py) when a user's
+managed_restaurants change, from either side of the relation, and when a
+user is created. Membership changes also bump the users' token_version so
+the restaurant claims in their JWTs stop being trusted. Cached user rows
+(profiles/authentication.py) are dropped on every save, delete and version
+bump. Connected in ProfilesConfig.ready().
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from profiles.authentication import forget_cached_users
+from profiles.permissions import invalidate_membership
+
+User = get_user_model()
+
+
+def managed_restaurants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        # user.managed_restaurants.add(...)
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # restaurant.managers_and_staff.clear(): the users are only known before
+        user_ids = list(instance.managers_and_staff.values_list('pk', flat=True))
+    elif action == 'post_clear' or not pk_set:
+        return
+    else:
+        # restaurant.managers_and_staff.add(...)
+        user_ids = list(pk_set)
+
+    invalidate_membership(user_ids, users=[instance] if not reverse else ())
+    # Restaurant claims in tokens already issued to these users are now stale
+    User.objects.filter(pk__in=user_ids).update(token_version=F('token_version') + 1)
+    forget_cached_users(user_ids)
+
+
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Password changes, deactivation and role edits must reach the next request
+    forget_cached_users([instance.pk])
+    # A reused id must not inherit an earlier user's cached memberships
+    if created:
+        invalidate_membership([instance.pk])
+
+
+def user_deleted(sender, instance, **kwargs):
+    forget_cached_users([instance.pk])
+    invalidate_membership([instance.pk])
+
+
+m2m_changed.connect(
+    managed_restaurants_changed,
+    sender=User.managed_restaurants.through,
+    dispatch_uid='profiles_managed_restaurants_changed',
+)
+post_save.connect(user_saved, sender=User, dispatch_uid='profiles_user_saved')
+post_delete.connect(user_deleted, sender=User, dispatch_uid='profiles_user_deleted')
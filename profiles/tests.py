@@ -1,3 +1,179 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from menu.models import MenuCategory, MenuGroup, MenuItem, Restaurant
+from profiles.permissions import cache_key, managed_restaurant_ids
+
+User = get_user_model()
+
+
+class RestaurantMembershipCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Member Momo", address="1 Auth Lane")
+        self.other = Restaurant.objects.create(name="Elsewhere", address="2 Auth Lane")
+        self.user = User.objects.create_user(phone="9800000061", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_loaded_once_then_cached_across_requests(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertEqual(managed_restaurant_ids(user), {self.restaurant.pk})
+            managed_restaurant_ids(user)
+        # A later request loads a new user object; the cache entry serves it
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(managed_restaurant_ids(user), {self.restaurant.pk})
+
+    def test_invalidated_from_either_side_of_the_relation(self):
+        managed_restaurant_ids(self.fresh_user())
+        self.other.managers_and_staff.add(self.user)
+        self.assertEqual(managed_restaurant_ids(self.fresh_user()), {self.restaurant.pk, self.other.pk})
+
+        self.user.managed_restaurants.remove(self.restaurant)
+        self.assertEqual(managed_restaurant_ids(self.user), {self.other.pk})
+
+        self.other.managers_and_staff.clear()
+        self.assertEqual(managed_restaurant_ids(self.fresh_user()), frozenset())
+
+    def test_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.managed_restaurants.add(self.other)
+            # Another request, still seeing the old rows, caches them meanwhile
+            cache.set(cache_key(self.user.pk), frozenset({self.restaurant.pk}))
+        self.assertEqual(managed_restaurant_ids(self.fresh_user()), {self.restaurant.pk, self.other.pk})
+
+    def test_views_use_cached_membership(self):
+        group = MenuGroup.objects.create(restaurant=self.restaurant, type="Food")
+        category = MenuCategory.objects.create(menu_group=group, name="Momo")
+        item = MenuItem.objects.create(category=category, name="Veg Momo", price=120)
+        managed_restaurant_ids(self.fresh_user())
+
+        client = APIClient()
+        client.force_authenticate(self.fresh_user())
+        url = reverse('admin-menu-item-detail', kwargs={'pk': item.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(url, {'price': '130.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        membership_queries = [
+            q for q in queries.captured_queries if 'profiles_customuser_managed_restaurants' in q['sql']
+        ]
+        self.assertEqual(membership_queries, [])
+
+        foreign = MenuItem.objects.create(
+            category=MenuCategory.objects.create(
+                menu_group=MenuGroup.objects.create(restaurant=self.other, type="Food"), name="Other"
+            ),
+            name="Theirs", price=10,
+        )
+        url = reverse('admin-menu-item-detail', kwargs={'pk': foreign.pk})
+        response = client.patch(url, {'price': '1.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RestaurantClaimsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Claim Cafe", address="3 Token Street")
+        self.other = Restaurant.objects.create(name="Later Cafe", address="4 Token Street")
+        self.user = User.objects.create_user(phone="9800000071", password="pass", role='MANAGER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'identifier': "9800000071", 'password': "pass"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_login_embeds_restaurants_and_version(self):
+        access = AccessToken(self.login()['access'])
+        self.assertEqual(access['restaurants'], [self.restaurant.pk])
+        self.assertEqual(access['token_version'], User.objects.get(pk=self.user.pk).token_version)
+
+    def test_current_claims_skip_the_membership_lookup(self):
+        access = self.login()['access']
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin-menu-category-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([
+            q for q in queries.captured_queries if 'profiles_customuser_managed_restaurants' in q['sql']
+        ])
+
+    def test_membership_change_outdates_claims_until_refresh(self):
+        tokens = self.login()
+        version = User.objects.get(pk=self.user.pk).token_version
+        self.other.managers_and_staff.add(self.user)
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, version + 1)
+
+        # The old token's claim is ignored, so the new restaurant is visible already
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        url = reverse('admin-menu-view-stats', kwargs={'restaurant_pk': self.other.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.client.credentials()
+        refreshed = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}).json()
+        access = AccessToken(refreshed['access'])
+        self.assertEqual(sorted(access['restaurants']), sorted([self.restaurant.pk, self.other.pk]))
+        self.assertEqual(access['token_version'], version + 1)
+
+    def test_full_save_keeps_bumped_version(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.other.managers_and_staff.add(user)
+        user.first_name = "Sita"
+        user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, user.token_version + 1)
+
+
+class CachedJWTUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Poll Place", address="5 Tablet Road")
+        self.user = User.objects.create_user(phone="9800000081", password="pass", role='WAITER')
+        self.user.managed_restaurants.add(self.restaurant)
+        self.client = APIClient()
+        response = self.client.post(reverse('token_obtain_pair'), {'identifier': "9800000081", 'password': "pass"})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.url = reverse('current_user')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in queries.captured_queries if 'FROM "profiles_customuser"' in q['sql']]
+
+    def test_user_row_cached_between_requests(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_save_refreshes_the_cached_row(self):
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Hari"
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(self.url).json()['first_name'], "Hari")
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_ttl_zero_disables_the_cache(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
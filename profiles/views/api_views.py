@@ -6,7 +6,9 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.contrib.auth import logout
 from django.http import JsonResponse
-from profiles.serializers import CustomTokenObtainPairSerializer, UserSerializer, PromoPhoneNumberSerializer
+from profiles.serializers import (
+    CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer, UserSerializer, PromoPhoneNumberSerializer,
+)
 from profiles.models import PromoPhoneNumber
 
 
@@ -14,6 +16,10 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+
 class LogoutView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 